@@ -0,0 +1,156 @@
+"""Time the author and hIndex filters on a synthetic day of papers.
+
+Compares the former filters, which scan every alias of every author of every
+paper, with the AuthorIndex built once and looked up per author. The default
+day has 10000 papers with 10 authors each, drawn from a pool of authors with
+1 to 3 S2 aliases, and 200 followed author IDs.
+
+Run from the repository root:
+
+    python benchmarks/bench_author_index.py --papers 10000 --authors 10
+"""
+
+import argparse
+import configparser
+import random
+import sys
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from paper_assistant.core.arxiv_scraper import Paper, ScoredPaper  # noqa: E402
+from paper_assistant.utils.filter_papers import (  # noqa: E402
+    build_author_index,
+    filter_by_author,
+    filter_papers_by_hindex,
+)
+
+
+def legacy_filter_by_author(all_authors, papers, author_targets, config):
+    # filter_by_author before the author index
+    selected_papers, all_papers, sort_dict = {}, {}, {}
+    for paper in papers:
+        all_papers[paper.arxiv_id] = paper
+        for author in paper.authors:
+            if author in all_authors:
+                for alias in all_authors[author]:
+                    if alias["authorId"] in author_targets:
+                        selected_papers[paper.arxiv_id] = ScoredPaper(
+                            paper, {"COMMENT": "Author match"}
+                        )
+                        sort_dict[paper.arxiv_id] = float(
+                            config["SELECTION"]["author_match_score"]
+                        )
+                        break
+    return selected_papers, all_papers, sort_dict
+
+
+def legacy_filter_papers_by_hindex(all_authors, papers, config):
+    # filter_papers_by_hindex before the author index
+    paper_list = []
+    for paper in papers:
+        max_h = 0
+        for author in paper.authors:
+            if author in all_authors:
+                max_h = max(
+                    max_h, max([alias["hIndex"] for alias in all_authors[author]])
+                )
+        if max_h >= float(config["FILTERING"]["hcutoff"]):
+            paper_list.append(paper)
+    return paper_list
+
+
+def synthetic_day(papers: int, authors: int, seed: int = 0):
+    """(papers, author metadata, followed author IDs) of a synthetic day"""
+    rng = random.Random(seed)
+    names = [f"Author Name {n}" for n in range(papers * authors // 4)]
+    all_authors = {}
+    for n, name in enumerate(names):
+        all_authors[name] = [
+            {"authorId": f"{n}-{k}", "name": name, "hIndex": rng.randrange(60)}
+            for k in range(rng.randint(1, 3))
+        ]
+    day = [
+        Paper(
+            arxiv_id=f"2501.{n:05d}",
+            title=f"Paper {n}",
+            abstract="",
+            # some names S2 did not resolve
+            authors=[
+                rng.choice(names) if rng.random() < 0.9 else f"Unknown {n} {k}"
+                for k in range(authors)
+            ],
+        )
+        for n in range(papers)
+    ]
+    targets = {f"{n}-0" for n in rng.sample(range(len(names)), 200)}
+    return day, all_authors, targets
+
+
+def timed(fn, *args):
+    # (seconds, result)
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def legacy_run(all_authors, papers, targets, config):
+    # (seconds per step, selected papers, papers kept by the hIndex filter)
+    author, (selected, _, _) = timed(
+        legacy_filter_by_author, all_authors, papers, targets, config
+    )
+    hindex, kept = timed(legacy_filter_papers_by_hindex, all_authors, papers, config)
+    return (0.0, author, hindex), selected, kept
+
+
+def indexed_run(all_authors, papers, targets, config):
+    # a fresh index per run, shared by both filters as in process_papers
+    build, index = timed(build_author_index, all_authors, targets, config)
+    author, (selected, _, _) = timed(
+        filter_by_author, all_authors, papers, targets, config, index
+    )
+    hindex, kept = timed(filter_papers_by_hindex, all_authors, papers, config, index)
+    return (build, author, hindex), selected, kept
+
+
+def best_of(repeat: int, run, *args):
+    # the fastest of repeated runs, by total time
+    return min((run(*args) for _ in range(repeat)), key=lambda result: sum(result[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read("paper_assistant/config/config.ini")
+    config["SELECTION"]["author_name_match"] = "false"
+    papers, all_authors, targets = synthetic_day(args.papers, args.authors)
+    print(
+        f"{len(papers)} papers x {args.authors} authors, {len(all_authors)} "
+        f"resolved authors, {len(targets)} followed"
+    )
+
+    legacy, legacy_selected, legacy_kept = best_of(
+        args.repeat, legacy_run, all_authors, papers, targets, config
+    )
+    indexed, selected, kept = best_of(
+        args.repeat, indexed_run, all_authors, papers, targets, config
+    )
+    # same selections either way
+    assert list(selected) == list(legacy_selected)
+    assert kept == legacy_kept
+
+    print(f"{'step':<24}{'former (ms)':>12}{'indexed (ms)':>14}")
+    steps = ("build author index", "filter_by_author", "filter_papers_by_hindex")
+    for step, former, now in zip(steps, legacy, indexed):
+        print(f"{step:<24}{former * 1000:>12.1f}{now * 1000:>14.1f}")
+    print(f"{'total':<24}{sum(legacy) * 1000:>12.1f}{sum(indexed) * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Memory of a day's papers and selection records, scaled up from in/debug_papers.json.
+
+Compares the former representation (a plain dataclass per paper, each selection
+record a dataclasses.asdict copy) with the slotted Paper, its interned author
+names and ScoredPaper records that reference the paper. The scaled papers are
+serialized to JSON and loaded back, as from a feed cache, so every author
+occurrence starts out as its own string. Authors are drawn from a shared pool,
+as the same authors appear on many papers of a day.
+
+Run from the repository root:
+
+    python benchmarks/bench_paper_memory.py --papers 10000
+"""
+
+import argparse
+import dataclasses
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from os.path import abspath, dirname
+from typing import List
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from paper_assistant.core.arxiv_scraper import Paper, ScoredPaper  # noqa: E402
+
+
+@dataclasses.dataclass
+class LegacyPaper:
+    # the Paper dataclass as it was before slots and interning
+    authors: List[str]
+    title: str
+    abstract: str
+    arxiv_id: str
+
+    def __init__(self, arxiv_id=None, title=None, abstract=None, authors=None):
+        self.arxiv_id = arxiv_id
+        self.title = title
+        self.abstract = abstract
+        self.authors = authors
+        self.url = f"https://arxiv.org/abs/{self.arxiv_id}"
+        self.comment = None
+        self.relevance = None
+        self.novelty = None
+
+
+def scaled_papers(count: int, seed: int = 0) -> str:
+    """JSON list of ``count`` papers built from the debug papers"""
+    with open("in/debug_papers.json", "r") as f:
+        debug_papers = [paper for batch in json.load(f) for paper in batch]
+    rng = random.Random(seed)
+    names = sorted({author for paper in debug_papers for author in paper["authors"]})
+    pool = [f"{name} {n}" for n in range(20) for name in names]
+    papers = []
+    for n in range(count):
+        paper = debug_papers[n % len(debug_papers)]
+        papers.append(
+            {
+                "arxiv_id": f"2501.{n:05d}",
+                "title": paper["title"],
+                "abstract": paper["abstract"],
+                "authors": rng.sample(pool, 6),
+            }
+        )
+    return json.dumps(papers)
+
+
+def legacy_select(paper, scores):
+    return {**dataclasses.asdict(paper), **scores}
+
+
+def slotted_select(paper, scores):
+    return ScoredPaper(paper, scores)
+
+
+def measure(blob: str, make, select, selected_share: float):
+    # (MB held by the papers and records, peak MB, seconds)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    papers = [make(**entry) for entry in json.loads(blob)]
+    # every paper is scored, the share above the cutoffs is selected
+    records = {}
+    for i, paper in enumerate(papers):
+        scores = {"RELEVANCE": 8, "NOVELTY": 7, "COMMENT": "Scored"}
+        records[paper.arxiv_id] = select(paper, scores)
+        if i < len(papers) * selected_share:
+            records[paper.arxiv_id + "/selected"] = select(paper, scores)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del papers, records
+    return current / 1e6, peak / 1e6, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=10000)
+    parser.add_argument("--selected", type=float, default=0.1)
+    args = parser.parse_args()
+
+    blob = scaled_papers(args.papers)
+    print(f"{args.papers} papers, {len(blob) / 1e6:.1f} MB of JSON")
+    print(f"{'representation':<20}{'held MB':>10}{'peak MB':>10}{'time (s)':>10}")
+    for name, make, select in (
+        ("dataclass+asdict", LegacyPaper, legacy_select),
+        ("slots+ScoredPaper", Paper, slotted_select),
+    ):
+        held, peak, elapsed = measure(blob, make, select, args.selected)
+        print(f"{name:<20}{held:>10.1f}{peak:>10.1f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare the feedparser and streaming RSS paths on a large synthetic arXiv feed.
+
+The feed is served over local HTTP, so both paths run exactly as in generate:
+download, parse, clean and build Paper objects. Reported per parser: time to the
+first paper, total time (best of --repeat) and peak Python memory, measured
+with tracemalloc in a separate run since tracing slows parsing down.
+
+Run from the repository root:
+
+    python benchmarks/bench_rss_parser.py --papers 20000
+"""
+
+import argparse
+import configparser
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from paper_assistant.core import arxiv_scraper  # noqa: E402
+
+WORDS = (
+    "language model transformer attention retrieval alignment reasoning token "
+    "benchmark dataset training inference latency sparse dense graph diffusion "
+    "agent policy reward evaluation robust efficient multilingual vision"
+).split()
+
+ITEM = """<item>
+<title>{title}</title>
+<link>https://arxiv.org/abs/2501.{n:05d}</link>
+<description>arXiv:2501.{n:05d}v1 Announce Type: new
+Abstract: {abstract}</description>
+<guid isPermaLink="false">oai:arXiv.org:2501.{n:05d}v1</guid>
+<category>cs.CL</category>
+<arxiv:announce_type>new</arxiv:announce_type>
+<dc:creator>{authors}</dc:creator>
+</item>
+"""
+
+
+def synthetic_feed(count: int, seed: int = 0) -> bytes:
+    """arXiv-style RSS feed of ``count`` new cs.CL papers with ~1.2k char abstracts"""
+    rng = random.Random(seed)
+    items = []
+    for n in range(count):
+        abstract = " ".join(rng.choice(WORDS) for _ in range(160))
+        items.append(
+            ITEM.format(
+                n=n,
+                title=" ".join(rng.choice(WORDS) for _ in range(8)).title(),
+                # inline markup and entities, as arXiv sends them
+                abstract=f"We study &lt;b&gt;{abstract}&lt;/b&gt; &amp; more.",
+                authors=", ".join(f"Author {rng.randrange(5000)}" for _ in range(6)),
+            )
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss xmlns:arxiv="http://arxiv.org/schemas/atom" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">\n<channel>\n'
+        "<title>cs.CL updates on arXiv.org</title>\n"
+        "<lastBuildDate>Tue, 14 Jan 2025 05:00:00 +0000</lastBuildDate>\n"
+        + "".join(items)
+        + "</channel>\n</rss>\n"
+    ).encode()
+
+
+def serve(feed: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(feed)))
+            self.end_headers()
+            self.wfile.write(feed)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(config, parser: str):
+    # (papers, seconds to the first paper, seconds in total)
+    config["FILTERING"]["rss_parser"] = parser
+    start = time.perf_counter()
+    first = None
+    count = 0
+    if parser == "streaming":
+        for _ in arxiv_scraper.stream_papers_from_arxiv_rss("cs.CL", config):
+            if first is None:
+                first = time.perf_counter() - start
+            count += 1
+    else:
+        papers, _, _ = arxiv_scraper.get_papers_from_arxiv_rss("cs.CL", config)
+        first = time.perf_counter() - start
+        count = len(papers)
+    return count, first, time.perf_counter() - start
+
+
+def peak_memory(config, parser: str) -> int:
+    tracemalloc.start()
+    try:
+        measure(config, parser)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read("paper_assistant/config/config.ini")
+    config["OUTPUT"]["debug_messages"] = "false"
+
+    feed = synthetic_feed(args.papers)
+    server = serve(feed)
+    arxiv_scraper.ARXIV_RSS_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    print(f"Synthetic feed: {args.papers} papers, {len(feed) / 1e6:.1f} MB")
+    print(
+        f"{'parser':<12}{'papers':>8}{'first (s)':>12}{'total (s)':>12}{'peak MB':>10}"
+    )
+    try:
+        for name in ("feedparser", "streaming"):
+            runs = [measure(config, name) for _ in range(args.repeat)]
+            count, first, total = min(runs, key=lambda run: run[2])
+            peak = peak_memory(config, name)
+            print(
+                f"{name:<12}{count:>8}{first:>12.3f}{total:>12.3f}{peak / 1e6:>10.1f}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
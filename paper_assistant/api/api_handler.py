@@ -1,22 +1,157 @@
 import json
-import time
-from typing import TypeVar, Generator, List, Dict, Optional
-from requests import Session
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar, Generator, List, Dict, Optional, Tuple
+from requests import HTTPError, RequestException, Session
 from tqdm import tqdm
-from retry import retry
+from loguru import logger
+
+from paper_assistant.api.author_cache import (
+    AuthorCache,
+    normalize_author_key,
+    open_author_cache,
+)
+from paper_assistant.core.arxiv_scraper import Paper, strip_arxiv_version
+from paper_assistant.api.rate_limiter import TokenBucket
+from paper_assistant.api.retry_policy import (
+    RETRYABLE_STATUS,
+    CircuitOpenError,
+    RetryPolicy,
+    retried,
+)
 
 T = TypeVar("T")
 
+S2_HOST = "api.semanticscholar.org"
+S2_API_URL = f"https://{S2_HOST}/graph/v1/"
+# the documented quota of an S2 API key
+S2_REQUESTS_PER_SECOND = 1.0
+# S2 refuses the API key, every further request would fail the same way
+AUTH_STATUS = {401, 403}
+
+
+class S2AuthError(Exception):
+    """Raised when Semantic Scholar rejects the API key"""
+
 
 class APIHandler:
-    def __init__(self, s2_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        s2_api_key: Optional[str] = None,
+        author_cache: Optional[AuthorCache] = None,
+        requests_per_second: Optional[float] = None,
+        max_workers: int = 4,
+        resolution_mode: str = "search",
+        retry_policy: Optional[RetryPolicy] = None,
+        deferred_passes: int = 1,
+    ):
         self.s2_api_key = s2_api_key
+        self.resolution_mode = resolution_mode
+        self.author_cache = author_cache
+        # S2 grants an API key 1 request per second across all endpoints, and
+        # requests without a key share a public pool, so 1 unless configured
+        # otherwise. The limit holds across all max_workers threads.
+        if requests_per_second is None:
+            requests_per_second = S2_REQUESTS_PER_SECOND
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_workers = max(1, max_workers)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.deferred_passes = max(0, deferred_passes)
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config, s2_api_key: Optional[str] = None) -> "APIHandler":
+        """Build a handler from the [SEMANTIC_SCHOLAR] config section"""
+        section = (
+            config["SEMANTIC_SCHOLAR"] if config.has_section("SEMANTIC_SCHOLAR") else {}
+        )
+        key = "rate_limit_with_key" if s2_api_key else "rate_limit_no_key"
+        rate = section.get(key, "").strip()
+        return cls(
+            s2_api_key=s2_api_key,
+            author_cache=open_author_cache(config),
+            requests_per_second=float(rate) if rate else None,
+            max_workers=int(section.get("author_workers", 4)),
+            resolution_mode=section.get("resolution_mode", "search").strip(),
+            retry_policy=RetryPolicy.from_config(section),
+            deferred_passes=int(section.get("deferred_passes", 1)),
+        )
+
+    def _session(self) -> Session:
+        """Per-thread session, requests.Session is not safe to share across threads"""
+        if not hasattr(self._local, "session"):
+            self._local.session = Session()
+        return self._local.session
+
+    def _resolve_author(self, author: str) -> Optional[List[Dict]]:
+        return self.get_one_author(self._session(), author)
+
+    def _attempt(self, fn, item) -> Tuple[Optional[bool], Optional[T]]:
+        """Call fn(item), returning (done, result).
+
+        done is False if the item should be tried again later and None if S2
+        rejected it; neither result is a real answer to be cached.
+        """
+        try:
+            return True, fn(item)
+        except CircuitOpenError:
+            return False, None
+        except HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in RETRYABLE_STATUS:
+                return False, None
+            if status in AUTH_STATUS:
+                raise S2AuthError(
+                    f"Semantic Scholar rejected the API key ({status}), check S2_API_KEY"
+                ) from e
+            # the request itself is bad, trying again will not help
+            logger.warning(f"Semantic Scholar rejected {item!r}: {e}")
+            return None, None
+        except RequestException as e:
+            logger.debug(f"Semantic Scholar request for {item!r} failed: {e}")
+            return False, None
+
+    def _call_with_deferral(
+        self, fn, items: List, label: str, executor=None
+    ) -> Tuple[List, List[int]]:
+        """Call fn on every item, deferring failed items to later passes.
+
+        Items that still fail after ``deferred_passes`` extra passes, or that S2
+        rejected, are skipped instead of aborting the run. Returns (results aligned
+        with items, indexes of the items that failed), failed items have a None
+        result.
+        """
+        results = [None] * len(items)
+        pending = list(range(len(items)))
+        rejected = []
+        for pass_no in range(self.deferred_passes + 1):
+            if pass_no:
+                logger.info(f"Retrying {len(pending)} deferred {label}")
+                self.retry_policy.wait_until_closed(S2_HOST)
+            mapper = executor.map if executor is not None else map
+            outcomes = mapper(lambda i: self._attempt(fn, items[i]), pending)
+            deferred = []
+            for i, (done, result) in tqdm(
+                zip(pending, outcomes), total=len(pending), disable=len(pending) < 2
+            ):
+                if done:
+                    results[i] = result
+                elif done is None:
+                    rejected.append(i)
+                else:
+                    deferred.append(i)
+            pending = deferred
+            if not pending:
+                break
+        if pending:
+            logger.warning(f"Giving up on {len(pending)} {label} for this run")
+        return results, sorted(pending + rejected)
 
     def batched(self, items: list[T], batch_size: int) -> list[T]:
         """Batch items into smaller chunks"""
         return [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
 
-    @retry(tries=3, delay=2.0)
+    @retried(S2_HOST)
     def get_paper_batch(
         self, session: Session, ids: List[str], fields: str = "paperId,title", **kwargs
     ) -> List[Dict]:
@@ -25,7 +160,7 @@ class APIHandler:
         headers = {"X-API-KEY": self.s2_api_key} if self.s2_api_key else {}
 
         with session.post(
-            "https://api.semanticscholar.org/graph/v1/paper/batch",
+            S2_API_URL + "paper/batch",
             params=params,
             headers=headers,
             json={"ids": ids},
@@ -33,7 +168,7 @@ class APIHandler:
             response.raise_for_status()
             return response.json()
 
-    @retry(tries=3, delay=2.0)
+    @retried(S2_HOST)
     def get_author_batch(
         self,
         session: Session,
@@ -46,7 +181,7 @@ class APIHandler:
         headers = {"X-API-KEY": self.s2_api_key} if self.s2_api_key else {}
 
         with session.post(
-            "https://api.semanticscholar.org/graph/v1/author/batch",
+            S2_API_URL + "author/batch",
             params=params,
             headers=headers,
             json={"ids": ids},
@@ -54,14 +189,14 @@ class APIHandler:
             response.raise_for_status()
             return response.json()
 
-    @retry(tries=3, delay=2.0)
+    @retried(S2_HOST)
     def get_one_author(self, session: Session, author: str) -> Optional[List[Dict]]:
         """Get single author info from Semantic Scholar API"""
         params = {"query": author, "fields": "authorId,name,hIndex", "limit": "10"}
         headers = {"X-API-KEY": self.s2_api_key} if self.s2_api_key else {}
 
         with session.get(
-            "https://api.semanticscholar.org/graph/v1/author/search",
+            S2_API_URL + "author/search",
             params=params,
             headers=headers,
         ) as response:
@@ -92,10 +227,159 @@ class APIHandler:
                 pass
 
         author_metadata_dict = {}
-        with Session() as session:
-            for author in tqdm(all_authors):
-                auth_map = self.get_one_author(session, author)
-                if auth_map is not None:
-                    author_metadata_dict[author] = auth_map
-                time.sleep(0.02 if self.s2_api_key else 1.0)
+        pending = []
+        for author in all_authors:
+            if self.author_cache is not None:
+                hit, auth_map = self.author_cache.lookup(author)
+                if hit:
+                    if auth_map is not None:
+                        author_metadata_dict[author] = auth_map
+                    continue
+            pending.append(author)
+
+        # workers overlap request latency while the token bucket holds the overall
+        # request rate at the S2 quota
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results, failed = self._call_with_deferral(
+                self._resolve_author, pending, "author lookups", executor
+            )
+        failed = set(failed)
+        for i, (author, auth_map) in enumerate(zip(pending, results)):
+            if auth_map is not None:
+                author_metadata_dict[author] = auth_map
+            # names that failed or were rejected are not cached, so the next run
+            # looks them up again
+            if self.author_cache is not None and i not in failed:
+                self.author_cache.store(author, auth_map)
+
+        if self.author_cache is not None:
+            stats = self.author_cache.stats()
+            logger.info(
+                f"Author cache: {stats['hits']} hits, {stats['negative_hits']} "
+                f"cached misses, {stats['misses']} misses "
+                f"({stats['expired']} expired), {len(pending)} names looked up"
+            )
         return author_metadata_dict
+
+    def resolve_authors(self, papers: List[Paper]) -> Dict:
+        """Get author metadata for the authors of papers using the configured mode.
+
+        ``search`` looks every name up with the author search endpoint.
+        ``paper_batch`` resolves exact author IDs through the paper batch endpoint
+        and only falls back to name search for papers S2 has not indexed yet.
+        """
+        all_authors = set()
+        for paper in papers:
+            all_authors.update(paper.authors)
+        if self.resolution_mode != "paper_batch":
+            return self.get_authors(list(all_authors))
+
+        author_metadata_dict, unresolved = self.get_authors_by_papers(papers)
+        fallback = set()
+        for paper in unresolved:
+            fallback.update(
+                author for author in paper.authors if author not in author_metadata_dict
+            )
+        logger.info(
+            f"Resolved {len(author_metadata_dict)} authors through paper batches, "
+            f"{len(unresolved)} papers not in S2 or not fully matched, "
+            f"{len(fallback)} names to search"
+        )
+        if fallback:
+            author_metadata_dict.update(self.get_authors(list(fallback)))
+        return author_metadata_dict
+
+    def get_authors_by_papers(
+        self,
+        papers: List[Paper],
+        paper_batch_size: int = 500,
+        author_batch_size: int = 1000,
+    ):
+        """Resolve exact author IDs by looking papers up as arXiv:<id> in batches.
+
+        Returns (author metadata keyed by arXiv author name, papers S2 did not know
+        or with authors it could not match). The metadata has the same shape as the
+        author search results.
+        """
+        paper_authors = {}
+        unresolved = []
+        with Session() as session:
+            papers_batches = self.batched(papers, paper_batch_size)
+            batch_results, _ = self._call_with_deferral(
+                lambda batch: self.get_paper_batch(
+                    session,
+                    ["arXiv:" + strip_arxiv_version(paper.arxiv_id) for paper in batch],
+                    fields="externalIds,authors",
+                ),
+                papers_batches,
+                "paper batches",
+            )
+            for papers_batch, results in zip(papers_batches, batch_results):
+                # a batch that failed falls back to name search like unknown papers
+                results = results or [None] * len(papers_batch)
+                for paper, result in zip(papers_batch, results):
+                    if not result or not result.get("authors"):
+                        unresolved.append(paper)
+                        continue
+                    paper_authors[paper.arxiv_id] = self._match_authors(
+                        paper.authors, result["authors"]
+                    )
+
+            # refresh hIndex once per unique author ID
+            author_ids = sorted(
+                {
+                    author_id
+                    for matched in paper_authors.values()
+                    for author_id in matched.values()
+                }
+            )
+            details = {}
+            batch_results, _ = self._call_with_deferral(
+                lambda ids_batch: self.get_author_batch(
+                    session, ids_batch, fields="authorId,name,hIndex"
+                ),
+                self.batched(author_ids, author_batch_size),
+                "author batches",
+            )
+            for results in batch_results:
+                for result in results or []:
+                    if result:
+                        details[result["authorId"]] = result
+
+        author_metadata_dict = {}
+        papers_by_id = {paper.arxiv_id: paper for paper in papers}
+        for arxiv_id, matched in paper_authors.items():
+            paper = papers_by_id[arxiv_id]
+            # names S2 lists differently, or without details, go to name search
+            if len(matched) < len(set(paper.authors)) or any(
+                author_id not in details for author_id in matched.values()
+            ):
+                unresolved.append(paper)
+            for name, author_id in matched.items():
+                if author_id not in details:
+                    continue
+                aliases = author_metadata_dict.setdefault(name, [])
+                if all(alias["authorId"] != author_id for alias in aliases):
+                    aliases.append(details[author_id])
+        if self.author_cache is not None:
+            for name, aliases in author_metadata_dict.items():
+                self.author_cache.store(name, aliases)
+        return author_metadata_dict, unresolved
+
+    def _match_authors(self, names: List[str], s2_authors: List[Dict]) -> Dict:
+        """Map arXiv author names to S2 author IDs for one paper, leaving out
+        names that could not be matched"""
+        s2_authors = [author for author in s2_authors if author.get("authorId")]
+        if len(names) == len(s2_authors):
+            # same author list, the order on arXiv and S2 matches
+            return {name: author["authorId"] for name, author in zip(names, s2_authors)}
+        by_name = {
+            normalize_author_key(author["name"]): author["authorId"]
+            for author in s2_authors
+            if author.get("name")
+        }
+        return {
+            name: by_name[normalize_author_key(name)]
+            for name in names
+            if normalize_author_key(name) in by_name
+        }
@@ -1,4 +1,5 @@
 from flask import Flask, render_template, jsonify, request
+import configparser
 import json
 from datetime import datetime
 import threading
@@ -9,6 +10,7 @@ from paper_assistant.core.qa_processor import QaProcessor
 from paper_assistant.utils.markdown_processor import MarkdownProcessor
 from paper_assistant.utils.helpers import get_api_key
 from paper_assistant.utils.cache_handler import CacheHandler
+from paper_assistant.utils.paper_store import open_paper_store
 from loguru import logger
 
 # Thread-safe progress tracking
@@ -42,16 +44,20 @@ def create_app(template_dir=None, static_dir=None):
     app.config["DEBUG"] = os.getenv("FLASK_DEBUG", "False").lower() == "true"
     app.config["TEMPLATES_AUTO_RELOAD"] = True
 
-    # Initialize cache handler with configurable base directory
+    # Initialize cache handler with configurable base directory, reading and writing
+    # through the SQLite paper store instead when one is configured
+    config = configparser.ConfigParser()
+    config.read("paper_assistant/config/config.ini")
+    paper_store = open_paper_store(config)
     cache_dir = os.getenv("CACHE_DIR", "out/cache")
-    cache_handler = CacheHandler(cache_dir)
+    cache_handler = CacheHandler(cache_dir, store=paper_store)
 
     # Get API key and initialize processors with proper error handling
     try:
         GEMINI_API_KEY = get_api_key()
         if not GEMINI_API_KEY:
             raise ValueError("API key is empty or invalid")
-        qa_processor = QaProcessor(api_key=GEMINI_API_KEY)
+        qa_processor = QaProcessor(api_key=GEMINI_API_KEY, paper_store=paper_store)
         md_processor = MarkdownProcessor()
     except Exception as e:
         app.logger.error(f"Error initializing API key: {str(e)}")
@@ -101,6 +107,58 @@ def create_app(template_dir=None, static_dir=None):
         except Exception as e:
             app.logger.error(f"Error in cache_daily_output: {str(e)}")
 
+    def load_papers(date_param):
+        """Load a day's papers, falling back to the latest output"""
+        if date_param:
+            papers_dict = cache_handler.get_cached_data(f"{date_param}_output")
+            if papers_dict:
+                display_date = datetime.strptime(date_param, "%Y-%m-%d").strftime(
+                    "%B %d, %Y"
+                )
+                return papers_dict, display_date
+        if paper_store is not None:
+            dates = paper_store.get_dates()
+            if dates:
+                display_date = datetime.strptime(dates[0], "%Y-%m-%d").strftime(
+                    "%B %d, %Y"
+                )
+                return paper_store.get_output(dates[0]), display_date
+        # Fallback to output.json if cache not found
+        with open("out/output.json", "r") as f:
+            papers_dict = json.load(f)
+        return papers_dict, datetime.now().strftime("%B %d, %Y")
+
+    def find_paper(arxiv_id, date_param):
+        """Find a selected paper by arxiv id, ignoring version numbers"""
+        clean_input_id = arxiv_id.split("v")[0] if arxiv_id else None
+        if paper_store is not None:
+            return paper_store.find_paper(
+                clean_input_id, date_param
+            ) or paper_store.find_paper(clean_input_id)
+
+        # Determine which file to load based on date
+        if date_param and os.path.exists(f"out/cache/{date_param}_output.json"):
+            json_file = f"out/cache/{date_param}_output.json"
+        else:
+            json_file = "out/output.json"
+
+        logger.info(f"Loading papers from: {json_file}")
+
+        # Load the paper data
+        with open(json_file, "r") as f:
+            papers = json.load(f)
+
+        # Find the paper with matching arxiv_id
+        for p in papers.values():
+            paper_arxiv_id = p.get("ARXIVID") or p.get("arxiv_id")
+            logger.info(f"Comparing with paper ID: {paper_arxiv_id}")
+
+            # Strip version numbers from arxiv IDs for comparison
+            clean_paper_id = paper_arxiv_id.split("v")[0] if paper_arxiv_id else None
+            if clean_paper_id == clean_input_id:
+                return p
+        return None
+
     @app.route("/")
     def index():
         """Main route to display papers"""
@@ -132,21 +190,7 @@ def create_app(template_dir=None, static_dir=None):
                 ), 503
 
             # Load papers using cache handler
-            if date_param:
-                papers_dict = cache_handler.get_cached_data(f"{date_param}_output")
-                if papers_dict:
-                    display_date = datetime.strptime(date_param, "%Y-%m-%d").strftime(
-                        "%B %d, %Y"
-                    )
-                else:
-                    # Fallback to output.json if cache not found
-                    with open("out/output.json", "r") as f:
-                        papers_dict = json.load(f)
-                    display_date = datetime.now().strftime("%B %d, %Y")
-            else:
-                with open("out/output.json", "r") as f:
-                    papers_dict = json.load(f)
-                display_date = datetime.now().strftime("%B %d, %Y")
+            papers_dict, display_date = load_papers(date_param)
 
             # Load header content
             with open("paper_assistant/config/header.md", "r") as f:
@@ -231,43 +275,21 @@ def create_app(template_dir=None, static_dir=None):
             # Add debug logging
             logger.info(f"Looking for paper with arxiv_id: {arxiv_id}")
 
-            # Determine which file to load based on date
-            if date_param and os.path.exists(f"out/cache/{date_param}_output.json"):
-                json_file = f"out/cache/{date_param}_output.json"
-            else:
-                json_file = "out/output.json"
-
-            logger.info(f"Loading papers from: {json_file}")
-
-            # Load the paper data
-            with open(json_file, "r") as f:
-                papers = json.load(f)
-
-            # Find the paper with matching arxiv_id
             paper = None
-            for p in papers.values():
+            p = find_paper(arxiv_id, date_param)
+            if p is not None:
                 paper_arxiv_id = p.get("ARXIVID") or p.get("arxiv_id")
-                logger.info(f"Comparing with paper ID: {paper_arxiv_id}")
-
-                # Strip version numbers from arxiv IDs for comparison
-                clean_paper_id = (
-                    paper_arxiv_id.split("v")[0] if paper_arxiv_id else None
-                )
-                clean_input_id = arxiv_id.split("v")[0] if arxiv_id else None
-
-                if clean_paper_id == clean_input_id:
-                    paper_data = {
-                        "arxiv_id": paper_arxiv_id,
-                        "title": p["title"],
-                        "abstract": p["abstract"],
-                        "authors": p["authors"],
-                        "url": f"https://arxiv.org/abs/{paper_arxiv_id}",
-                        "comment": p.get("COMMENT") or p.get("comment"),
-                        "relevance": p.get("RELEVANCE") or p.get("relevance"),
-                        "novelty": p.get("NOVELTY") or p.get("novelty"),
-                    }
-                    paper = Paper(**paper_data)
-                    break
+                paper_data = {
+                    "arxiv_id": paper_arxiv_id,
+                    "title": p["title"],
+                    "abstract": p["abstract"],
+                    "authors": p["authors"],
+                    "url": f"https://arxiv.org/abs/{paper_arxiv_id}",
+                    "comment": p.get("COMMENT") or p.get("comment"),
+                    "relevance": p.get("RELEVANCE") or p.get("relevance"),
+                    "novelty": p.get("NOVELTY") or p.get("novelty"),
+                }
+                paper = Paper(**paper_data)
 
             if not paper:
                 logger.warning(f"No paper found matching arxiv_id: {arxiv_id}")
@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import threading
+import time
+import os
+import unicodedata
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def normalize_author_key(name: str) -> str:
+    """Cache key for an author name: Unicode-normalized, casefolded, single-spaced"""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def open_author_cache(config) -> Optional["AuthorCache"]:
+    """Open the author cache configured in [SEMANTIC_SCHOLAR], or None if disabled"""
+    if "SEMANTIC_SCHOLAR" not in config:
+        return None
+    section = config["SEMANTIC_SCHOLAR"]
+    if not section.getboolean("author_cache", False):
+        return None
+    return AuthorCache(
+        config["OUTPUT"]["output_path"] + "author_cache.sqlite3",
+        ttl_days=section.getfloat("author_cache_ttl_days", 30),
+        negative_ttl_days=section.getfloat("author_cache_negative_ttl_days", 7),
+    )
+
+
+class AuthorCache:
+    """Persistent Semantic Scholar author lookups with a time-to-live.
+
+    Names that returned no match are cached too (negative caching) with their own,
+    usually shorter, TTL so they are retried once S2 may have indexed them.
+    """
+
+    def __init__(
+        self, db_path: str, ttl_days: float = 30, negative_ttl_days: float = 7
+    ):
+        self.db_path = db_path
+        self.ttl = ttl_days * SECONDS_PER_DAY
+        self.negative_ttl = negative_ttl_days * SECONDS_PER_DAY
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS author_cache ("
+                "name TEXT PRIMARY KEY, data TEXT, fetched_at REAL NOT NULL)"
+            )
+
+    def lookup(self, name: str) -> Tuple[bool, Optional[List[Dict]]]:
+        """Return (hit, aliases). aliases is None for a cached miss."""
+        with self._lock:
+            with closing(self._conn.cursor()) as cursor:
+                row = cursor.execute(
+                    "SELECT data, fetched_at FROM author_cache WHERE name = ?",
+                    (normalize_author_key(name),),
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            data, fetched_at = row
+            ttl = self.ttl if data is not None else self.negative_ttl
+            if time.time() - fetched_at > ttl:
+                self.expired += 1
+                self.misses += 1
+                return False, None
+            if data is None:
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+            return True, json.loads(data)
+
+    def store(self, name: str, aliases: Optional[List[Dict]]):
+        """Cache the aliases found for a name, or None when S2 had no match"""
+        data = json.dumps(aliases) if aliases is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO author_cache VALUES (?, ?, ?)",
+                (normalize_author_key(name), data, time.time()),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this run"""
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
@@ -0,0 +1,138 @@
+import json
+import re
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+from paper_assistant.utils.filter_papers import FilteredPapers, PaperScore
+from paper_assistant.utils.llm_cache import text_hash
+from paper_assistant.utils.token_budget import estimate_tokens
+
+ARXIV_ID_RE = re.compile(r"ArXiv ID: (\S+)")
+
+
+class LocalLLMClient:
+    """Offline stand-in for the instructor client, used by ``generate --dry-run``.
+
+    Answers every call without an API: the abstract filter keeps all papers and
+    scoring gives each paper scores derived from its arXiv ID, with token usage
+    estimated locally so the usage report shows what a real run would send.
+
+    It also stands in for a provider's context cache. PromptCache creates its
+    handles through ``create_context_cache``, and every call naming a handle is
+    checked against them: unknown or deleted handles and a model other than the
+    one cached are rejected like a provider would. ``verify`` then tells whether
+    each prompt prefix was cached once and reused by the batches sharing it.
+    """
+
+    def __init__(self):
+        # client.chat.completions.create_with_completion, as with instructor
+        self.chat = SimpleNamespace(completions=self)
+        self._caches: Dict[str, Tuple[str, str]] = {}
+        self._created: Counter = Counter()
+        self._uses: Counter = Counter()
+        self._deleted = set()
+        self._rejected = 0
+        self._uncached_repeats = 0
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def create_context_cache(self, model: str, prefix: str, ttl_seconds: int) -> str:
+        with self._lock:
+            handle = f"localCachedContents/{len(self._caches) + len(self._deleted)}"
+            self._caches[handle] = (model, prefix)
+            self._created[(model, text_hash(prefix))] += 1
+        return handle
+
+    def delete_context_cache(self, handle: str):
+        with self._lock:
+            if self._caches.pop(handle, None) is None:
+                raise ValueError(f"No context cache {handle}")
+            self._deleted.add(handle)
+
+    def create_with_completion(
+        self, model, messages, response_model, cached_content=None, **kwargs
+    ):
+        prompt = "".join(message["content"] for message in messages)
+        cached_tokens = 0
+        with self._lock:
+            self._calls += 1
+            if cached_content is not None:
+                model_and_prefix = self._caches.get(cached_content)
+                if model_and_prefix is None or model_and_prefix[0] != model:
+                    self._rejected += 1
+                    raise ValueError(
+                        f"Context cache {cached_content} does not exist for {model}"
+                    )
+                self._uses[cached_content] += 1
+                cached_tokens = estimate_tokens(model_and_prefix[1])
+                prompt = model_and_prefix[1] + prompt
+            elif any(
+                cached_model == model and prompt.startswith(prefix)
+                for cached_model, prefix in self._caches.values()
+            ):
+                # sent in full although its prefix is cached
+                self._uncached_repeats += 1
+
+        arxiv_ids = list(dict.fromkeys(ARXIV_ID_RE.findall(prompt)))
+        if response_model is FilteredPapers:
+            response = FilteredPapers(filtered_ids=[])
+        else:
+            response = [self._score(arxiv_id) for arxiv_id in arxiv_ids]
+        answer = json.dumps(
+            response.model_dump()
+            if response_model is FilteredPapers
+            else [score.model_dump() for score in response]
+        )
+        completion = SimpleNamespace(
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(answer),
+                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+            )
+        )
+        return response, completion
+
+    def _score(self, arxiv_id: str) -> PaperScore:
+        # stable across runs, spread over the whole scale
+        digest = int(text_hash(arxiv_id)[:8], 16)
+        return PaperScore(
+            ARXIVID=arxiv_id,
+            RELEVANCE=1 + digest % 10,
+            NOVELTY=1 + (digest // 10) % 10,
+            COMMENT="Dry run",
+            CRITERION="",
+        )
+
+    def verify(self) -> bool:
+        """Log how the context caches were used, False if any was not reused"""
+        with self._lock:
+            duplicates = sum(count - 1 for count in self._created.values())
+            unused = [
+                handle
+                for handle in list(self._caches) + sorted(self._deleted)
+                if self._uses[handle] < 2
+            ]
+            logger.info(
+                f"Dry run: {self._calls} LLM calls, {len(self._created)} prompt "
+                f"prefixes cached, {sum(self._uses.values())} calls used a cache"
+            )
+            problems: List[str] = []
+            if duplicates:
+                problems.append(f"{duplicates} prefixes were cached more than once")
+            if unused:
+                problems.append(f"{len(unused)} caches were used by fewer than 2 calls")
+            if self._rejected:
+                problems.append(f"{self._rejected} calls named an unknown cache")
+            if self._uncached_repeats:
+                problems.append(
+                    f"{self._uncached_repeats} calls resent a cached prefix in full"
+                )
+            if self._caches:
+                problems.append(f"{len(self._caches)} caches were never deleted")
+        for problem in problems:
+            logger.error(f"Dry run context caching: {problem}")
+        return not problems
@@ -0,0 +1,161 @@
+import functools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, TypeVar
+
+from loguru import logger
+from requests import ConnectionError, HTTPError, Timeout
+
+T = TypeVar("T")
+
+# 429 and 5xx are worth retrying, any other 4xx will fail the same way again
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the service while a host's circuit is open"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Shared retry policy for outbound HTTP calls.
+
+    Retries connection errors, timeouts, 429 and 5xx responses with exponential
+    backoff and full jitter, honouring ``Retry-After`` when the server sends it.
+    Other 4xx errors are raised at once. After ``breaker_threshold`` consecutive
+    failed calls to a host its circuit opens for ``breaker_cooldown`` seconds, and
+    calls fail fast with CircuitOpenError so callers can defer the work instead of
+    piling more requests onto a throttled service.
+    """
+
+    def __init__(
+        self,
+        tries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+    ):
+        self.tries = max(1, tries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, section) -> "RetryPolicy":
+        """Build a policy from a config section (or any mapping) of retry_* keys"""
+        return cls(
+            tries=int(section.get("retry_tries", 4)),
+            base_delay=float(section.get("retry_base_delay", 1.0)),
+            max_delay=float(section.get("retry_max_delay", 60.0)),
+            breaker_threshold=int(section.get("breaker_threshold", 5)),
+            breaker_cooldown=float(section.get("breaker_cooldown", 30.0)),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt (attempt counts from 0)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return time.monotonic() < self._open_until.get(host, 0.0)
+
+    def wait_until_closed(self, host: str):
+        """Sleep until the circuit of a host is no longer open"""
+        with self._lock:
+            remaining = self._open_until.get(host, 0.0) - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _record(self, host: str, success: bool):
+        with self._lock:
+            if success:
+                self._failures[host] = 0
+                return
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.breaker_threshold:
+                self._open_until[host] = time.monotonic() + self.breaker_cooldown
+                self._failures[host] = 0
+                logger.warning(
+                    f"Circuit for {host} open for {self.breaker_cooldown:.0f}s "
+                    f"after {self.breaker_threshold} failed calls"
+                )
+
+    def call(
+        self,
+        host: str,
+        fn: Callable[[], T],
+        before_attempt: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """Call fn under the policy, before_attempt (e.g. a rate limiter) runs first"""
+        for attempt in range(self.tries):
+            if self.is_open(host):
+                raise CircuitOpenError(f"circuit for {host} is open")
+            if before_attempt is not None:
+                before_attempt()
+            try:
+                result = fn()
+            except HTTPError as e:
+                response = e.response
+                status = response.status_code if response is not None else None
+                if status not in RETRYABLE_STATUS:
+                    raise
+                self._record(host, success=False)
+                if attempt + 1 == self.tries:
+                    raise
+                retry_after = parse_retry_after(
+                    response.headers.get("Retry-After")
+                    if response is not None
+                    else None
+                )
+                delay = self.backoff(attempt, retry_after)
+                logger.debug(f"{host} returned {status}, retrying in {delay:.1f}s")
+            except (ConnectionError, Timeout) as e:
+                self._record(host, success=False)
+                if attempt + 1 == self.tries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.debug(f"{host} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                self._record(host, success=True)
+                return result
+            time.sleep(delay)
+
+
+def retried(host: str):
+    """Run an instance method under ``self.retry_policy``, pacing every attempt
+    with ``self.rate_limiter``"""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.retry_policy.call(
+                host,
+                lambda: method(self, *args, **kwargs),
+                before_attempt=self.rate_limiter.acquire,
+            )
+
+        return wrapper
+
+    return decorator
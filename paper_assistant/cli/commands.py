@@ -12,25 +12,48 @@ from loguru import logger
 
 from paper_assistant.utils.helpers import get_api_key
 from paper_assistant.api.api_handler import APIHandler
+from paper_assistant.api.local_llm import LocalLLMClient
 from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.core.pipeline import run_streaming
 from paper_assistant.core.output_handler import OutputHandler
 from paper_assistant.api.app import create_app
+from paper_assistant.utils.paper_store import open_paper_store
+
+# attempts of a failed scheduled generate before waiting for the next day
+SCHEDULED_RETRIES = 3
+
+
+def dry_run_config(config):
+    """Turn off everything a dry run must not write: caches, ledger and outputs."""
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["FILTERING"]["conditional_fetch"] = "false"
+    for option in ("dump_json", "dump_md", "push_to_slack", "dump_debug_file"):
+        config["OUTPUT"][option] = "false"
+    config["OUTPUT"]["paper_store"] = ""
 
 
 def generate_command(args):
     """Generate paper summaries and output in specified format."""
+    paper_processor = None
+    dry_run = getattr(args, "dry_run", False)
     try:
-        # Initialize API key and client
-        api_key = get_api_key()
-        os.environ["GEMINI_API_KEY"] = api_key
-        client = instructor.from_litellm(completion)
-
         # Load configuration
         config = configparser.ConfigParser()
         config.read(args.config or "paper_assistant/config/config.ini")
 
+        # Initialize API key and client
+        if dry_run:
+            # the local client answers every LLM call, nothing is written
+            client = LocalLLMClient()
+            dry_run_config(config)
+        else:
+            api_key = get_api_key()
+            os.environ["GEMINI_API_KEY"] = api_key
+            client = instructor.from_litellm(completion)
+
         # Initialize modules
-        api_handler = APIHandler()
+        api_handler = APIHandler.from_config(config)
         paper_processor = PaperProcessor(config)
         output_handler = OutputHandler(config)
 
@@ -40,23 +63,64 @@ def generate_command(args):
             author_names, author_ids = paper_processor.parse_authors(fopen.readlines())
         author_id_set = set(author_ids)
 
-        # Get papers from arXiv
-        papers = list(paper_processor.get_papers_from_arxiv(config))
+        if getattr(args, "from_date", None):
+            backfill_command(
+                args,
+                config,
+                client,
+                api_handler,
+                paper_processor,
+                output_handler,
+                author_id_set,
+                author_names,
+            )
+            return
 
-        # Get author metadata
-        all_authors = set()
-        for paper in papers:
-            all_authors.update(set(paper.authors))
+        # Every stage is checkpointed, --resume picks up after the last one done.
+        # Dry runs keep no checkpoint.
+        checkpoint = paper_processor.open_checkpoint(
+            resume=getattr(args, "resume", False) and not dry_run, dry_run=dry_run
+        )
 
-        if args.debug or config["OUTPUT"].getboolean("debug_messages"):
-            logger.info(f"Getting author info for {len(all_authors)} authors")
+        # Get papers from arXiv
+        papers = checkpoint.load_papers()
+        all_authors = None
+        llm_cache = None
+        if papers is None:
+            # in streaming mode authors and LLM results come while areas download
+            streamed = run_streaming(config, api_handler, paper_processor, client)
+            if streamed is not None:
+                papers, all_authors, llm_cache = streamed
+            else:
+                papers = paper_processor.get_papers_from_arxiv(config)
+            checkpoint.save_papers(papers)
+            if all_authors is not None:
+                checkpoint.save_authors(all_authors)
 
-        all_authors = api_handler.get_authors(list(all_authors))
+        # Get author metadata
+        if all_authors is None:
+            all_authors = checkpoint.load_authors()
+        if all_authors is None:
+            if args.debug or config["OUTPUT"].getboolean("debug_messages"):
+                logger.info(f"Getting author info for {len(papers)} papers")
+            all_authors = api_handler.resolve_authors(papers)
+            checkpoint.save_authors(all_authors)
+        output_handler.output_authors(all_authors)
 
         # Process papers through filtering pipeline
         selected_papers, all_papers, sort_dict = paper_processor.process_papers(
-            papers, all_authors, author_id_set, client, config
+            papers,
+            all_authors,
+            author_id_set,
+            client,
+            config,
+            author_names,
+            checkpoint,
+            llm_cache,
         )
+        if dry_run and not client.verify():
+            raise RuntimeError("Dry run context caching check failed")
+        paper_processor.report_usage(save=not dry_run)
 
         # Sort papers by relevance and novelty
         selected_papers = paper_processor.sort_papers(selected_papers, sort_dict)
@@ -76,10 +140,92 @@ def generate_command(args):
                 output_handler.output_markdown(selected_papers)
             if "slack" in formats:
                 output_handler.output_slack(selected_papers)
+        checkpoint.clear()
 
     except Exception as e:
         logger.error(f"Error in generate command: {str(e)}")
+        logger.error("Completed stages are checkpointed, rerun with --resume")
+        if paper_processor is not None:
+            # calls made before the error were paid for all the same
+            paper_processor.report_usage(save=not dry_run)
+        # main exits with an error, the serve scheduler retries and resumes
+        raise
+
+
+def backfill_command(
+    args,
+    config,
+    client,
+    api_handler,
+    paper_processor,
+    output_handler,
+    author_id_set,
+    author_names=None,
+):
+    """Catch up on missed days between --from and --to (inclusive).
+
+    Days are fetched in parallel, then authors are resolved and papers scored once
+    for the union of all days, so shared authors and cross-listed papers are only
+    looked up and sent to the LLM once. Each day is written to its cache file.
+    """
+    start = datetime.strptime(args.from_date, "%Y-%m-%d")
+    end = datetime.strptime(args.to_date, "%Y-%m-%d") if args.to_date else start
+    if end < start:
+        raise ValueError(f"--to {args.to_date} is before --from {args.from_date}")
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    papers_by_date = paper_processor.get_papers_for_dates(config, dates, args.query)
+
+    papers = {}
+    for day_papers in papers_by_date.values():
+        for paper in day_papers:
+            papers.setdefault(paper.arxiv_id, paper)
+    papers = list(papers.values())
+    if not papers:
+        logger.info("No papers found between " + args.from_date + " and " + str(end))
+        return
+
+    if args.debug or config["OUTPUT"].getboolean("debug_messages"):
+        logger.info(
+            f"Getting author info for {len(papers)} papers across {len(dates)} days"
+        )
+    all_authors = api_handler.resolve_authors(papers)
+
+    selected_papers, all_papers, sort_dict = paper_processor.process_papers(
+        papers, all_authors, author_id_set, client, config, author_names
+    )
+    dry_run = getattr(args, "dry_run", False)
+    if dry_run and not client.verify():
+        raise RuntimeError("Dry run context caching check failed")
+    paper_processor.report_usage(save=not dry_run)
+
+    for date, day_papers in papers_by_date.items():
+        if not day_papers:
+            logger.info(f"No announcement feed for {date}, skipping")
+            continue
+        day_ids = {paper.arxiv_id for paper in day_papers}
+        day_sort_dict = {k: v for k, v in sort_dict.items() if k in day_ids}
+        if dry_run:
+            logger.info(f"Dry run, not writing {len(day_sort_dict)} papers for {date}")
+            continue
+        output_handler.output_json_for_date(
+            paper_processor.sort_papers(selected_papers, day_sort_dict), date
+        )
+        logger.info(f"Wrote {len(day_sort_dict)} papers for {date}")
+
+
+def migrate_store_command(args):
+    """Import the existing JSON caches into the configured SQLite paper store."""
+    config = configparser.ConfigParser()
+    config.read(args.config or "paper_assistant/config/config.ini")
+    store = open_paper_store(config)
+    if store is None:
+        logger.error("No paper_store configured in [OUTPUT], nothing to migrate")
         exit(1)
+    counts = store.import_json_caches(args.cache_dir, args.qa_cache_dir)
+    logger.info(
+        f"Imported {counts['output']} daily outputs, {counts['authors']} author "
+        f"files and {counts['qa']} Q&A results into {store.db_path}"
+    )
 
 
 def scheduled_generate(args):
@@ -103,24 +249,31 @@ def scheduled_generate(args):
         next_run = get_next_run_time()
         return (next_run - now).total_seconds()
 
+    retries = 0
     while True:
         try:
-            # Calculate sleep time until next run
-            sleep_seconds = seconds_until_next_run()
-            logger.info(
-                f"Next paper generation scheduled for {get_next_run_time().strftime('%Y-%m-%d %H:%M:%S %Z')}"
-            )
+            if retries == 0:
+                # Calculate sleep time until next run
+                sleep_seconds = seconds_until_next_run()
+                logger.info(
+                    f"Next paper generation scheduled for {get_next_run_time().strftime('%Y-%m-%d %H:%M:%S %Z')}"
+                )
 
-            # Sleep until next scheduled time
-            time.sleep(sleep_seconds)
+                # Sleep until next scheduled time
+                time.sleep(sleep_seconds)
 
             # Run generation
             logger.info("Starting scheduled paper generation...")
             generate_command(args)
+            retries = 0
 
         except Exception as e:
             logger.error(f"Error in scheduled generate: {str(e)}")
-            time.sleep(300)  # Wait 5 minutes before retrying
+            # retries resume from the failed run's checkpoint, then give up
+            # until the next scheduled run
+            retries = retries + 1 if retries < SCHEDULED_RETRIES else 0
+            if retries:
+                time.sleep(300)  # Wait 5 minutes before retrying
 
 
 def serve_command(args):
@@ -133,6 +286,10 @@ def serve_command(args):
             authors=args.authors,
             output_format="json",
             query=args.query,
+            from_date=None,
+            to_date=None,
+            # retries after a failed scheduled run continue from its checkpoint
+            resume=True,
         )
 
         # Check if we need initial generation
@@ -141,7 +298,11 @@ def serve_command(args):
 
         if not os.path.exists(today_file) and not os.path.exists("out/output.json"):
             logger.info("No papers found for today. Running initial generation...")
-            generate_command(generate_args)
+            try:
+                generate_command(generate_args)
+            except Exception:
+                # already logged, serve what there is until the next scheduled run
+                pass
 
         # Start generate scheduler in background thread
         scheduler_thread = threading.Thread(
@@ -175,6 +336,27 @@ def create_parser():
         help="Output formats (comma-separated: markdown,json,slack)",
     )
     generate_parser.add_argument("--query", help="ArXiv search query")
+    generate_parser.add_argument(
+        "--from",
+        dest="from_date",
+        help="Backfill feeds starting at this date (YYYY-MM-DD)",
+    )
+    generate_parser.add_argument(
+        "--to",
+        dest="to_date",
+        help="Last date to backfill, inclusive (YYYY-MM-DD, default: --from)",
+    )
+    generate_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue today's interrupted run from its last completed stage or batch",
+    )
+    generate_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Answer LLM calls with a local stand-in and check prompt prefix "
+        "caching, without writing caches, ledger or outputs",
+    )
 
     # Serve command
     serve_parser = subparsers.add_parser("serve", help="Start web server")
@@ -183,6 +365,18 @@ def create_parser():
     serve_parser.add_argument("--authors", help="Path to authors file")
     serve_parser.add_argument("--query", help="ArXiv search query")
 
+    # Migrate store command
+    migrate_parser = subparsers.add_parser(
+        "migrate-store", help="Import JSON caches into the SQLite paper store"
+    )
+    migrate_parser.add_argument("--config", help="Path to config file")
+    migrate_parser.add_argument(
+        "--cache-dir", default="out/cache", help="Daily output/author cache directory"
+    )
+    migrate_parser.add_argument(
+        "--qa-cache-dir", default="out/qa_cache", help="Q&A cache directory"
+    )
+
     return parser
 
 
@@ -192,9 +386,15 @@ def main():
     args = parser.parse_args()
 
     if args.command == "generate":
-        generate_command(args)
+        try:
+            generate_command(args)
+        except Exception:
+            # generate_command logged the error
+            exit(1)
     elif args.command == "serve":
         serve_command(args)
+    elif args.command == "migrate-store":
+        migrate_store_command(args)
     else:
         parser.print_help()
         exit(1)
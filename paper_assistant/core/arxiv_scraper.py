@@ -1,18 +1,36 @@
 import configparser
 import dataclasses
 import json
+import sys
+import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 from html import unescape
-from typing import List, Optional
+from typing import Dict, IO, Iterator, List, Optional, Tuple
 import re
 import arxiv
+import pytz
+import requests
 from loguru import logger
 import feedparser
 from dataclasses import dataclass
 
+from paper_assistant.core.feed_state import FeedStateStore
+
+
+# precompiled normalizers shared by the feedparser and streaming RSS paths
+HTML_TAG_RE = re.compile("<[^<]+?>")
+TITLE_SUFFIX_RE = re.compile(r"\(arXiv:[0-9]+\.[0-9]+v[0-9]+ \[.*\]\)$")
+ARXIV_VERSION_RE = re.compile(r"v[0-9]+$")
+RSS_TIMESTAMP_FORMAT = "%a, %d %b %Y %H:%M:%S +0000"
+ARXIV_NS = "{http://arxiv.org/schemas/atom}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+ARXIV_RSS_URL = "http://export.arxiv.org/rss/"
+
 
 class EnhancedJSONEncoder(json.JSONEncoder):
     def default(self, o):
+        if isinstance(o, ScoredPaper):
+            return o.to_dict()
         if dataclasses.is_dataclass(o):
             return dataclasses.asdict(o)
         return super().default(o)
@@ -20,7 +38,19 @@ class EnhancedJSONEncoder(json.JSONEncoder):
 
 @dataclass
 class Paper:
-    # paper class should track the list of authors, paper title, abstract, arxiv id
+    # paper class should track the list of authors, paper title, abstract, arxiv id.
+    # slots keep the per-paper footprint small on days with thousands of papers.
+    __slots__ = (
+        "authors",
+        "title",
+        "abstract",
+        "arxiv_id",
+        "_url",
+        "comment",
+        "relevance",
+        "novelty",
+        "criterion",
+    )
     authors: List[str]
     title: str
     abstract: str
@@ -29,33 +59,92 @@ class Paper:
     # add a hash function using arxiv_id
     def __hash__(self):
         # __hash__ is a method that returns a hash of the object.
-        # we can use this to hash the object by its arxiv_id
-        return hash(self.arxiv_id)
+        # we can use this to hash the object by its arxiv_id, ignoring the version
+        # so replaced and cross-listed copies of a paper collapse into one entry
+        return hash(strip_arxiv_version(self.arxiv_id))
+
+    def __eq__(self, other):
+        if not isinstance(other, Paper):
+            return NotImplemented
+        return strip_arxiv_version(self.arxiv_id) == strip_arxiv_version(other.arxiv_id)
 
     def __init__(
         self,
         arxiv_id=None,
-        ARXIVID=None,
         title=None,
         abstract=None,
         authors=None,
         url=None,
         comment=None,
-        COMMENT=None,
         relevance=None,
-        RELEVANCE=None,
         novelty=None,
-        NOVELTY=None,
+        criterion=None,
         **kwargs,
     ):
-        self.arxiv_id = arxiv_id or ARXIVID
+        # records parsed back from the LLM carry upper-case keys (ARXIVID, COMMENT...)
+        self.arxiv_id = arxiv_id or kwargs.get("ARXIVID")
         self.title = title
         self.abstract = abstract
-        self.authors = authors
-        self.url = url or f"https://arxiv.org/abs/{self.arxiv_id}"
-        self.comment = comment or COMMENT
-        self.relevance = relevance or RELEVANCE
-        self.novelty = novelty or NOVELTY
+        # the same authors show up across many papers, share one string per name
+        self.authors = (
+            [sys.intern(author) for author in authors] if authors is not None else None
+        )
+        self._url = url
+        self.comment = comment or kwargs.get("COMMENT")
+        self.relevance = relevance or kwargs.get("RELEVANCE")
+        self.novelty = novelty or kwargs.get("NOVELTY")
+        self.criterion = criterion or kwargs.get("CRITERION")
+
+    @property
+    def url(self) -> str:
+        return self._url or f"https://arxiv.org/abs/{self.arxiv_id}"
+
+    @url.setter
+    def url(self, value: str):
+        self._url = value
+
+    def to_dict(self) -> Dict:
+        """Shallow dict of the dataclass fields (no deep copy of authors)"""
+        return {
+            "authors": self.authors,
+            "title": self.title,
+            "abstract": self.abstract,
+            "arxiv_id": self.arxiv_id,
+        }
+
+
+class ScoredPaper:
+    """Selection record that references a Paper instead of copying it.
+
+    ``scores`` holds the selection fields in the upper-case layout used by the
+    LLM responses and output.json (COMMENT, RELEVANCE, NOVELTY, ...).
+    """
+
+    __slots__ = ("paper", "scores")
+
+    def __init__(self, paper: Paper, scores: Dict):
+        self.paper = paper
+        self.scores = scores
+
+    @property
+    def arxiv_id(self) -> str:
+        return self.paper.arxiv_id
+
+    def to_dict(self) -> Dict:
+        """Flatten into the dict layout written to output.json"""
+        return {**self.paper.to_dict(), **self.scores}
+
+    def to_paper(self) -> Paper:
+        """Build a standalone Paper carrying the selection fields"""
+        return Paper(**self.to_dict())
+
+    def __repr__(self):
+        return f"ScoredPaper({self.paper.arxiv_id!r}, {self.scores!r})"
+
+
+def strip_arxiv_version(arxiv_id: str) -> str:
+    # 2401.01234v2 -> 2401.01234
+    return ARXIV_VERSION_RE.sub("", arxiv_id) if arxiv_id else arxiv_id
 
 
 def is_earlier(ts1, ts2):
@@ -63,49 +152,93 @@ def is_earlier(ts1, ts2):
     return int(ts1.replace(".", "")) < int(ts2.replace(".", ""))
 
 
-def get_papers_from_arxiv_api(area: str, timestamp, last_id) -> List[Paper]:
+def get_papers_from_arxiv_api(
+    area: str,
+    timestamp,
+    last_id,
+    config: Optional[dict] = None,
+    max_results: int = 500,
+    page_size: int = 100,
+) -> List[Paper]:
     # look for papers that are newer than the newest papers in RSS.
-    # we do this by looking at last_id and grabbing everything newer.
+    # we do this by looking at last_id and grabbing everything newer. results come
+    # back newest first and are fetched one page at a time, so we can stop at the
+    # first result that is not newer than last_id instead of pulling the window.
     end_date = timestamp
     start_date = timestamp - timedelta(days=4)
     search = arxiv.Search(
-        query="("
+        query="(cat:"
         + area
         + ") AND submittedDate:["
         + start_date.strftime("%Y%m%d")
         + "* TO "
         + end_date.strftime("%Y%m%d")
         + "*]",
-        max_results=None,
+        max_results=max_results,
         sort_by=arxiv.SortCriterion.SubmittedDate,
+        sort_order=arxiv.SortOrder.Descending,
+    )
+    force_primary = config is not None and config["FILTERING"].getboolean(
+        "force_primary"
     )
-    results = list(arxiv.Client().results(search))
     api_papers = []
-    for result in results:
+    for result in arxiv.Client(page_size=page_size).results(search):
         new_id = result.get_short_id()[:10]
-        if is_earlier(last_id, new_id):
-            authors = [author.name for author in result.authors]
-            summary = result.summary
-            summary = unescape(re.sub("\n", " ", summary))
-            paper = Paper(
-                authors=authors,
-                title=result.title,
-                abstract=summary,
-                arxiv_id=result.get_short_id()[:10],
-            )
-            api_papers.append(paper)
+        if not is_earlier(last_id, new_id):
+            break
+        if force_primary and result.primary_category != area:
+            continue
+        authors = [author.name for author in result.authors]
+        summary = unescape(result.summary.replace("\n", " "))
+        paper = Paper(
+            authors=authors,
+            title=result.title,
+            abstract=summary,
+            arxiv_id=new_id,
+        )
+        api_papers.append(paper)
     return api_papers
 
 
-def get_papers_from_arxiv_rss(area: str, config: Optional[dict]) -> List[Paper]:
-    # get the feed from http://export.arxiv.org/rss/ and use the updated timestamp to avoid duplicates
-    updated = datetime.utcnow() - timedelta(days=1)
-    # format this into the string format 'Fri, 03 Nov 2023 00:30:00 GMT'
-    updated_string = updated.strftime("%a, %d %b %Y %H:%M:%S GMT")
-    feed = feedparser.parse(
-        f"http://export.arxiv.org/rss/{area}", modified=updated_string
+def replay_feed(
+    area: str, config: Optional[dict], feed_state: FeedStateStore, since: str
+) -> Tuple[List[Paper], Optional[datetime], Optional[str]]:
+    # papers of an unchanged feed, as parsed when its validators were stored
+    if (config is not None) and config["OUTPUT"]["debug_messages"]:
+        logger.info("No new papers since " + since + " for " + area)
+    state = feed_state.get(area)
+    feed_state.touch(area)
+    papers = [Paper(**entry) for entry in feed_state.load_papers(area) or []]
+    timestamp = state.get("timestamp")
+    return (
+        papers,
+        datetime.fromisoformat(timestamp) if timestamp else None,
+        state.get("last_id"),
     )
-    if feed.status == 304:
+
+
+def get_papers_from_arxiv_rss(
+    area: str, config: Optional[dict], feed_state: Optional[FeedStateStore] = None
+) -> Tuple[List[Paper], Optional[datetime], Optional[str]]:
+    if config is not None and config["FILTERING"].get("rss_parser") == "streaming":
+        feed_info = {}
+        paper_list = list(
+            stream_papers_from_arxiv_rss(area, config, feed_state, feed_info)
+        )
+        return paper_list, feed_info.get("timestamp"), feed_info.get("last_id")
+    # get the feed from http://export.arxiv.org/rss/ and use the validators from the
+    # last run (if any) so that an unchanged feed answers with a cheap 304
+    validators = feed_state.validators(area) if feed_state is not None else {}
+    etag = validators.get("etag")
+    updated_string = validators.get("modified")
+    if updated_string is None:
+        updated = datetime.utcnow() - timedelta(days=1)
+        # format this into the string format 'Fri, 03 Nov 2023 00:30:00 GMT'
+        updated_string = updated.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    feed = feedparser.parse(ARXIV_RSS_URL + area, etag=etag, modified=updated_string)
+    if feed.get("status") == 304:
+        if feed_state is not None and validators:
+            return replay_feed(area, config, feed_state, updated_string)
         if (config is not None) and config["OUTPUT"]["debug_messages"]:
             logger.info("No new papers since " + updated_string + " for " + area)
         # if there are no new papers return an empty list
@@ -117,37 +250,168 @@ def get_papers_from_arxiv_rss(area: str, config: Optional[dict]) -> List[Paper]:
         return [], None, None
     last_id = feed.entries[0].link.split("/")[-1]
     # parse last modified date
-    timestamp = datetime.strptime(feed.feed["updated"], "%a, %d %b %Y %H:%M:%S +0000")
+    timestamp = datetime.strptime(feed.feed["updated"], RSS_TIMESTAMP_FORMAT)
     paper_list = []
     for paper in entries:
-        # ignore updated papers
-        if paper["arxiv_announce_type"] != "new":
-            continue
-        # extract area
-        paper_area = paper.tags[0]["term"]
-        # ignore papers not in primary area
-        if (area != paper_area) and (config["FILTERING"].getboolean("force_primary")):
-            logger.info(f"ignoring {paper.title}")
-            continue
-        # otherwise make a new paper, for the author field make sure to strip the HTML tags
-        authors = [
-            unescape(re.sub("<[^<]+?>", "", author)).strip()
-            for author in paper.author.replace("\n", ", ").split(",")
-        ]
-        # strip html tags from summary
-        summary = re.sub("<[^<]+?>", "", paper.summary)
-        summary = unescape(re.sub("\n", " ", summary))
-        # strip the last pair of parentehses containing (arXiv:xxxx.xxxxx [area.XX])
-        title = re.sub("\(arXiv:[0-9]+\.[0-9]+v[0-9]+ \[.*\]\)$", "", paper.title)
-        # remove the link part of the id
-        id = paper.link.split("/")[-1]
-        # make a new paper
-        new_paper = Paper(authors=authors, title=title, abstract=summary, arxiv_id=id)
-        paper_list.append(new_paper)
+        new_paper = make_paper_from_entry(
+            area,
+            config,
+            announce_type=paper["arxiv_announce_type"],
+            paper_area=paper.tags[0]["term"],
+            title=paper.title,
+            link=paper.link,
+            summary=paper.summary,
+            author=paper.author,
+        )
+        if new_paper is not None:
+            paper_list.append(new_paper)
+    if feed_state is not None:
+        feed_state.update(
+            area,
+            etag=feed.get("etag"),
+            modified=feed.get("modified"),
+            last_id=last_id,
+            timestamp=timestamp,
+            papers=[paper.to_dict() for paper in paper_list],
+        )
 
     return paper_list, timestamp, last_id
 
 
+def make_paper_from_entry(
+    area: str,
+    config: Optional[dict],
+    announce_type: str,
+    paper_area: str,
+    title: str,
+    link: str,
+    summary: str,
+    author: str,
+) -> Optional[Paper]:
+    # ignore updated papers
+    if announce_type != "new":
+        return None
+    # ignore papers not in primary area
+    if (area != paper_area) and (config["FILTERING"].getboolean("force_primary")):
+        logger.info(f"ignoring {title}")
+        return None
+    # otherwise make a new paper, for the author field make sure to strip the HTML tags
+    authors = [
+        unescape(HTML_TAG_RE.sub("", name)).strip()
+        for name in author.replace("\n", ", ").split(",")
+    ]
+    # strip html tags from summary
+    summary = unescape(HTML_TAG_RE.sub("", summary).replace("\n", " "))
+    # strip the last pair of parentehses containing (arXiv:xxxx.xxxxx [area.XX])
+    title = TITLE_SUFFIX_RE.sub("", title)
+    # remove the link part of the id
+    arxiv_id = link.split("/")[-1]
+    return Paper(authors=authors, title=title, abstract=summary, arxiv_id=arxiv_id)
+
+
+def iter_papers_from_rss_xml(
+    source: IO[bytes],
+    area: str,
+    config: Optional[dict],
+    feed_info: Optional[Dict] = None,
+) -> Iterator[Paper]:
+    """Incrementally parse an arXiv RSS document, yielding cleaned papers.
+
+    Each ``<item>`` is turned into a Paper as soon as its closing tag is read and
+    then cleared, so consumers can start work before the whole feed is parsed.
+    ``feed_info`` is filled with the feed ``timestamp`` and the first ``last_id``.
+    """
+    if feed_info is None:
+        feed_info = {}
+    for _, elem in ET.iterparse(source, events=("end",)):
+        if elem.tag == "lastBuildDate" and elem.text:
+            feed_info["timestamp"] = datetime.strptime(
+                elem.text.strip(), RSS_TIMESTAMP_FORMAT
+            )
+        elif elem.tag == "item":
+            link = (elem.findtext("link") or "").strip()
+            feed_info.setdefault("last_id", link.split("/")[-1])
+            category = elem.find("category")
+            new_paper = make_paper_from_entry(
+                area,
+                config,
+                announce_type=(elem.findtext(ARXIV_NS + "announce_type") or "").strip(),
+                paper_area=category.text.strip() if category is not None else "",
+                title=(elem.findtext("title") or "").strip(),
+                link=link,
+                summary=_element_text(elem.find("description")),
+                author=elem.findtext(DC_NS + "creator") or "",
+            )
+            elem.clear()
+            if new_paper is not None:
+                yield new_paper
+
+
+def _element_text(elem: Optional[ET.Element]) -> str:
+    # descriptions may carry inline markup, keep the text of every child node
+    return "".join(elem.itertext()) if elem is not None else ""
+
+
+def stream_papers_from_arxiv_rss(
+    area: str,
+    config: Optional[dict],
+    feed_state: Optional[FeedStateStore] = None,
+    feed_info: Optional[Dict] = None,
+) -> Iterator[Paper]:
+    """Download an arXiv RSS feed and yield papers while it is being parsed.
+
+    Honours the same conditional-GET state as get_papers_from_arxiv_rss, an
+    unchanged feed yields the papers stored with its validators. The validators
+    are only recorded once the feed has been fully consumed.
+    """
+    if feed_info is None:
+        feed_info = {}
+    validators = feed_state.validators(area) if feed_state is not None else {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("modified"):
+        headers["If-Modified-Since"] = validators["modified"]
+    else:
+        updated = datetime.utcnow() - timedelta(days=1)
+        headers["If-Modified-Since"] = updated.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    papers = []
+    with requests.get(
+        ARXIV_RSS_URL + area, headers=headers, stream=True, timeout=60
+    ) as response:
+        if response.status_code == 304:
+            if feed_state is not None and validators:
+                replayed, timestamp, last_id = replay_feed(
+                    area, config, feed_state, headers["If-Modified-Since"]
+                )
+                feed_info.update(timestamp=timestamp, last_id=last_id)
+                yield from replayed
+            elif (config is not None) and config["OUTPUT"]["debug_messages"]:
+                logger.info(
+                    "No new papers since "
+                    + headers["If-Modified-Since"]
+                    + " for "
+                    + area
+                )
+            return
+        response.raise_for_status()
+        response.raw.decode_content = True
+        for paper in iter_papers_from_rss_xml(response.raw, area, config, feed_info):
+            papers.append(paper)
+            yield paper
+    if "last_id" not in feed_info:
+        logger.info("No entries found for " + area)
+    elif feed_state is not None:
+        feed_state.update(
+            area,
+            etag=response.headers.get("ETag"),
+            modified=response.headers.get("Last-Modified"),
+            last_id=feed_info["last_id"],
+            timestamp=feed_info.get("timestamp"),
+            papers=[paper.to_dict() for paper in papers],
+        )
+
+
 def merge_paper_list(paper_list, api_paper_list):
     api_set = set([paper.arxiv_id for paper in api_paper_list])
     merged_paper_list = api_paper_list
@@ -157,14 +421,133 @@ def merge_paper_list(paper_list, api_paper_list):
     return merged_paper_list
 
 
-def get_papers_from_arxiv_rss_api(area: str, config: Optional[dict]) -> List[Paper]:
-    paper_list, timestamp, last_id = get_papers_from_arxiv_rss(area, config)
-    # if timestamp is None:
-    #    return []
-    # api_paper_list = get_papers_from_arxiv_api(area, timestamp, last_id)
-    # merged_paper_list = merge_paper_list(paper_list, api_paper_list)
-    # return merged_paper_list
-    return paper_list
+def iter_papers_from_arxiv_rss_api(
+    area: str, config: Optional[dict], feed_state: Optional[FeedStateStore] = None
+) -> Iterator[Paper]:
+    """Yield the papers of an area's RSS feed, then those only the API backfill found.
+
+    With the streaming parser papers are yielded while the feed downloads, so
+    callers can hand them on before the whole feed is parsed.
+    """
+    feed_info = {}
+    if config is not None and config["FILTERING"].get("rss_parser") == "streaming":
+        paper_list = stream_papers_from_arxiv_rss(area, config, feed_state, feed_info)
+    else:
+        paper_list, timestamp, last_id = get_papers_from_arxiv_rss(
+            area, config, feed_state
+        )
+        feed_info.update(timestamp=timestamp, last_id=last_id)
+    seen = set()
+    for paper in paper_list:
+        seen.add(paper.arxiv_id)
+        yield paper
+    timestamp = feed_info.get("timestamp")
+    if timestamp is None or not use_api_backfill(area, config):
+        return
+    try:
+        api_paper_list = get_papers_from_arxiv_api(
+            area,
+            timestamp,
+            feed_info.get("last_id"),
+            config,
+            max_results=config["FILTERING"].getint("api_backfill_max_results", 500),
+            page_size=config["FILTERING"].getint("api_page_size", 100),
+        )
+    except Exception as e:
+        # the RSS papers are still good, do not lose them over a failed backfill
+        logger.error(f"API backfill for {area} failed: {e}")
+        return
+    if api_paper_list:
+        logger.info(f"Recovered {len(api_paper_list)} papers for {area} from the API")
+    for paper in api_paper_list:
+        if paper.arxiv_id not in seen:
+            yield paper
+
+
+def get_papers_from_arxiv_rss_api(
+    area: str, config: Optional[dict], feed_state: Optional[FeedStateStore] = None
+) -> List[Paper]:
+    return list(iter_papers_from_arxiv_rss_api(area, config, feed_state))
+
+
+def use_api_backfill(area: str, config: Optional[dict]) -> bool:
+    # api_backfill_categories is a comma-separated list of areas, or * for all areas
+    if config is None:
+        return False
+    backfill = config["FILTERING"].get("api_backfill_categories", "")
+    categories = [category.strip() for category in backfill.split(",")]
+    return "*" in categories or area in categories
+
+
+def announcement_window(date: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """Get the (start, end) UTC submission window of the feed published on a date.
+
+    arXiv announces Sunday to Thursday at 20:00 ET. An announcement covers
+    submissions up to 14:00 ET that day (Friday for the Sunday announcement),
+    starting at the previous cutoff. The feed read on ``date`` holds the previous
+    evening's announcement, so Saturday and Sunday have no feed.
+    """
+    eastern_tz = pytz.timezone("America/New_York")
+    announced = date.date() - timedelta(days=1)
+    # weekday(): Monday is 0, Friday is 4, Saturday is 5, Sunday is 6
+    if announced.weekday() in (4, 5):
+        return None
+    if announced.weekday() == 6:
+        end_day = announced - timedelta(days=2)
+    else:
+        end_day = announced
+    start_day = end_day - timedelta(days=3 if end_day.weekday() == 0 else 1)
+
+    def cutoff(day):
+        local = eastern_tz.localize(datetime(day.year, day.month, day.day, 14, 0))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+
+    return cutoff(start_day), cutoff(end_day)
+
+
+def get_papers_for_date(
+    area: str,
+    date: datetime,
+    config: Optional[dict],
+    query: Optional[str] = None,
+    max_results: int = 2000,
+    page_size: int = 100,
+) -> List[Paper]:
+    # reconstruct the papers of a past feed from the arXiv API, used to catch up
+    # on days the daily run missed. query replaces the category clause if given.
+    window = announcement_window(date)
+    if window is None:
+        return []
+    start_date, end_date = window
+    search = arxiv.Search(
+        query="("
+        + (query or "cat:" + area)
+        + ") AND submittedDate:["
+        + start_date.strftime("%Y%m%d%H%M")
+        + " TO "
+        + end_date.strftime("%Y%m%d%H%M")
+        + "]",
+        max_results=max_results,
+        sort_by=arxiv.SortCriterion.SubmittedDate,
+    )
+    force_primary = (
+        query is None
+        and config is not None
+        and config["FILTERING"].getboolean("force_primary")
+    )
+    papers = []
+    for result in arxiv.Client(page_size=page_size).results(search):
+        if force_primary and result.primary_category != area:
+            continue
+        papers.append(
+            Paper(
+                authors=[author.name for author in result.authors],
+                title=result.title,
+                abstract=unescape(result.summary.replace("\n", " ")),
+                arxiv_id=result.get_short_id()[:10],
+            )
+        )
+    return papers
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from paper_assistant.core.arxiv_scraper import Paper
+
+
+class Checkpoint:
+    """Per-stage state of one generate run, kept under output_path/checkpoints/{date}.
+
+    Stores the fetched papers, the author map and the abstract-filter survivors
+    once each stage finishes, and appends every scored batch as it completes, so
+    ``generate --resume`` can restart after the last completed stage or batch.
+    """
+
+    PAPERS = "papers.json"
+    AUTHORS = "authors.json"
+    SURVIVORS = "abstract_filter.json"
+    SCORES = "scores.jsonl"
+
+    def __init__(self, checkpoint_dir: str, resume: bool = False):
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self._lock = threading.Lock()
+        if not resume and os.path.isdir(checkpoint_dir):
+            # a fresh run must not pick up stages of an earlier one
+            shutil.rmtree(checkpoint_dir)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.checkpoint_dir, name)
+
+    def _load(self, name: str):
+        if not self.resume or not os.path.exists(self._path(name)):
+            return None
+        try:
+            with open(self._path(name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            logger.info(f"Resuming from checkpoint {self._path(name)}")
+            return data
+        except Exception as e:
+            logger.error(f"Error reading checkpoint {self._path(name)}: {e}")
+            return None
+
+    def _save(self, name: str, data):
+        tmp_path = self._path(name) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(name))
+
+    def load_papers(self) -> Optional[List[Paper]]:
+        """Fetched papers of an interrupted run, or None"""
+        data = self._load(self.PAPERS)
+        return [Paper(**entry) for entry in data] if data is not None else None
+
+    def save_papers(self, papers: List[Paper]):
+        self._save(
+            self.PAPERS, [{**paper.to_dict(), "url": paper.url} for paper in papers]
+        )
+
+    def load_authors(self) -> Optional[Dict]:
+        """Author map of an interrupted run, or None"""
+        return self._load(self.AUTHORS)
+
+    def save_authors(self, all_authors: Dict):
+        self._save(self.AUTHORS, all_authors)
+
+    def load_survivors(self) -> Optional[List[str]]:
+        """IDs that passed the abstract filter in an interrupted run, or None"""
+        return self._load(self.SURVIVORS)
+
+    def save_survivors(self, papers: List[Paper]):
+        self._save(self.SURVIVORS, [paper.arxiv_id for paper in papers])
+
+    def load_scores(self) -> Dict[str, Dict]:
+        """Scores of every batch completed by an interrupted run"""
+        scores = {}
+        if not self.resume or not os.path.exists(self._path(self.SCORES)):
+            return scores
+        with open(self._path(self.SCORES), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    jdict = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be cut off if the run died mid-write
+                    continue
+                scores[jdict["ARXIVID"]] = jdict
+        if scores:
+            logger.info(f"Resuming with {len(scores)} scores from checkpoint")
+        return scores
+
+    def append_scores(self, scores: List[Dict]):
+        """Record the scores of a completed batch"""
+        with self._lock, open(self._path(self.SCORES), "a", encoding="utf-8") as f:
+            for jdict in scores:
+                f.write(json.dumps(jdict) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Remove the checkpoint once the run has written its outputs"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+
+class NullCheckpoint(Checkpoint):
+    """Checkpoint that keeps nothing, for dry runs"""
+
+    def __init__(self):
+        self.checkpoint_dir = None
+        self.resume = False
+        self._lock = threading.Lock()
+
+    def _load(self, name: str):
+        return None
+
+    def _save(self, name: str, data):
+        pass
+
+    def load_scores(self) -> Dict[str, Dict]:
+        return {}
+
+    def append_scores(self, scores: List[Dict]):
+        pass
+
+    def clear(self):
+        pass
+
+
+def prune_checkpoints(checkpoints_dir: str, max_age_days: float):
+    """Remove run checkpoints dated more than max_age_days ago, e.g. of days whose
+    retries all failed and were never resumed"""
+    if not os.path.isdir(checkpoints_dir):
+        return
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    for name in os.listdir(checkpoints_dir):
+        try:
+            date = datetime.strptime(name[:10], "%Y-%m-%d")
+        except ValueError:
+            continue
+        if date < cutoff:
+            logger.info(f"Removing stale checkpoint {name}")
+            shutil.rmtree(os.path.join(checkpoints_dir, name), ignore_errors=True)
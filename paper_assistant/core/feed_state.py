@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+class FeedStateStore:
+    """Per-area RSS validators persisted on disk.
+
+    Stores the ``ETag``/``Last-Modified`` headers returned by arXiv together with
+    the newest ``last_id`` and feed timestamp, so reruns can issue a conditional
+    GET and skip downloading and parsing an unchanged feed. The papers parsed from
+    the feed are kept next to the state file (``feed_cache/{area}.json``) and
+    replayed on a 304, so a rerun after a failed or partial run still gets them.
+    """
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+        self.papers_dir = os.path.join(os.path.dirname(state_path) or ".", "feed_cache")
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading feed state {self.state_path}: {e}")
+        return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _papers_path(self, area: str) -> str:
+        return os.path.join(self.papers_dir, f"{area}.json")
+
+    def get(self, area: str) -> Dict:
+        """Get the stored state for an area (empty if never fetched)"""
+        with self._lock:
+            return dict(self._state.get(area, {}))
+
+    def validators(self, area: str) -> Dict:
+        """Stored ETag/Last-Modified of an area, only if its papers can be replayed.
+
+        A 304 is only useful with the papers of the unchanged feed at hand, so
+        without them the feed is downloaded again.
+        """
+        state = self.get(area)
+        if not os.path.exists(self._papers_path(area)):
+            return {}
+        return {key: state[key] for key in ("etag", "modified") if state.get(key)}
+
+    def load_papers(self, area: str) -> Optional[List[Dict]]:
+        """Papers parsed from the area's feed when its validators were stored"""
+        try:
+            with open(self._papers_path(area), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading feed cache {self._papers_path(area)}: {e}")
+            return None
+
+    def _save_papers(self, area: str, papers: List[Dict]):
+        os.makedirs(self.papers_dir, exist_ok=True)
+        tmp_path = self._papers_path(area) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(papers, f)
+        os.replace(tmp_path, self._papers_path(area))
+
+    def update(
+        self,
+        area: str,
+        etag: Optional[str] = None,
+        modified: Optional[str] = None,
+        last_id: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+        papers: Optional[List[Dict]] = None,
+    ):
+        """Record the validators, newest entry and parsed papers of an area.
+
+        The papers are written before the validators, so a stored ETag always has
+        papers to replay.
+        """
+        if papers is not None:
+            try:
+                self._save_papers(area, papers)
+            except Exception as e:
+                logger.error(f"Error saving feed cache for {area}: {e}")
+                # without the papers a 304 would lose the feed, keep fetching it
+                etag = modified = None
+        with self._lock:
+            entry = self._state.setdefault(area, {})
+            if etag:
+                entry["etag"] = etag
+            if modified:
+                entry["modified"] = modified
+            if last_id:
+                entry["last_id"] = last_id
+            if timestamp is not None:
+                entry["timestamp"] = timestamp.isoformat()
+            entry["checked_at"] = datetime.utcnow().isoformat()
+            try:
+                self._save()
+            except Exception as e:
+                logger.error(f"Error saving feed state {self.state_path}: {e}")
+
+    def touch(self, area: str):
+        """Record that the feed was checked and was unchanged"""
+        self.update(area)
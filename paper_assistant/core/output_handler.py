@@ -1,18 +1,20 @@
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 import json
 import os
 from datetime import datetime
 from configparser import ConfigParser
 
-from paper_assistant.core.arxiv_scraper import Paper, EnhancedJSONEncoder
+from paper_assistant.core.arxiv_scraper import Paper, ScoredPaper, EnhancedJSONEncoder
 from paper_assistant.utils.parse_json_to_md import render_md_string
 from paper_assistant.utils.push_to_slack import push_to_slack
+from paper_assistant.utils.paper_store import open_paper_store
 
 
 class OutputHandler:
     def __init__(self, config: ConfigParser):
         self.config = config
         self.output_path = config["OUTPUT"]["output_path"]
+        self.store = open_paper_store(config)
 
     def dump_debug_files(
         self, papers: List[Paper], all_authors: Dict, author_id_set: Set[str]
@@ -32,7 +34,25 @@ class OutputHandler:
         """Output papers as JSON if configured"""
         if self.config["OUTPUT"].getboolean("dump_json"):
             with open(self.output_path + "output.json", "w") as outfile:
-                json.dump(selected_papers, outfile, indent=4)
+                json.dump(selected_papers, outfile, cls=EnhancedJSONEncoder, indent=4)
+        if self.store is not None:
+            self.store.save_output(datetime.now().strftime("%Y-%m-%d"), selected_papers)
+
+    def output_authors(self, all_authors: Dict, date: Optional[str] = None):
+        """Store the day's author metadata if a paper store is configured"""
+        if self.store is not None:
+            self.store.save_authors(
+                date or datetime.now().strftime("%Y-%m-%d"), all_authors
+            )
+
+    def output_json_for_date(self, selected_papers: Dict, date: str):
+        """Write papers for a past day to its dated cache file"""
+        cache_dir = os.path.join(self.output_path, "cache")
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, f"{date}_output.json"), "w") as outfile:
+            json.dump(selected_papers, outfile, cls=EnhancedJSONEncoder, indent=4)
+        if self.store is not None:
+            self.store.save_output(date, selected_papers)
 
     def output_markdown(self, selected_papers: Dict):
         """Output papers as Markdown if configured"""
@@ -51,13 +71,22 @@ class OutputHandler:
                     "Warning: push_to_slack is true, but SLACK_KEY is not set - not pushing to slack"
                 )
             else:
-                push_to_slack(selected_papers)
+                push_to_slack(self._to_dicts(selected_papers))
+
+    def _to_dicts(self, selected_papers: Dict) -> Dict:
+        """Flatten selection records into plain output dicts"""
+        return {
+            key: record.to_dict() if isinstance(record, ScoredPaper) else record
+            for key, record in selected_papers.items()
+        }
 
     def _format_papers(self, selected_papers: Dict) -> Dict:
         """Convert dictionary values to Paper objects if they aren't already"""
         formatted_papers = {}
         for key, paper_dict in selected_papers.items():
-            if isinstance(paper_dict, dict):
+            if isinstance(paper_dict, ScoredPaper):
+                formatted_papers[key] = paper_dict.to_paper()
+            elif isinstance(paper_dict, dict):
                 paper = Paper(
                     title=paper_dict["title"],
                     authors=paper_dict["authors"],
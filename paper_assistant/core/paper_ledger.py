@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from loguru import logger
+
+from paper_assistant.core.arxiv_scraper import strip_arxiv_version
+
+LEDGER_FIELDS = ("RELEVANCE", "NOVELTY", "COMMENT", "CRITERION")
+
+
+class PaperLedger:
+    """Cross-day record of papers already scored by the LLM.
+
+    Entries are keyed by the version-stripped arXiv ID, so replaced versions and
+    papers cross-listed into several areas reuse the last score instead of being
+    sent to the model again. Each entry stores the ``setup_hash`` of the prompts,
+    criteria and models it was scored with; entries of another setup are not
+    reused. Entries older than ``max_age_days`` are dropped when the ledger is
+    loaded.
+    """
+
+    def __init__(
+        self, ledger_path: str, setup_hash: str = "", max_age_days: float = 30
+    ):
+        self.ledger_path = ledger_path
+        self.setup_hash = setup_hash
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        entries = {}
+        if os.path.exists(self.ledger_path):
+            try:
+                with open(self.ledger_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except Exception as e:
+                logger.error(f"Error reading paper ledger {self.ledger_path}: {e}")
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).strftime(
+            "%Y-%m-%d"
+        )
+        kept = {
+            arxiv_id: entry
+            for arxiv_id, entry in entries.items()
+            if entry.get("date", "") >= cutoff
+        }
+        if len(kept) < len(entries):
+            logger.info(
+                f"Evicted {len(entries) - len(kept)} paper ledger entries older "
+                f"than {self.max_age_days:g} days"
+            )
+        return kept
+
+    def __contains__(self, arxiv_id: str) -> bool:
+        return strip_arxiv_version(arxiv_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, arxiv_id: str) -> Optional[Dict]:
+        """Get the last score for a paper as an LLM-style dict, or None if it was
+        not scored with the current setup"""
+        with self._lock:
+            entry = self._entries.get(strip_arxiv_version(arxiv_id))
+        if entry is None or entry.get("setup") != self.setup_hash:
+            return None
+        return {
+            "ARXIVID": arxiv_id,
+            **{k: entry[k] for k in LEDGER_FIELDS if k in entry},
+        }
+
+    def record(self, arxiv_id: str, scores: Dict):
+        """Remember the score and comment the LLM gave a paper"""
+        entry = {k: scores[k] for k in LEDGER_FIELDS if k in scores}
+        entry["date"] = datetime.now().strftime("%Y-%m-%d")
+        entry["setup"] = self.setup_hash
+        with self._lock:
+            self._entries[strip_arxiv_version(arxiv_id)] = entry
+
+    def save(self):
+        """Write the ledger to disk"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+                tmp_path = self.ledger_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, indent=2)
+                os.replace(tmp_path, self.ledger_path)
+            except Exception as e:
+                logger.error(f"Error saving paper ledger {self.ledger_path}: {e}")
@@ -1,15 +1,66 @@
-from typing import Dict, List, Set, Tuple
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from configparser import ConfigParser
 from instructor import Instructor
+from loguru import logger
 
-from paper_assistant.core.arxiv_scraper import Paper, get_papers_from_arxiv_rss_api
-from paper_assistant.utils.filter_papers import filter_by_author, filter_by_gpt
+from paper_assistant.core.arxiv_scraper import (
+    Paper,
+    get_papers_for_date,
+    iter_papers_from_arxiv_rss_api,
+    strip_arxiv_version,
+)
+from paper_assistant.core.checkpoint import (
+    Checkpoint,
+    NullCheckpoint,
+    prune_checkpoints,
+)
+from paper_assistant.core.feed_state import FeedStateStore
+from paper_assistant.core.paper_ledger import PaperLedger
+from paper_assistant.utils.filter_papers import (
+    apply_score,
+    build_author_index,
+    filter_by_author,
+    filter_by_gpt,
+    scoring_setup_hash,
+)
 from paper_assistant.utils.helpers import argsort
+from paper_assistant.utils.llm_cache import open_llm_cache
+from paper_assistant.utils.llm_errors import CallBreaker
+from paper_assistant.utils.prompt_cache import open_prompt_cache
+from paper_assistant.utils.scoring_budget import ScoringBudget
+from paper_assistant.utils.usage_tracker import (
+    UsageTracker,
+    compare_with_previous_day,
+)
 
 
 class PaperProcessor:
     def __init__(self, config: ConfigParser):
         self.config = config
+        self.feed_state = None
+        if config["FILTERING"].getboolean("conditional_fetch", False):
+            self.feed_state = FeedStateStore(
+                config["OUTPUT"]["output_path"] + "feed_state.json"
+            )
+        self.ledger = None
+        if config["SELECTION"].getboolean("paper_ledger", False):
+            self.ledger = PaperLedger(
+                config["OUTPUT"]["output_path"] + "paper_ledger.json",
+                setup_hash=scoring_setup_hash(config),
+                max_age_days=config["SELECTION"].getfloat(
+                    "paper_ledger_max_age_days", 30
+                ),
+            )
+        self.llm_cache = open_llm_cache(config)
+        self.prompt_cache = open_prompt_cache(config)
+        self.usage = UsageTracker()
+        # the deadline counts from here, the start of the run
+        self.budget = ScoringBudget.from_config(config, self.usage)
+        self.breaker = CallBreaker.from_config(config)
 
     def parse_authors(self, lines: List[str]) -> Tuple[List[str], List[str]]:
         """Parse the comma-separated author list, ignoring comments and empty lines"""
@@ -23,14 +74,124 @@ class PaperProcessor:
             authors.append(author_split[0].strip())
         return authors, author_ids
 
-    def get_papers_from_arxiv(self, config: ConfigParser) -> Set[Paper]:
-        """Get papers from arXiv based on configured categories"""
-        area_list = config["FILTERING"]["arxiv_category"].split(",")
-        paper_set = set()
+    def get_papers_from_arxiv(self, config: ConfigParser) -> List[Paper]:
+        """Get papers from arXiv based on configured categories.
+
+        Areas are fetched concurrently by up to ``fetch_workers`` threads. Results
+        are merged in the configured category order, so the returned list is
+        deterministic regardless of which feed answers first. A failing area is
+        logged and skipped without aborting the others.
+        """
+        area_list = [
+            area.strip()
+            for area in config["FILTERING"]["arxiv_category"].split(",")
+            if area.strip()
+        ]
+        max_workers = max(
+            1, min(config["FILTERING"].getint("fetch_workers", 1), len(area_list))
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_area, area, config) for area in area_list
+            ]
+            results = [future.result() for future in futures]
+
+        papers = {}
+        for area, area_papers, elapsed, error in results:
+            if error is not None:
+                logger.error(f"Fetching {area} failed after {elapsed:.2f}s: {error}")
+                continue
+            logger.info(
+                f"Fetched {len(area_papers)} papers from {area} in {elapsed:.2f}s"
+            )
+            for paper in area_papers:
+                papers.setdefault(strip_arxiv_version(paper.arxiv_id), paper)
+        return list(papers.values())
+
+    def _fetch_area(
+        self,
+        area: str,
+        config: ConfigParser,
+        on_chunk: Optional[Callable[[List[Paper]], None]] = None,
+        chunk_size: int = 100,
+    ):
+        """Fetch a single area, returning (area, papers, elapsed, error).
+
+        ``on_chunk`` is given every ``chunk_size`` papers as they are parsed, and
+        the rest at the end, so they can be processed while the feed downloads.
+        """
+        start = time.perf_counter()
+        papers = []
+        try:
+            for paper in iter_papers_from_arxiv_rss_api(area, config, self.feed_state):
+                papers.append(paper)
+                if on_chunk is not None and len(papers) % chunk_size == 0:
+                    on_chunk(papers[-chunk_size:])
+            if on_chunk is not None and len(papers) % chunk_size:
+                on_chunk(papers[-(len(papers) % chunk_size) :])
+            return area, papers, time.perf_counter() - start, None
+        except Exception as e:
+            return area, [], time.perf_counter() - start, e
+
+    def get_papers_for_dates(
+        self, config: ConfigParser, dates: List[datetime], query: Optional[str] = None
+    ) -> Dict[str, List[Paper]]:
+        """Reconstruct the papers of several past days from the arXiv API.
+
+        Days are fetched concurrently. The result maps each ``YYYY-MM-DD`` date to
+        its papers, deduplicated within the day in category order.
+        """
+        if query:
+            area_list = [query]
+        else:
+            area_list = [
+                area.strip()
+                for area in config["FILTERING"]["arxiv_category"].split(",")
+                if area.strip()
+            ]
+        max_workers = max(
+            1, min(config["FILTERING"].getint("fetch_workers", 1), len(dates))
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_date, date, area_list, config, query)
+                for date in dates
+            ]
+            results = [future.result() for future in futures]
+        return dict(zip([date.strftime("%Y-%m-%d") for date in dates], results))
+
+    def _fetch_date(
+        self,
+        date: datetime,
+        area_list: List[str],
+        config: ConfigParser,
+        query: Optional[str],
+    ) -> List[Paper]:
+        """Fetch every area for one past day, logging failures per area"""
+        papers = {}
         for area in area_list:
-            papers = get_papers_from_arxiv_rss_api(area.strip(), config)
-            paper_set.update(set(papers))
-        return paper_set
+            start = time.perf_counter()
+            try:
+                area_papers = get_papers_for_date(
+                    area,
+                    date,
+                    config,
+                    query=query,
+                    max_results=config["FILTERING"].getint(
+                        "backfill_max_results", 2000
+                    ),
+                    page_size=config["FILTERING"].getint("api_page_size", 100),
+                )
+            except Exception as e:
+                logger.error(f"Fetching {area} for {date:%Y-%m-%d} failed: {e}")
+                continue
+            logger.info(
+                f"Fetched {len(area_papers)} papers from {area} for {date:%Y-%m-%d} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            for paper in area_papers:
+                papers.setdefault(strip_arxiv_version(paper.arxiv_id), paper)
+        return list(papers.values())
 
     def process_papers(
         self,
@@ -39,26 +200,107 @@ class PaperProcessor:
         author_id_set: Set[str],
         client: Instructor,
         config: ConfigParser,
+        author_names: Optional[List[str]] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        llm_cache=None,
     ) -> Tuple[Dict, Dict, Dict]:
-        """Process papers through filtering pipeline"""
+        """Process papers through filtering pipeline.
+
+        ``llm_cache`` replaces the configured LLM cache, e.g. with the results the
+        streaming pipeline already got for this day.
+        """
+        # Index author features once, both filters below only do lookups
+        author_index = build_author_index(
+            all_authors, author_id_set, config, author_names or ()
+        )
+        logger.info(f"Indexed {len(author_index)} author names")
+
         # First filter by author
         selected_papers, all_papers, sort_dict = filter_by_author(
-            all_authors, papers, author_id_set, config
+            all_authors, papers, author_id_set, config, author_index
         )
 
+        # Reuse scores of papers seen on earlier days, only new ones go to the LLM
+        new_papers = papers
+        if self.ledger is not None:
+            new_papers = []
+            for paper in papers:
+                scores = self.ledger.get(paper.arxiv_id)
+                if scores is None:
+                    new_papers.append(paper)
+                else:
+                    apply_score(scores, all_papers, selected_papers, sort_dict, config)
+            logger.info(
+                f"Reused ledger scores for {len(papers) - len(new_papers)} papers, "
+                f"{len(new_papers)} new papers to score"
+            )
+
         # Then filter by GPT
-        filter_by_gpt(
-            all_authors,
-            papers,
-            config,
-            client,
-            all_papers,
-            selected_papers,
-            sort_dict,
-        )
+        try:
+            scored = filter_by_gpt(
+                all_authors,
+                new_papers,
+                config,
+                client,
+                all_papers,
+                selected_papers,
+                sort_dict,
+                author_index,
+                llm_cache if llm_cache is not None else self.llm_cache,
+                checkpoint,
+                usage=self.usage,
+                budget=self.budget,
+                prompt_cache=self.prompt_cache,
+                breaker=self.breaker,
+            )
+        finally:
+            if self.prompt_cache is not None:
+                # the run's last LLM call is done, streamed chunks included
+                self.prompt_cache.close()
+
+        if self.ledger is not None:
+            for record in scored:
+                self.ledger.record(record.arxiv_id, record.scores)
+            self.ledger.save()
 
         return selected_papers, all_papers, sort_dict
 
+    def report_usage(self, save: bool = True):
+        """Log the run's LLM usage and add it to output_path/usage/{today}.json"""
+        if not self.usage.summary():
+            return
+        self.usage.report()
+        if not save:
+            return
+        usage_dir = os.path.join(self.config["OUTPUT"]["output_path"], "usage")
+        try:
+            day = self.usage.save(usage_dir, datetime.now().strftime("%Y-%m-%d"))
+            compare_with_previous_day(usage_dir, day)
+        except Exception as e:
+            logger.error(f"Error saving LLM usage to {usage_dir}: {e}")
+
+    def open_checkpoint(
+        self, resume: bool = False, dry_run: bool = False
+    ) -> Checkpoint:
+        """Checkpoint of today's generate run under output_path/checkpoints.
+
+        Checkpoints of earlier days older than ``checkpoint_max_age_days`` are
+        removed. Dry runs get a checkpoint that writes nothing.
+        """
+        if dry_run:
+            return NullCheckpoint()
+        checkpoints_dir = os.path.join(
+            self.config["OUTPUT"]["output_path"], "checkpoints"
+        )
+        prune_checkpoints(
+            checkpoints_dir,
+            self.config["OUTPUT"].getfloat("checkpoint_max_age_days", 7),
+        )
+        return Checkpoint(
+            os.path.join(checkpoints_dir, datetime.now().strftime("%Y-%m-%d")),
+            resume=resume,
+        )
+
     def sort_papers(self, selected_papers: Dict, sort_dict: Dict) -> Dict:
         """Sort papers by relevance and novelty"""
         keys = list(sort_dict.keys())
@@ -0,0 +1,332 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from configparser import ConfigParser
+from typing import Dict, List, Optional, Set, Tuple
+
+from instructor import Instructor
+from loguru import logger
+
+from paper_assistant.api.api_handler import APIHandler
+from paper_assistant.core.arxiv_scraper import Paper, strip_arxiv_version
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.utils.filter_papers import (
+    filter_by_gpt,
+    score_criteria,
+    uses_lexical,
+)
+from paper_assistant.utils.llm_cache import MemoryLLMCache
+
+# tells a stage's workers that no more chunks will come
+_DONE = object()
+
+
+class StreamingPipeline:
+    """The fetch, author and LLM stages of generate, connected by bounded queues.
+
+    Each area's papers are cut into chunks of ``chunk_size`` while its feed is
+    parsed (as it downloads with the streaming RSS parser), and go through author resolution (``author_workers`` threads) and the
+    LLM filters (``llm_workers`` threads) while later areas are still downloading.
+    A full queue blocks the stage feeding it.
+
+    The lexical prefilter and criterion routing need BM25 statistics of the whole
+    day. With either enabled the LLM stage waits until every area is fetched, so
+    only author resolution overlaps the downloads.
+
+    The chunks only warm a MemoryLLMCache. ``run`` returns the day's papers, in
+    the same order as PaperProcessor.get_papers_from_arxiv, the merged author map
+    and that cache. process_papers then runs the filters over the whole day once
+    more, answering from the cache without LLM calls, so the sorted output is the
+    same as in the phased run. A paper a chunk could not settle, e.g. because an
+    author lookup was still in flight, is scored there.
+    """
+
+    def __init__(
+        self,
+        config: ConfigParser,
+        api_handler: APIHandler,
+        paper_processor: PaperProcessor,
+        client: Instructor,
+    ):
+        section = config["PIPELINE"]
+        self.config = config
+        self.api_handler = api_handler
+        self.paper_processor = paper_processor
+        self.client = client
+        self.chunk_size = max(1, section.getint("chunk_size", 100))
+        self.queue_size = max(1, section.getint("queue_size", 4))
+        self.author_workers = max(1, section.getint("author_workers", 2))
+        self.llm_workers = max(1, section.getint("llm_workers", 2))
+        self.llm_cache = MemoryLLMCache(paper_processor.llm_cache)
+        self.needs_corpus = uses_lexical(config)
+
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+        self._corpus_ready = threading.Event()
+        self._corpus: Dict[str, Paper] = {}
+        self._lexical = None
+        # author metadata resolved through paper batches wins over name search,
+        # like in APIHandler.resolve_authors
+        self._by_paper: Dict[str, List[Dict]] = {}
+        self._by_search: Dict[str, List[Dict]] = {}
+        self._claimed: Set[str] = set()
+        self._pending: Set[str] = set()
+        self._searched = threading.Condition(self._lock)
+
+    def run(self) -> Tuple[List[Paper], Dict, MemoryLLMCache]:
+        """Run the stages, returning (papers, all_authors, LLM results of the run)"""
+        start = time.perf_counter()
+        author_queue = queue.Queue(maxsize=self.queue_size)
+        llm_queue = queue.Queue(maxsize=self.queue_size)
+        fetch = self._spawn(self._fetch_stage, author_queue)
+        authors = [
+            self._spawn(self._author_stage, author_queue, llm_queue)
+            for _ in range(self.author_workers)
+        ]
+        llm = [self._spawn(self._llm_stage, llm_queue) for _ in range(self.llm_workers)]
+        fetch.join()
+        for worker in authors:
+            worker.join()
+        for _ in llm:
+            self._put(llm_queue, _DONE)
+        for worker in llm:
+            worker.join()
+        self._wait_for_corpus()
+        if self._errors:
+            raise self._errors[0]
+
+        papers = list(self._corpus.values())
+        all_authors = self.all_authors()
+        logger.info(
+            f"Streaming pipeline: {len(papers)} papers, {len(all_authors)} authors "
+            f"and {len(self.llm_cache)} LLM results in {time.perf_counter() - start:.1f}s"
+        )
+        return papers, all_authors, self.llm_cache
+
+    def all_authors(self) -> Dict:
+        """Author map of the chunks resolved so far"""
+        with self._lock:
+            all_authors = dict(self._by_paper)
+            for name, aliases in self._by_search.items():
+                all_authors.setdefault(name, aliases)
+        return all_authors
+
+    def _spawn(self, stage, *args) -> threading.Thread:
+        def target():
+            try:
+                stage(*args)
+            except BaseException as e:
+                logger.error(f"Streaming pipeline {stage.__name__} failed: {e}")
+                with self._lock:
+                    self._errors.append(e)
+                self._abort.set()
+
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        return worker
+
+    def _put(self, stage_queue: queue.Queue, item):
+        # blocks while the next stage is behind, unless the run was aborted
+        while not self._abort.is_set():
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, stage_queue: queue.Queue):
+        while not self._abort.is_set():
+            try:
+                return stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _wait_for_corpus(self) -> bool:
+        while not self._corpus_ready.wait(timeout=0.1):
+            if self._abort.is_set():
+                return False
+        return True
+
+    def _fetch_stage(self, author_queue: queue.Queue):
+        area_list = [
+            area.strip()
+            for area in self.config["FILTERING"]["arxiv_category"].split(",")
+            if area.strip()
+        ]
+        max_workers = max(
+            1, min(self.config["FILTERING"].getint("fetch_workers", 1), len(area_list))
+        )
+        seen = set()
+
+        def hand_on(chunk):
+            # a cross-listed paper goes on with the first area that yields it
+            with self._lock:
+                fresh = [
+                    paper
+                    for paper in chunk
+                    if strip_arxiv_version(paper.arxiv_id) not in seen
+                ]
+                seen.update(strip_arxiv_version(paper.arxiv_id) for paper in fresh)
+            if fresh:
+                self._put(author_queue, fresh)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.paper_processor._fetch_area,
+                    area,
+                    self.config,
+                    hand_on,
+                    self.chunk_size,
+                )
+                for area in area_list
+            ]
+            # the corpus only needs the downloads, not the later stages catching up
+            self._spawn(self._build_corpus, futures)
+        for _ in range(self.author_workers):
+            self._put(author_queue, _DONE)
+
+    def _build_corpus(self, futures):
+        wait(futures)
+        # merged in category order, as in PaperProcessor.get_papers_from_arxiv
+        corpus = {}
+        for future in futures:
+            area, area_papers, elapsed, error = future.result()
+            if error is not None:
+                logger.error(f"Fetching {area} failed after {elapsed:.2f}s: {error}")
+                continue
+            logger.info(
+                f"Fetched {len(area_papers)} papers from {area} in {elapsed:.2f}s"
+            )
+            for paper in area_papers:
+                corpus.setdefault(strip_arxiv_version(paper.arxiv_id), paper)
+        self._corpus = corpus
+
+        # the LLM stage only sees papers without a ledger score, as process_papers
+        ledger = self.paper_processor.ledger
+        new_papers = [
+            paper
+            for paper in corpus.values()
+            if ledger is None or ledger.get(paper.arxiv_id) is None
+        ]
+        with open("paper_assistant/config/paper_topics.txt", "r") as f:
+            criterion = f.read()
+        self._lexical = score_criteria(new_papers, self.config, criterion)
+        self._corpus_ready.set()
+
+    def _author_stage(self, author_queue: queue.Queue, llm_queue: queue.Queue):
+        while True:
+            chunk = self._get(author_queue)
+            if chunk is _DONE:
+                return
+            start = time.perf_counter()
+            self._resolve_chunk(chunk)
+            logger.info(
+                f"Resolved authors of {len(chunk)} papers in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+            self._put(llm_queue, chunk)
+
+    def _search(self, names):
+        # every name is searched once, whichever chunk needs it first; a chunk
+        # also waits for its names another worker is searching, so its hIndex
+        # filter sees the same authors as the final pass
+        with self._lock:
+            names = [
+                name for name in dict.fromkeys(names) if name not in self._by_paper
+            ]
+            claimed = [name for name in names if name not in self._claimed]
+            self._claimed.update(claimed)
+            self._pending.update(claimed)
+        found = {}
+        try:
+            if claimed:
+                found = self.api_handler.get_authors(claimed)
+        finally:
+            with self._searched:
+                self._by_search.update(found)
+                self._pending.difference_update(claimed)
+                self._searched.notify_all()
+        with self._searched:
+            while any(name in self._pending for name in names):
+                if self._abort.is_set():
+                    return
+                self._searched.wait(timeout=0.1)
+
+    def _resolve_chunk(self, chunk: List[Paper]):
+        if self.api_handler.resolution_mode != "paper_batch":
+            self._search(name for paper in chunk for name in paper.authors)
+            return
+
+        by_paper, unresolved = self.api_handler.get_authors_by_papers(chunk)
+        with self._lock:
+            for name, aliases in by_paper.items():
+                merged = self._by_paper.setdefault(name, [])
+                for alias in aliases:
+                    if all(known["authorId"] != alias["authorId"] for known in merged):
+                        merged.append(alias)
+        self._search(name for paper in unresolved for name in paper.authors)
+
+    def _llm_stage(self, llm_queue: queue.Queue):
+        while True:
+            chunk = self._get(llm_queue)
+            if chunk is _DONE:
+                return
+            papers = chunk
+            if self.needs_corpus:
+                if not self._wait_for_corpus():
+                    return
+                # the final pass uses the corpus copy of a cross-listed paper
+                papers = [
+                    self._corpus[strip_arxiv_version(paper.arxiv_id)]
+                    for paper in chunk
+                    if strip_arxiv_version(paper.arxiv_id) in self._corpus
+                ]
+            ledger = self.paper_processor.ledger
+            papers = [
+                paper
+                for paper in papers
+                if ledger is None or ledger.get(paper.arxiv_id) is None
+            ]
+            if not papers:
+                continue
+            start = time.perf_counter()
+            filter_by_gpt(
+                self.all_authors(),
+                papers,
+                self.config,
+                self.client,
+                {},
+                {},
+                {},
+                llm_cache=self.llm_cache,
+                lexical=self._lexical,
+                usage=self.paper_processor.usage,
+                budget=self.paper_processor.budget,
+                prompt_cache=self.paper_processor.prompt_cache,
+                breaker=self.paper_processor.breaker,
+                # debug files and cache hit rates come from the final pass over
+                # the whole day, chunks would overwrite each other's
+                report=False,
+            )
+            logger.info(
+                f"Filtered and scored {len(papers)} papers in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+
+
+def run_streaming(
+    config: ConfigParser,
+    api_handler: APIHandler,
+    paper_processor: PaperProcessor,
+    client: Instructor,
+) -> Optional[Tuple[List[Paper], Dict, MemoryLLMCache]]:
+    """Run the streaming pipeline if ``[PIPELINE] streaming`` is enabled, else None"""
+    if not config.has_section("PIPELINE") or not config["PIPELINE"].getboolean(
+        "streaming", False
+    ):
+        return None
+    return StreamingPipeline(config, api_handler, paper_processor, client).run()
@@ -16,7 +16,7 @@ class QaResult(BaseModel):
 
 
 class QaProcessor:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, paper_store=None):
         # Load config
         self.config = configparser.ConfigParser()
         self.config.read("paper_assistant/config/config.ini")
@@ -35,7 +35,7 @@ class QaProcessor:
         # Progress tracking
         self.progress = {}
 
-        self.cache_handler = CacheHandler("out/qa_cache")
+        self.cache_handler = CacheHandler("out/qa_cache", store=paper_store)
 
     def get_paper_content(self, paper: Paper) -> str:
         """Get paper content using arxiv API and markitdown"""
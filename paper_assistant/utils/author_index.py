@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NAME_PUNCT_RE = re.compile(r"[.,'`’‐‑–-]+")
+
+
+def fold_author_name(name: str) -> str:
+    """Fold an author name for matching: no accents, case, punctuation or extra spaces.
+
+    "Jürgen  Schmidhuber", "Jurgen Schmidhuber" and "Jürgen Schmidhuber" fold
+    to the same key; hyphens and dots become spaces, so "Jean-Pierre" and
+    "Jean Pierre" also match.
+    """
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(NAME_PUNCT_RE.sub(" ", name).casefold().split())
+
+
+def initials_key(folded: str) -> Optional[str]:
+    """First initial and surname of a folded name, e.g. "john a smith" -> "j smith" """
+    parts = folded.split()
+    if len(parts) < 2:
+        return None
+    return parts[0][0] + " " + parts[-1]
+
+
+def is_abbreviated(folded: str) -> bool:
+    """True if the given names of a folded name are all initials ("j a smith")"""
+    parts = folded.split()
+    return len(parts) >= 2 and all(len(part) == 1 for part in parts[:-1])
+
+
+class AuthorIndex:
+    """One-time index of author features used by the author and hIndex filters.
+
+    Maps every folded author name to (max hIndex over its S2 aliases, followed
+    flag), so the filters do a single dict lookup per author occurrence instead
+    of scanning all aliases of every author of every paper. Followed authors are
+    marked through their S2 author IDs and, with name matching enabled, directly
+    by the names in authors.txt, which also works for authors S2 could not
+    resolve. Abbreviated names on arXiv ("J. Smith") match a followed author by
+    first initial and surname.
+    """
+
+    def __init__(
+        self,
+        all_authors: Dict[str, List[Dict]],
+        author_targets: Iterable[str] = (),
+        followed_names: Iterable[str] = (),
+    ):
+        author_targets = set(author_targets)
+        self._entries: Dict[str, Tuple[float, bool]] = {}
+        folded_names = {}
+        for name, aliases in all_authors.items():
+            max_h = max([alias.get("hIndex") or 0 for alias in aliases], default=0)
+            followed = bool(
+                author_targets
+                and any([alias.get("authorId") in author_targets for alias in aliases])
+            )
+            folded_names[name] = fold_author_name(name)
+            self._add(folded_names[name], max_h, followed)
+
+        self._lookups: Dict[str, Tuple[float, bool]] = {}
+        self._followed_initials = set()
+        for name in followed_names:
+            folded = fold_author_name(name)
+            if not folded:
+                continue
+            self._add(folded, 0, True)
+            initials = initials_key(folded)
+            if initials is not None:
+                self._followed_initials.add(initials)
+        # the S2 metadata is keyed by the names as written on arXiv, which the
+        # filters look up, so each is only folded once
+        for name, folded in folded_names.items():
+            self._lookups[name] = self._resolve(folded)
+
+    def _add(self, key: str, max_h: float, followed: bool):
+        old_h, old_followed = self._entries.get(key, (0, False))
+        self._entries[key] = (max(old_h, max_h), old_followed or followed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, name: str) -> Tuple[float, bool]:
+        """Get (max hIndex, followed) for an author name as written on arXiv"""
+        result = self._lookups.get(name)
+        if result is None:
+            result = self._lookups[name] = self._resolve(fold_author_name(name))
+        return result
+
+    def _resolve(self, folded: str) -> Tuple[float, bool]:
+        max_h, followed = self._entries.get(folded, (0, False))
+        if not followed and self._followed_initials and is_abbreviated(folded):
+            followed = initials_key(folded) in self._followed_initials
+        return max_h, followed
+
+    def max_hindex(self, authors: List[str]) -> float:
+        """Highest hIndex among the authors of a paper"""
+        return max((self.lookup(author)[0] for author in authors), default=0)
+
+    def has_followed_author(self, authors: List[str]) -> bool:
+        """True if any author of a paper is followed"""
+        return any(self.lookup(author)[1] for author in authors)
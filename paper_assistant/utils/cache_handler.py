@@ -1,13 +1,20 @@
 import os
+import glob
 import json
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 from loguru import logger
 
+from paper_assistant.utils.paper_store import PaperStore
+
+
 class CacheHandler:
-    def __init__(self, cache_dir: str):
-        """Initialize cache handler with a directory"""
+    def __init__(self, cache_dir: str, store: Optional[PaperStore] = None):
+        """Initialize cache handler with a directory, or a SQLite store to use instead"""
         self.cache_dir = cache_dir
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.store = store
+        if self.store is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
 
     def get_cache_path(self, cache_key: str) -> str:
         """Get the cache file path for a key"""
@@ -15,6 +22,12 @@ class CacheHandler:
 
     def get_cached_data(self, cache_key: str) -> Optional[Dict]:
         """Get cached data if it exists"""
+        if self.store is not None:
+            try:
+                return self.store.get(cache_key)
+            except Exception as e:
+                logger.error(f"Error reading store for {cache_key}: {e}")
+                return None
         cache_path = self.get_cache_path(cache_key)
         if os.path.exists(cache_path):
             try:
@@ -26,9 +39,34 @@ class CacheHandler:
 
     def save_cache_data(self, cache_key: str, data: Dict):
         """Save data to cache"""
+        if self.store is not None:
+            try:
+                self.store.save(cache_key, data)
+            except Exception as e:
+                logger.error(f"Error saving store for {cache_key}: {e}")
+            return
         cache_path = self.get_cache_path(cache_key)
         try:
             with open(cache_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception as e:
             logger.error(f"Error saving cache for {cache_key}: {e}")
+
+    def get_cached_dates(self) -> List[Dict]:
+        """Get the days with cached output, newest first"""
+        if self.store is not None:
+            dates = self.store.get_dates()
+        else:
+            paths = glob.glob(os.path.join(self.cache_dir, "*_output.json"))
+            dates = sorted(
+                (os.path.basename(path)[: -len("_output.json")] for path in paths),
+                reverse=True,
+            )
+        cached_dates = []
+        for date in dates:
+            try:
+                display_date = datetime.strptime(date, "%Y-%m-%d").strftime("%B %d, %Y")
+            except ValueError:
+                continue
+            cached_dates.append({"date": date, "display_date": display_date})
+        return cached_dates
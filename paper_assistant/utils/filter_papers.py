@@ -1,6 +1,8 @@
 import configparser
-import dataclasses
 import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from tqdm import tqdm
@@ -8,12 +10,26 @@ import instructor
 from litellm import completion
 from pydantic import BaseModel, Field
 
-from paper_assistant.core.arxiv_scraper import Paper
+from paper_assistant.core.arxiv_scraper import Paper, ScoredPaper, strip_arxiv_version
 from paper_assistant.core.arxiv_scraper import EnhancedJSONEncoder
 import os
 from loguru import logger
 
+from paper_assistant.utils.author_index import AuthorIndex
 from paper_assistant.utils.helpers import argsort
+from paper_assistant.utils.lexical_filter import CriterionScores, select_criteria
+from paper_assistant.utils.llm_cache import text_hash
+from paper_assistant.utils.llm_errors import CallBreaker, LLMUnavailable, is_splittable
+from paper_assistant.utils.pricing import open_price_table, usage_tokens
+from paper_assistant.utils.prompt_cache import is_cache_rejection
+from paper_assistant.utils.token_budget import (
+    estimate_tokens,
+    max_output_tokens,
+    pack_batches,
+)
+
+
+ABSTRACT_FILTER_POSTFIX = "Identify any papers that are absolutely and completely irrelavent to the criteria, and you are absolutely sure your friend will not enjoy. Return a list of arxiv IDs to filter out. Be extremely cautious, and if you are unsure at all, do not add a paper in this list. You will check it in detail later."
 
 
 class PaperScore(BaseModel):
@@ -32,70 +48,293 @@ class FilteredPapers(BaseModel):
     filtered_ids: List[str] = Field(description="List of arxiv IDs to filter out")
 
 
-def filter_by_author(all_authors, papers, author_targets, config):
+def build_author_index(all_authors, author_targets=(), config=None, followed_names=()):
+    # followed names only match without an S2 author ID if enabled in the config
+    if config is None or not config["SELECTION"].getboolean("author_name_match", False):
+        followed_names = ()
+    return AuthorIndex(all_authors, author_targets, followed_names)
+
+
+def filter_by_author(all_authors, papers, author_targets, config, author_index=None):
     # filter and parse the papers
     selected_papers = {}  # pass to output
     all_papers = {}  # dict for later filtering
     sort_dict = {}  # dict storing key and score
+    if author_index is None:
+        author_index = build_author_index(all_authors, author_targets, config)
+    author_match_score = float(config["SELECTION"]["author_match_score"])
 
     # author based selection
     for paper in papers:
         all_papers[paper.arxiv_id] = paper
-        for author in paper.authors:
-            if author in all_authors:
-                for alias in all_authors[author]:
-                    if alias["authorId"] in author_targets:
-                        selected_papers[paper.arxiv_id] = {
-                            **dataclasses.asdict(paper),
-                            **{"COMMENT": "Author match"},
-                        }
-                        sort_dict[paper.arxiv_id] = float(
-                            config["SELECTION"]["author_match_score"]
-                        )
-                        break
+        if author_index.has_followed_author(paper.authors):
+            selected_papers[paper.arxiv_id] = ScoredPaper(
+                paper, {"COMMENT": "Author match"}
+            )
+            sort_dict[paper.arxiv_id] = author_match_score
     return selected_papers, all_papers, sort_dict
 
 
-def filter_papers_by_hindex(all_authors, papers, config):
+def filter_papers_by_hindex(all_authors, papers, config, author_index=None):
     # filters papers by checking to see if there's at least one author with > hcutoff hindex
-    paper_list = []
-    for paper in papers:
-        max_h = 0
-        for author in paper.authors:
-            if author in all_authors:
-                max_h = max(
-                    max_h, max([alias["hIndex"] for alias in all_authors[author]])
-                )
-        if max_h >= float(config["FILTERING"]["hcutoff"]):
-            paper_list.append(paper)
+    if author_index is None:
+        author_index = build_author_index(all_authors)
+    hcutoff = float(config["FILTERING"]["hcutoff"])
+    return [
+        paper for paper in papers if author_index.max_hindex(paper.authors) >= hcutoff
+    ]
+
+
+def uses_lexical(config):
+    # True if the prefilter or criterion routing needs BM25 statistics of the day
+    return config["FILTERING"].getboolean("lexical_prefilter", False) or config[
+        "SELECTION"
+    ].getboolean("criterion_routing", False)
+
+
+def score_criteria(papers, config, criterion):
+    # BM25 scores of the day's papers for the prefilter and criterion routing,
+    # None if neither is enabled
+    if not uses_lexical(config):
+        return None
+    start = time.perf_counter()
+    lexical = CriterionScores(papers, criterion)
+    logger.info(
+        f"Scored {len(papers)} papers against {len(lexical.criteria)} criteria with "
+        f"BM25 in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return lexical
+
+
+def filter_papers_by_lexical(papers, config, criterion, lexical=None):
+    # drops papers without enough term overlap with any criterion, no LLM call needed
+    if not papers or not config["FILTERING"].getboolean("lexical_prefilter", False):
+        return papers
+    threshold = config["FILTERING"].getfloat("lexical_threshold", 1.0)
+    if lexical is None:
+        lexical = CriterionScores(papers, criterion)
+    scores = lexical.relevance(papers)
+    paper_list = [paper for paper, score in zip(papers, scores) if score >= threshold]
+    logger.info(
+        f"Lexical prefilter dropped {len(papers) - len(paper_list)} of {len(papers)} "
+        f"papers below BM25 {threshold}"
+    )
     return paper_list
 
 
-def calc_price(model, usage):
-    if model == "gpt-4-1106-preview":
-        return (0.01 * usage.prompt_tokens + 0.03 * usage.completion_tokens) / 1000.0
-    if model == "gpt-4":
-        return (0.03 * usage.prompt_tokens + 0.06 * usage.completion_tokens) / 1000.0
-    if (model == "gpt-3.5-turbo") or (model == "gpt-3.5-turbo-1106"):
-        return (0.0015 * usage.prompt_tokens + 0.002 * usage.completion_tokens) / 1000.0
-    if "gemini" in model:
-        return 0
+def route_criteria(papers, config, criterion, lexical=None):
+    # maps each paper to the criteria (best first) its scoring prompt should carry,
+    # empty if routing is disabled and every prompt gets all of paper_topics.txt
+    if not papers or not config["SELECTION"].getboolean("criterion_routing", False):
+        return {}
+    if lexical is None:
+        lexical = CriterionScores(papers, criterion)
+    if not lexical.criteria:
+        # no numbered criteria to route to
+        return {}
+    routes = lexical.routes(
+        papers,
+        top_k=config["SELECTION"].getint("routing_top_k", 2),
+        min_ratio=config["SELECTION"].getfloat("routing_min_ratio", 0.5),
+    )
+    return {paper.arxiv_id: route for paper, route in zip(papers, routes)}
+
+
+def stage_model(config, stage):
+    # [SELECTION] {stage}_model if set, else the default model
+    return (
+        config["SELECTION"].get(stage + "_model", "").strip()
+        or (config["SELECTION"]["model"])
+    )
+
+
+def scoring_setup_hash(config):
+    # identifies the prompts, criteria and models scores come from, so scores kept
+    # across runs are only reused while they would come out the same way
+    texts = [
+        stage_model(config, "scoring"),
+        config["SELECTION"].get("cascade_model", "").strip(),
+    ]
+    for name in ("base_prompt.txt", "paper_topics.txt", "postfix_prompt.txt"):
+        with open("paper_assistant/config/" + name, "r") as f:
+            texts.append(f.read())
+    return text_hash("\n".join(texts))
+
+
+def in_escalation_band(jdict, config):
+    # True if a score is close enough to the cutoffs that the stronger model could
+    # flip the selection: both scores may reach their cutoff and one may miss it
+    band = config["SELECTION"].getint("escalation_band", 1)
+    relevance, novelty = int(jdict["RELEVANCE"]), int(jdict["NOVELTY"])
+    relevance_cutoff = int(config["FILTERING"]["relevance_cutoff"])
+    novelty_cutoff = int(config["FILTERING"]["novelty_cutoff"])
+    return (
+        relevance >= relevance_cutoff - band and novelty >= novelty_cutoff - band
+    ) and (relevance < relevance_cutoff + band or novelty < novelty_cutoff + band)
+
+
+def prioritize_papers(papers, all_authors, author_index=None, lexical=None):
+    # orders papers by cheap signals, best first: followed author, then the
+    # highest author hIndex, then BM25 relevance to the criteria
+    if author_index is None:
+        author_index = build_author_index(all_authors)
+    relevance = (
+        lexical.relevance(papers) if lexical is not None else [0.0] * len(papers)
+    )
+    ranked = sorted(
+        zip(papers, relevance),
+        key=lambda item: (
+            author_index.has_followed_author(item[0].authors),
+            author_index.max_hindex(item[0].authors),
+            item[1],
+        ),
+        reverse=True,
+    )
+    return [paper for paper, _ in ranked]
+
+
+def report_unscored(unscored, config):
+    # lists papers left unscored (out of budget, or the LLM failed) in priority
+    # order, apart from the selection so they never reach the output
+    for papers, reason in unscored:
+        if papers:
+            logger.warning(
+                f"{len(papers)} papers left unscored: {reason}: "
+                + ", ".join(paper.arxiv_id for paper in papers)
+            )
+    if config["OUTPUT"].getboolean("dump_debug_file"):
+        with open(
+            config["OUTPUT"]["output_path"] + "unscored_papers.debug.json", "w"
+        ) as outfile:
+            json.dump(
+                [
+                    {"ARXIVID": paper.arxiv_id, "TITLE": paper.title, "REASON": reason}
+                    for papers, reason in unscored
+                    for paper in papers
+                ],
+                outfile,
+                indent=4,
+            )
+
+
+def calc_price(config, model, completion):
+    # cost of one litellm response from the token usage it reports
+    return open_price_table(config).cost(model, *usage_tokens(completion))
+
+
+def record_call(config, usage, stage, model, start, completion=None):
+    # records an LLM call (failed if there is no completion) and returns its cost
+    if completion is None:
+        tokens, cost = (0, 0, 0), 0.0
+    else:
+        tokens, cost = usage_tokens(completion), calc_price(config, model, completion)
+    if usage is not None:
+        usage.record(
+            stage,
+            model,
+            time.perf_counter() - start,
+            ok=completion is not None,
+            prompt_tokens=tokens[0],
+            completion_tokens=tokens[1],
+            cached_tokens=tokens[2],
+            cost=cost,
+        )
+    return cost
+
+
+def abstract_prompt_prefix(base_prompt, criterion):
+    # instructions and criteria every abstract filter prompt starts with, the
+    # papers of the batch follow
+    return base_prompt + "\n " + criterion + "\n" + ABSTRACT_FILTER_POSTFIX + "\n\n"
+
+
+def scoring_prompt_prefix(base_prompt, criterion, postfix_prompt):
+    # the answer format comes before the criteria, so prompts with different
+    # routed criteria still share their first part
+    return "\n".join([base_prompt, postfix_prompt, criterion + "\n", ""])
 
 
-def run_and_parse_chatgpt(full_prompt, client, config):
+def create_completion(
+    client,
+    config,
+    model,
+    prefix,
+    papers_prompt,
+    response_model,
+    usage=None,
+    stage="scoring",
+    prompt_cache=None,
+    **kwargs,
+):
+    # sends the prompt prefix and the papers as one message, or only the papers
+    # if the prefix has a context cache handle. Returns (response, cost).
+    handle = (
+        prompt_cache.handle(client, model, prefix) if prompt_cache is not None else None
+    )
+    if handle is None:
+        messages, cached = [{"role": "user", "content": prefix + papers_prompt}], {}
+    else:
+        messages, cached = (
+            [{"role": "user", "content": papers_prompt}],
+            {"cached_content": handle},
+        )
+    start = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model=config["SELECTION"]["model"],
-            messages=[{"role": "user", "content": full_prompt}],
-            max_tokens=4096,
-            response_model=List[PaperScore],
+        response, completion = client.chat.completions.create_with_completion(
+            model=model,
+            messages=messages,
+            max_tokens=max_output_tokens(config, stage, model),
+            response_model=response_model,
+            **kwargs,
+            **cached,
+        )
+    except Exception as ex:
+        record_call(config, usage, stage, model, start)
+        if handle is None or not is_cache_rejection(ex):
+            raise
+        # the handle expired or is gone, later batches send the full prompt too
+        prompt_cache.invalidate(model, prefix)
+        return create_completion(
+            client,
+            config,
+            model,
+            prefix,
+            papers_prompt,
+            response_model,
+            usage,
+            stage,
+            **kwargs,
+        )
+    return response, record_call(config, usage, stage, model, start, completion)
+
+
+def run_and_parse_chatgpt(
+    prefix,
+    papers_prompt,
+    client,
+    config,
+    model=None,
+    usage=None,
+    stage="scoring",
+    prompt_cache=None,
+):
+    model = model or stage_model(config, "scoring")
+    try:
+        response, cost = create_completion(
+            client,
+            config,
+            model,
+            prefix,
+            papers_prompt,
+            List[PaperScore],
+            usage,
+            stage,
+            prompt_cache,
             temperature=0.0,
             max_retries=3,
             timeout=10,
         )
-        return [
-            score.model_dump() for score in response
-        ], 0.0  # Cost calculation not implemented for litellm
+        return [score.model_dump() for score in response], cost
     except Exception as ex:
         if config["OUTPUT"].getboolean("debug_messages"):
             logger.error("Exception happened " + str(ex))
@@ -106,7 +345,10 @@ def run_and_parse_chatgpt(full_prompt, client, config):
                 logger.error(
                     f"GEMINI_API_KEY is set in the environment variables: {os.environ.get('GEMINI_API_KEY')}"
                 )
-        return [], 0.0
+        if not is_splittable(ex):
+            raise LLMUnavailable.from_error(ex) from ex
+        # None tells a failed call apart from a response without any scores
+        return None, 0.0
 
 
 def paper_to_string(paper_entry: Paper) -> str:
@@ -122,52 +364,289 @@ def paper_to_string(paper_entry: Paper) -> str:
         + " and ".join(paper_entry.authors)
         + "\n"
         + "Abstract: "
-        + paper_entry.abstract[:4000]
+        + paper_entry.abstract
     )
     return new_str
 
 
-def batched(items, batch_size):
-    # takes a list and returns a list of list with batch_size
-    return [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
+def pack_papers(
+    papers,
+    render,
+    config,
+    instructions,
+    output_tokens_per_paper,
+    max_items=None,
+    model=None,
+    stage="scoring",
+):
+    # fills each prompt up to prompt_token_budget, keeping the expected answer
+    # under the stage's output token cap
+    return pack_batches(
+        papers,
+        render,
+        config["SELECTION"].getint("prompt_token_budget", 8000),
+        overhead_tokens=estimate_tokens(instructions),
+        output_tokens_per_item=output_tokens_per_paper,
+        output_budget=max_output_tokens(config, stage, model),
+        max_items=max_items,
+    )
+
+
+def salvage_batch(batch, call, retries, breaker=None):
+    # call(papers) returns ({arxiv_id: result}, cost), with None instead of the dict
+    # if the answer did not parse. Papers missing from a response are sent again, a
+    # batch whose answer fails is split in halves until the bad paper is isolated.
+    # A call raising LLMUnavailable is not split, smaller batches would fail the
+    # same way: the breaker retries transient failures (rate limits, timeouts,
+    # 5xx) with backoff, other failures fail the whole batch. Returns (results,
+    # cost, papers that could not be recovered within retries).
+    attempt = 0
+    while True:
+        if breaker is not None and breaker.exhausted():
+            return {}, 0.0, list(batch)
+        try:
+            results, cost = call(batch)
+            break
+        except LLMUnavailable as ex:
+            delay = breaker.retry_delay(ex, attempt) if breaker is not None else None
+            if delay is None:
+                if breaker is not None:
+                    breaker.record(ex)
+                return {}, 0.0, list(batch)
+            logger.warning(f"LLM call failed ({ex}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+    if breaker is not None:
+        breaker.record()
+    if results is None or (not results and len(batch) > 1):
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            results, failed = {}, []
+            for half in (batch[:middle], batch[middle:]):
+                half_results, half_cost, half_failed = salvage_batch(
+                    half, call, retries, breaker
+                )
+                results.update(half_results)
+                cost += half_cost
+                failed += half_failed
+            return results, cost, failed
+        if retries > 0:
+            retry_results, retry_cost, failed = salvage_batch(
+                batch, call, retries - 1, breaker
+            )
+            return retry_results, cost + retry_cost, failed
+        return {}, cost, list(batch)
+
+    missing = [paper for paper in batch if paper.arxiv_id not in results]
+    if not missing:
+        return results, cost, []
+    if retries <= 0:
+        return results, cost, missing
+    retry_results, retry_cost, failed = salvage_batch(
+        missing, call, retries - 1, breaker
+    )
+    results.update(retry_results)
+    return results, cost + retry_cost, failed
+
+
+def match_scores(papers, json_dicts):
+    # maps the scores of a response to the papers of its batch, accepting IDs the
+    # model wrote without version or with an "arXiv:" prefix
+    ids = {strip_arxiv_version(paper.arxiv_id): paper.arxiv_id for paper in papers}
+    scores = {}
+    for jdict in json_dicts:
+        returned_id = str(jdict.get("ARXIVID", "")).strip()
+        if returned_id.lower().startswith("arxiv:"):
+            returned_id = returned_id[len("arxiv:") :]
+        arxiv_id = ids.get(strip_arxiv_version(returned_id))
+        if arxiv_id is not None and arxiv_id not in scores:
+            scores[arxiv_id] = {**jdict, "ARXIVID": arxiv_id}
+    return scores
+
+
+def report_unrecoverable(stage, failed, consequence):
+    if failed:
+        logger.warning(
+            f"{stage}: {len(failed)} papers could not be recovered, {consequence}: "
+            + ", ".join(paper.arxiv_id for paper in failed)
+        )
+
+
+def stop_reason(budget=None, breaker=None):
+    # why batches that have not started yet are skipped, None while they may run
+    for limit in (budget, breaker):
+        reason = limit.exhausted() if limit is not None else None
+        if reason:
+            return reason
+    return None
+
+
+def run_batches(fn, batches, config, stage, budget=None, breaker=None):
+    # runs fn on every batch with up to max_concurrency LLM calls in flight.
+    # results come back in batch order, so merging them is the same as sequentially.
+    # Batches that would start after the budget is used up, or after the breaker
+    # tripped, are skipped (None).
+    max_concurrency = max(1, config["SELECTION"].getint("max_concurrency", 1))
+
+    def timed(batch):
+        if stop_reason(budget, breaker):
+            return None, None
+        start = time.perf_counter()
+        result = fn(batch)
+        return result, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results, latencies = [], []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for i, (result, elapsed) in enumerate(
+            tqdm(executor.map(timed, batches), total=len(batches))
+        ):
+            results.append(result)
+            if elapsed is None:
+                continue
+            if config["OUTPUT"].getboolean("debug_messages"):
+                logger.info(f"{stage} batch {i} took {elapsed:.2f}s")
+            latencies.append(elapsed)
+    if latencies:
+        logger.info(
+            f"{stage}: {len(latencies)} batches in {time.perf_counter() - start:.1f}s "
+            f"with {max_concurrency} concurrent, batch latency mean "
+            f"{sum(latencies) / len(latencies):.2f}s max {max(latencies):.2f}s"
+        )
+    return results
+
+
+def run_abstract_filter_on_batch(
+    batch, config, client, base_prompt, criterion, usage=None, prompt_cache=None
+):
+    # returns (papers of the batch the LLM did not filter out, cost), None instead of
+    # the papers if the call failed
+    papers_string = "".join([paper_to_abstract(paper) for paper in batch])
+    try:
+        response, cost = create_completion(
+            client,
+            config,
+            stage_model(config, "abstract_filter"),
+            abstract_prompt_prefix(base_prompt, criterion),
+            papers_string,
+            FilteredPapers,
+            usage,
+            "abstract_filter",
+            prompt_cache,
+        )
+    except Exception as ex:
+        logger.error("Exception happened " + str(ex))
+        if os.environ.get("GEMINI_API_KEY") is None:
+            logger.error("GEMINI_API_KEY is not set in the environment variables")
+        else:
+            logger.error(
+                f"GEMINI_API_KEY is set in the environment variables: {os.environ.get('GEMINI_API_KEY')}"
+            )
+        if not is_splittable(ex):
+            raise LLMUnavailable.from_error(ex) from ex
+        return None, 0.0
+
+    filtered_set = set(response.filtered_ids)
+    kept = []
+    for paper in batch:
+        if paper.arxiv_id not in filtered_set:
+            kept.append(paper)
+        else:
+            logger.info("Filtered out paper " + paper.arxiv_id)
+    return kept, cost
 
 
 def filter_papers_by_abstract(
-    papers, config, client, base_prompt, criterion
+    papers,
+    config,
+    client,
+    base_prompt,
+    criterion,
+    llm_cache=None,
+    usage=None,
+    budget=None,
+    prompt_cache=None,
+    breaker=None,
 ) -> List[Paper]:
-    filter_postfix = "Identify any papers that are absolutely and completely irrelavent to the criteria, and you are absolutely sure your friend will not enjoy. Return a list of arxiv IDs to filter out. Be extremely cautious, and if you are unsure at all, do not add a paper in this list. You will check it in detail later."
-    batches_of_papers = batched(papers, 10)
-    final_list = []
-    cost = 0
-    for batch in batches_of_papers:
-        papers_string = "".join([paper_to_abstract(paper) for paper in batch])
-        full_prompt = (
-            base_prompt + "\n " + criterion + "\n" + papers_string + filter_postfix
-        )
+    stage = "abstract_filter"
+    model = stage_model(config, stage)
+    template_hash = text_hash(abstract_prompt_prefix(base_prompt, ""))
+    criterion_hash = text_hash(criterion)
 
-        try:
-            response = client.chat.completions.create(
-                model=config["SELECTION"]["model"],
-                messages=[{"role": "user", "content": full_prompt}],
-                max_tokens=1024,
-                response_model=FilteredPapers,
+    # keep decisions are cached per paper, only uncached papers are batched
+    keep = {}
+    cache_keys = {}
+    uncached = papers
+    if llm_cache is not None:
+        uncached = []
+        for paper in papers:
+            cache_keys[paper.arxiv_id] = llm_cache.make_key(
+                model, stage, template_hash, criterion_hash, paper.arxiv_id
             )
-            filtered_set = set(response.filtered_ids)
-            for paper in batch:
-                if paper.arxiv_id not in filtered_set:
-                    final_list.append(paper)
-                else:
-                    logger.info("Filtered out paper " + paper.arxiv_id)
-        except Exception as ex:
-            logger.error("Exception happened " + str(ex))
-            if os.environ.get("GEMINI_API_KEY") is None:
-                logger.error("GEMINI_API_KEY is not set in the environment variables")
+            cached = llm_cache.get(stage, cache_keys[paper.arxiv_id])
+            if cached is None:
+                uncached.append(paper)
             else:
-                logger.error(
-                    f"GEMINI_API_KEY is set in the environment variables: {os.environ.get('GEMINI_API_KEY')}"
-                )
-            continue
+                keep[paper.arxiv_id] = cached["keep"]
 
+    def call(papers_in_call):
+        kept, cost = run_abstract_filter_on_batch(
+            papers_in_call,
+            config,
+            client,
+            base_prompt,
+            criterion,
+            usage,
+            prompt_cache,
+        )
+        if kept is None:
+            return None, cost
+        kept_ids = {paper.arxiv_id for paper in kept}
+        return {
+            paper.arxiv_id: paper.arxiv_id in kept_ids for paper in papers_in_call
+        }, cost
+
+    def filter_batch(batch):
+        decisions, cost, failed = salvage_batch(
+            batch, call, config["SELECTION"].getint("salvage_retries", 2), breaker
+        )
+        if llm_cache is not None:
+            for arxiv_id, keep_paper in decisions.items():
+                llm_cache.put(stage, cache_keys[arxiv_id], {"keep": keep_paper})
+        return decisions, cost, failed
+
+    batches = pack_papers(
+        uncached,
+        paper_to_abstract,
+        config,
+        abstract_prompt_prefix(base_prompt, criterion),
+        config["SELECTION"].getint("abstract_output_tokens_per_paper", 16),
+        model=model,
+        stage=stage,
+    )
+    if len(batches) < 2:
+        # a context cache only pays off if its prefix is sent more than once
+        prompt_cache = None
+    failed = []
+    cost = 0.0
+    for batch, result in zip(
+        batches,
+        run_batches(filter_batch, batches, config, "Abstract filter", budget, breaker),
+    ):
+        if result is None:
+            # skipped for lack of budget or provider, scoring marks these papers
+            # unscored
+            keep.update((paper.arxiv_id, True) for paper in batch)
+            continue
+        decisions, batch_cost, batch_failed = result
+        keep.update(decisions)
+        cost += batch_cost
+        failed += batch_failed
+    # the filter fails open, scoring decides about papers it could not check
+    for paper in failed:
+        keep[paper.arxiv_id] = True
+    report_unrecoverable("Abstract filter", failed, "kept for scoring")
+    final_list = [paper for paper in papers if keep.get(paper.arxiv_id)]
     return final_list, cost
 
 
@@ -183,23 +662,65 @@ def paper_to_abstract(paper_entry: Paper) -> str:
     )
 
 
-def run_on_batch(paper_batch, base_prompt, criterion, postfix_prompt, client, config):
+def run_on_batch(
+    paper_batch,
+    base_prompt,
+    criterion,
+    postfix_prompt,
+    client,
+    config,
+    model=None,
+    usage=None,
+    stage="scoring",
+    prompt_cache=None,
+):
     batch_str = [paper_to_string(paper) for paper in paper_batch]
-    full_prompt = "\n".join(
-        [
-            base_prompt,
-            criterion + "\n",
-            "\n\n".join(batch_str) + "\n",
-            postfix_prompt,
-        ]
+    json_dicts, cost = run_and_parse_chatgpt(
+        scoring_prompt_prefix(base_prompt, criterion, postfix_prompt),
+        "\n\n".join(batch_str) + "\n",
+        client,
+        config,
+        model,
+        usage,
+        stage,
+        prompt_cache,
     )
-    json_dicts, cost = run_and_parse_chatgpt(full_prompt, client, config)
     return json_dicts, cost
 
 
+def apply_score(jdict, all_papers, selected_papers, sort_dict, config):
+    # turns one LLM score into a selection record, selecting it if above the cutoffs
+    if jdict["ARXIVID"] not in all_papers:
+        return None
+    record = ScoredPaper(all_papers[jdict["ARXIVID"]], jdict)
+    if int(jdict["RELEVANCE"]) >= int(config["FILTERING"]["relevance_cutoff"]) and int(
+        jdict["NOVELTY"]
+    ) >= int(config["FILTERING"]["novelty_cutoff"]):
+        selected_papers[jdict["ARXIVID"]] = record
+        sort_dict[jdict["ARXIVID"]] = jdict["RELEVANCE"] + jdict["NOVELTY"]
+    return record
+
+
 def filter_by_gpt(
-    all_authors, papers, config, client, all_papers, selected_papers, sort_dict
+    all_authors,
+    papers,
+    config,
+    client,
+    all_papers,
+    selected_papers,
+    sort_dict,
+    author_index=None,
+    llm_cache=None,
+    checkpoint=None,
+    lexical=None,
+    usage=None,
+    budget=None,
+    prompt_cache=None,
+    breaker=None,
+    report=True,
 ):
+    # report=False skips the debug files and the end-of-run logs, for passes over
+    # part of the day such as the streaming pipeline's chunks
     # deal with config parsing
     with open("paper_assistant/config/base_prompt.txt", "r") as f:
         base_prompt = f.read()
@@ -209,50 +730,312 @@ def filter_by_gpt(
         postfix_prompt = f.read()
     all_cost = 0
     if config["SELECTION"].getboolean("run_litellm"):
+        if breaker is None:
+            breaker = CallBreaker.from_config(config)
+        # BM25 statistics come from all the papers given, not from the survivors of
+        # each filter, so processing a day in chunks scores every paper the same
+        if lexical is None:
+            lexical = score_criteria(papers, config, criterion)
         # filter first by hindex of authors to reduce costs.
-        paper_list = filter_papers_by_hindex(all_authors, papers, config)
+        paper_list = filter_papers_by_hindex(all_authors, papers, config, author_index)
         if config["OUTPUT"].getboolean("debug_messages"):
             logger.info(str(len(paper_list)) + " papers after hindex filtering")
-        cost = 0
-        paper_list, cost = filter_papers_by_abstract(
-            paper_list, config, client, base_prompt, criterion
+        paper_list = filter_papers_by_lexical(paper_list, config, criterion, lexical)
+        if budget is not None:
+            # the most promising papers are filtered and scored first, so running
+            # out of time or tokens only leaves the least likely ones unscored
+            paper_list = prioritize_papers(
+                paper_list, all_authors, author_index, lexical
+            )
+
+        # only send each paper the criteria it most likely matches
+        routes = route_criteria(paper_list, config, criterion, lexical)
+        criterion_texts = {}
+        scoring_model = stage_model(config, "scoring")
+        if routes:
+            # routing splits prompts by criterion, so it only saves tokens if the
+            # day needs at least one prompt per criterion anyway
+            unrouted = len(
+                pack_papers(
+                    paper_list,
+                    paper_to_string,
+                    config,
+                    scoring_prompt_prefix(base_prompt, criterion, postfix_prompt),
+                    config["SELECTION"].getint("scoring_output_tokens_per_paper", 150),
+                    max_items=config["SELECTION"].getint("batch_size", 0) or None,
+                    model=scoring_model,
+                )
+            )
+            groups = len({route[0] for route in routes.values() if route})
+            if unrouted < groups:
+                logger.info(
+                    f"Criterion routing skipped: {unrouted} prompts without it, "
+                    f"papers match {groups} criteria"
+                )
+                routes = {}
+
+        def criterion_for(papers_in_prompt):
+            # union of the routed criteria of the papers sharing a prompt
+            if not routes:
+                return criterion
+            indices = frozenset(i for p in papers_in_prompt for i in routes[p.arxiv_id])
+            if not indices:
+                return criterion
+            if indices not in criterion_texts:
+                criterion_texts[indices] = select_criteria(criterion, indices)
+            return criterion_texts[indices]
+
+        template_hash = text_hash(
+            scoring_prompt_prefix(base_prompt, "", postfix_prompt)
         )
+        scores = {}
+        if checkpoint is not None:
+            # batches completed before an interrupted run stopped
+            ids = {paper.arxiv_id for paper in paper_list}
+            scores = {
+                arxiv_id: jdict
+                for arxiv_id, jdict in checkpoint.load_scores().items()
+                if arxiv_id in ids
+            }
+
+        def pack_for_scoring(papers_to_pack, model=None):
+            # papers with the same best criterion share prompts,
+            # batch_size still caps papers per prompt, larger batches score worse
+            groups = {}
+            for paper in papers_to_pack:
+                route = routes.get(paper.arxiv_id)
+                key = route[0] if route else None
+                groups.setdefault(key, []).append(paper)
+            return [
+                (batch, criterion_for(batch))
+                for group in groups.values()
+                for batch in pack_papers(
+                    group,
+                    paper_to_string,
+                    config,
+                    scoring_prompt_prefix(
+                        base_prompt, criterion_for(group), postfix_prompt
+                    ),
+                    config["SELECTION"].getint("scoring_output_tokens_per_paper", 150),
+                    max_items=config["SELECTION"].getint("batch_size", 0) or None,
+                    model=model,
+                )
+            ]
+
+        def score_with(papers_to_score, stage, model, final):
+            # scores papers with one model, reusing cached scores whichever batch the
+            # paper was scored in before. Only final scores are checkpointed.
+            # Returns (scores, papers that could not be scored, papers skipped for
+            # lack of budget or a provider).
+            nonlocal all_cost
+            stage_scores = {}
+            cache_keys = {}
+            uncached = papers_to_score
+            if llm_cache is not None:
+                uncached = []
+                for paper in papers_to_score:
+                    cache_keys[paper.arxiv_id] = llm_cache.make_key(
+                        model,
+                        stage,
+                        template_hash,
+                        text_hash(criterion_for([paper])),
+                        paper.arxiv_id,
+                    )
+                    cached = llm_cache.get(stage, cache_keys[paper.arxiv_id])
+                    if cached is None:
+                        uncached.append(paper)
+                    else:
+                        stage_scores[paper.arxiv_id] = cached
+
+            def score_batch(job):
+                batch, batch_criterion = job
+                # only criteria shared by several prompts are worth a context cache
+                batch_prompt_cache = (
+                    prompt_cache if prompt_counts[batch_criterion] > 1 else None
+                )
+
+                def call(papers_in_call):
+                    json_dicts, cost = run_on_batch(
+                        papers_in_call,
+                        base_prompt,
+                        batch_criterion,
+                        postfix_prompt,
+                        client,
+                        config,
+                        model,
+                        usage,
+                        stage,
+                        batch_prompt_cache,
+                    )
+                    if json_dicts is None:
+                        return None, cost
+                    return match_scores(papers_in_call, json_dicts), cost
+
+                batch_scores, cost, failed = salvage_batch(
+                    batch,
+                    call,
+                    config["SELECTION"].getint("salvage_retries", 2),
+                    breaker,
+                )
+                if llm_cache is not None:
+                    for arxiv_id, jdict in batch_scores.items():
+                        llm_cache.put(stage, cache_keys[arxiv_id], jdict)
+                if checkpoint is not None and final:
+                    checkpoint.append_scores(list(batch_scores.values()))
+                return batch_scores, cost, failed
+
+            # batch the remaining papers and invoke GPT
+            jobs = pack_for_scoring(uncached, model)
+            prompt_counts = Counter(text for _, text in jobs)
+            if routes and jobs:
+                logger.info(
+                    f"Routed criteria: {len(jobs)} prompts with on average "
+                    f"{sum(estimate_tokens(text) for _, text in jobs) / len(jobs):.0f} "
+                    f"criterion tokens instead of {estimate_tokens(criterion)}"
+                )
+            failed, skipped = [], []
+            for (batch, _), result in zip(
+                jobs,
+                run_batches(
+                    score_batch, jobs, config, stage.capitalize(), budget, breaker
+                ),
+            ):
+                if result is None:
+                    skipped += batch
+                    continue
+                batch_scores, cost, batch_failed = result
+                all_cost += cost
+                stage_scores.update(batch_scores)
+                failed += batch_failed
+            return stage_scores, failed, skipped
+
+        survivors = checkpoint.load_survivors() if checkpoint is not None else None
+        if survivors is not None:
+            survivors = set(survivors)
+        tier_size = config["SELECTION"].getint("priority_tier_size", 50)
+        if budget is None or tier_size <= 0:
+            tiers = [paper_list]
+        else:
+            tiers = [
+                paper_list[i : i + tier_size]
+                for i in range(0, len(paper_list), tier_size)
+            ]
+
+        def filter_and_score(tier):
+            # abstract filter, then cascade and scoring, for one tier of papers.
+            # Returns (papers that passed the filter, papers left unscored for
+            # lack of budget or a provider, papers whose scoring failed).
+            nonlocal all_cost
+            if survivors is not None:
+                kept = [paper for paper in tier if paper.arxiv_id in survivors]
+            else:
+                kept, cost = filter_papers_by_abstract(
+                    tier,
+                    config,
+                    client,
+                    base_prompt,
+                    criterion,
+                    llm_cache,
+                    usage,
+                    budget,
+                    prompt_cache,
+                    breaker,
+                )
+                all_cost += cost
+                if checkpoint is not None and len(tiers) == 1:
+                    checkpoint.save_survivors(kept)
+
+            papers_to_score = [paper for paper in kept if paper.arxiv_id not in scores]
+            cheap = {}
+            skipped = []
+            cascade_model = config["SELECTION"].get("cascade_model", "").strip()
+            if cascade_model and papers_to_score:
+                # a cheap model scores every paper, only the ones near the cutoffs
+                # (or that it could not score) escalate to the scoring model
+                cheap, _, skipped = score_with(
+                    papers_to_score, "cascade", cascade_model, False
+                )
+                skipped_ids = {paper.arxiv_id for paper in skipped}
+                escalated = [
+                    paper
+                    for paper in papers_to_score
+                    if paper.arxiv_id not in skipped_ids
+                    and (
+                        paper.arxiv_id not in cheap
+                        or in_escalation_band(cheap[paper.arxiv_id], config)
+                    )
+                ]
+                escalated_ids = {paper.arxiv_id for paper in escalated}
+                settled = [
+                    jdict
+                    for arxiv_id, jdict in cheap.items()
+                    if arxiv_id not in escalated_ids
+                ]
+                scores.update((jdict["ARXIVID"], jdict) for jdict in settled)
+                if checkpoint is not None and settled:
+                    checkpoint.append_scores(settled)
+                logger.info(
+                    f"Cascade: {len(escalated)} of {len(papers_to_score)} papers "
+                    f"escalated from {cascade_model} to {scoring_model}"
+                )
+                papers_to_score = escalated
+            fresh, unscored, scoring_skipped = score_with(
+                papers_to_score, "scoring", scoring_model, True
+            )
+            scores.update(fresh)
+            # the cheap score stands in for an escalated paper the scoring model
+            # failed or skipped
+            for paper in unscored + scoring_skipped:
+                if paper.arxiv_id in cheap:
+                    scores[paper.arxiv_id] = cheap[paper.arxiv_id]
+            unscored = [paper for paper in unscored if paper.arxiv_id not in scores]
+            report_unrecoverable("Scoring", unscored, "left unscored")
+            skipped = [
+                paper
+                for paper in skipped + scoring_skipped
+                if paper.arxiv_id not in scores
+            ]
+            return kept, skipped, unscored
+
+        paper_list, skipped, unscored = [], [], []
+        for tier in tiers:
+            tier_kept, tier_skipped, tier_unscored = filter_and_score(tier)
+            paper_list += tier_kept
+            skipped += tier_skipped
+            unscored += tier_unscored
+        if checkpoint is not None and survivors is None and len(tiers) > 1:
+            if not skipped:
+                checkpoint.save_survivors(paper_list)
         if config["OUTPUT"].getboolean("debug_messages"):
-            logger.error(
-                str(len(paper_list))
-                + " papers after abstract filtering with cost of $"
-                + str(cost)
+            logger.info(f"{len(paper_list)} papers after abstract filtering")
+        if report and (skipped or unscored):
+            report_unscored(
+                [
+                    (skipped, stop_reason(budget, breaker)),
+                    (unscored, "the LLM call failed"),
+                ],
+                config,
             )
-        all_cost += cost
 
-        # batch the remaining papers and invoke GPT
-        batch_of_papers = batched(paper_list, int(config["SELECTION"]["batch_size"]))
+        # merge in paper order, so cached and fresh scores land the same way
         scored_batches = []
-        for batch in tqdm(batch_of_papers):
+        for batch, _ in pack_for_scoring(paper_list, scoring_model):
             scored_in_batch = []
-            json_dicts, cost = run_on_batch(
-                batch, base_prompt, criterion, postfix_prompt, client, config
-            )
-            all_cost += cost
-            for jdict in json_dicts:
-                if (
-                    int(jdict["RELEVANCE"])
-                    >= int(config["FILTERING"]["relevance_cutoff"])
-                    and jdict["NOVELTY"] >= int(config["FILTERING"]["novelty_cutoff"])
-                    and jdict["ARXIVID"] in all_papers
-                ):
-                    selected_papers[jdict["ARXIVID"]] = {
-                        **dataclasses.asdict(all_papers[jdict["ARXIVID"]]),
-                        **jdict,
-                    }
-                    sort_dict[jdict["ARXIVID"]] = jdict["RELEVANCE"] + jdict["NOVELTY"]
-                scored_in_batch.append(
-                    {
-                        **dataclasses.asdict(all_papers[jdict["ARXIVID"]]),
-                        **jdict,
-                    }
+            for paper in batch:
+                if paper.arxiv_id not in scores:
+                    continue
+                record = apply_score(
+                    scores[paper.arxiv_id],
+                    all_papers,
+                    selected_papers,
+                    sort_dict,
+                    config,
                 )
+                if record is not None:
+                    scored_in_batch.append(record)
             scored_batches.append(scored_in_batch)
+        if not report:
+            return [record for batch in scored_batches for record in batch]
         if config["OUTPUT"].getboolean("dump_debug_file"):
             with open(
                 config["OUTPUT"]["output_path"] + "gpt_paper_batches.debug.json", "w"
@@ -260,6 +1043,10 @@ def filter_by_gpt(
                 json.dump(scored_batches, outfile, cls=EnhancedJSONEncoder, indent=4)
         if config["OUTPUT"].getboolean("debug_messages"):
             logger.info("Total cost: $" + str(all_cost))
+        if llm_cache is not None:
+            llm_cache.report()
+        return [record for batch in scored_batches for record in batch]
+    return []
 
 
 if __name__ == "__main__":
@@ -298,14 +1085,14 @@ if __name__ == "__main__":
         json_dicts, cost = run_on_batch(
             batch, base_prompt, criterion, postfix_prompt, client, config
         )
+        json_dicts = json_dicts or []
         total_cost += cost
         for paper in batch:
             all_papers[paper.arxiv_id] = paper
         for jdict in json_dicts:
-            paper_outputs[jdict["ARXIVID"]] = {
-                **dataclasses.asdict(all_papers[jdict["ARXIVID"]]),
-                **jdict,
-            }
+            paper_outputs[jdict["ARXIVID"]] = ScoredPaper(
+                all_papers[jdict["ARXIVID"]], jdict
+            )
             sort_dict[jdict["ARXIVID"]] = jdict["RELEVANCE"] + jdict["NOVELTY"]
 
     logger.info("total cost:" + str(total_cost))
@@ -0,0 +1,185 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from paper_assistant.core.arxiv_scraper import Paper
+
+# words of at least two characters, hyphenated compounds kept together
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9]+(?:-[a-z0-9]+)*")
+CRITERION_HEADING_RE = re.compile(r"^\s*\d+\.\s")
+STOPWORDS = frozenset(
+    """a about above after again against all also an and any are as at be because
+    been before being between both but by can could did do does doing during each
+    either especially even few for from further had has have having how however if in
+    into is it its itself just may more most much must no nor not of off on once only
+    or other others our out over own same should so some such than that the their
+    them then there these they this those through to too under until up use used
+    using very via was we were what when where which while who whom why will with
+    within without would you your e g eg etc""".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stopwords and single characters"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def criterion_parts(criterion: str) -> List[Tuple[Optional[int], str]]:
+    """Split paper_topics.txt at its ``---`` lines into (criterion index, text) parts.
+
+    Numbered criteria get their index (0-based, in file order); anything else,
+    such as the file's title or the general guidelines, gets None.
+    """
+    parts = []
+    index = 0
+    for section in re.split(r"^\s*-{3,}\s*$", criterion, flags=re.MULTILINE):
+        lines = section.strip("\n").splitlines()
+        heading = next(
+            (i for i, line in enumerate(lines) if CRITERION_HEADING_RE.match(line)),
+            None,
+        )
+        if heading is None:
+            if section.strip():
+                parts.append((None, "\n".join(lines)))
+            continue
+        if any(line.strip() for line in lines[:heading]):
+            parts.append((None, "\n".join(lines[:heading])))
+        parts.append((index, "\n".join(lines[heading:])))
+        index += 1
+    return parts
+
+
+def split_criteria(criterion: str) -> List[str]:
+    """The numbered criteria of paper_topics.txt without their "Not Relevant" part,
+    so its terms do not pull matching papers up"""
+    criteria = []
+    for index, text in criterion_parts(criterion):
+        if index is None:
+            continue
+        relevant = []
+        for line in text.splitlines():
+            if "not relevant" in line.lower():
+                break
+            if line.strip():
+                relevant.append(line)
+        criteria.append("\n".join(relevant))
+    return criteria
+
+
+def select_criteria(criterion: str, indices: Iterable[int]) -> str:
+    """paper_topics.txt reduced to the given criteria, other parts kept as they are"""
+    indices = set(indices)
+    return "\n---\n".join(
+        text
+        for index, text in criterion_parts(criterion)
+        if index is None or index in indices
+    )
+
+
+def bm25_scores(
+    documents: List[str], queries: List[str], k1: float = 1.5, b: float = 0.75
+) -> np.ndarray:
+    """BM25 score of every document against every query, shape (docs, queries)"""
+    n_docs = len(documents)
+    doc_tokens = [TOKEN_RE.findall(document.lower()) for document in documents]
+    lengths = [len(tokens) for tokens in doc_tokens]
+    if n_docs == 0 or not any(lengths):
+        return np.zeros((n_docs, len(queries)))
+
+    # index every distinct token with C-level dict operations, stopword columns are
+    # dropped afterwards instead of filtering token by token
+    flat = [token for tokens in doc_tokens for token in tokens]
+    vocabulary = {term: index for index, term in enumerate(dict.fromkeys(flat))}
+    cols = np.fromiter(
+        map(vocabulary.__getitem__, flat), dtype=np.int64, count=len(flat)
+    )
+    rows = np.repeat(np.arange(n_docs), lengths)
+    stop = np.zeros(len(vocabulary), dtype=bool)
+    stop[[vocabulary[word] for word in STOPWORDS if word in vocabulary]] = True
+    keep = ~stop[cols]
+    rows, cols = rows[keep], cols[keep]
+
+    # duplicate (row, col) entries are summed into term frequencies
+    tf = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(n_docs, len(vocabulary))
+    )
+    doc_len = np.asarray(tf.sum(axis=1)).ravel()
+    doc_freq = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    norm = k1 * (1 - b + b * doc_len / max(doc_len.mean(), 1.0))
+    weights = tf.copy()
+    weights.data = (
+        weights.data
+        * (k1 + 1)
+        / (weights.data + np.repeat(norm, np.diff(weights.indptr)))
+        * idf[weights.indices]
+    )
+
+    # queries only count distinct terms that occur in the day's documents
+    q_rows, q_cols = [], []
+    for col, query in enumerate(queries):
+        for token in set(tokenize(query)):
+            if token in vocabulary:
+                q_rows.append(vocabulary[token])
+                q_cols.append(col)
+    query_matrix = sparse.csr_matrix(
+        (np.ones(len(q_rows)), (q_rows, q_cols)),
+        shape=(len(vocabulary), len(queries)),
+    )
+    return (weights @ query_matrix).toarray()
+
+
+class CriterionScores:
+    """BM25 scores of a set of papers against each criterion of paper_topics.txt.
+
+    Computed once over the day's papers, so the prefilter and criterion routing
+    give a paper the same scores whichever subset it is later processed in.
+    Lookups only accept papers of that set.
+    """
+
+    def __init__(self, papers: List[Paper], criterion: str):
+        self.criteria = split_criteria(criterion)
+        self._rows = {paper.arxiv_id: row for row, paper in enumerate(papers)}
+        self.scores = bm25_scores(
+            [paper.title + "\n" + paper.abstract for paper in papers],
+            self.criteria or [criterion],
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _scores_of(self, papers: List[Paper]) -> np.ndarray:
+        return self.scores[[self._rows[paper.arxiv_id] for paper in papers]]
+
+    def relevance(self, papers: List[Paper]) -> np.ndarray:
+        """Best BM25 score of each paper over all criteria"""
+        scores = self._scores_of(papers)
+        return scores.max(axis=1) if scores.size else np.zeros(len(papers))
+
+    def routes(
+        self, papers: List[Paper], top_k: int = 2, min_ratio: float = 0.5
+    ) -> List[Tuple[int, ...]]:
+        """Assign each paper the indices of the criteria it most likely matches.
+
+        A paper gets up to ``top_k`` criteria scoring at least ``min_ratio`` of its
+        best BM25 score, best first. Papers without any overlap get every criterion,
+        and every route is empty if paper_topics.txt has no numbered criteria.
+        """
+        every = tuple(range(len(self.criteria)))
+        if not self.criteria or not papers:
+            return [every] * len(papers)
+        scores = self._scores_of(papers)
+        ranked = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+        routes = []
+        for paper_scores, top in zip(scores, ranked):
+            best = paper_scores[top[0]]
+            if best <= 0:
+                routes.append(every)
+                continue
+            routes.append(
+                tuple(int(i) for i in top if paper_scores[i] >= min_ratio * best)
+            )
+        return routes
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from typing import Dict, Optional
+
+from loguru import logger
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def text_hash(text: str) -> str:
+    """Short stable hash of a prompt template or criterion text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def open_llm_cache(config) -> Optional["LLMCache"]:
+    """Open the LLM response cache configured in [SELECTION], or None if disabled"""
+    section = config["SELECTION"]
+    if not section.getboolean("llm_cache", False):
+        return None
+    return LLMCache(
+        config["OUTPUT"]["output_path"] + "llm_cache.sqlite3",
+        max_age_days=section.getfloat("llm_cache_max_age_days", 30),
+        max_entries=section.getint("llm_cache_max_entries", 100000),
+    )
+
+
+class LLMCache:
+    """Persistent per-paper cache of LLM filter decisions and scores.
+
+    Entries are keyed by (model, stage, prompt template hash, criterion hash,
+    paper ID), so a paper's result is reused whichever batch it lands in, and
+    changing the model, the prompts or paper_topics.txt invalidates it. Entries
+    older than ``max_age_days`` are evicted, then the oldest beyond
+    ``max_entries``.
+    """
+
+    def __init__(
+        self, db_path: str, max_age_days: float = 30, max_entries: int = 100000
+    ):
+        self.db_path = db_path
+        self.max_age = max_age_days * SECONDS_PER_DAY
+        self.max_entries = max_entries
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, stage TEXT NOT NULL, data TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_created "
+                "ON llm_cache (created_at)"
+            )
+        self.evict()
+
+    @staticmethod
+    def make_key(
+        model: str, stage: str, template_hash: str, criterion_hash: str, paper_id: str
+    ) -> str:
+        return hashlib.sha256(
+            "\x1f".join([model, stage, template_hash, criterion_hash, paper_id]).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+
+    def get(self, stage: str, key: str) -> Optional[Dict]:
+        """Get the cached result for a key, counting a hit or miss for the stage"""
+        with self._lock:
+            with closing(self._conn.cursor()) as cursor:
+                row = cursor.execute(
+                    "SELECT data FROM llm_cache WHERE key = ? AND created_at >= ?",
+                    (key, time.time() - self.max_age),
+                ).fetchone()
+            if row is None:
+                self.misses[stage] += 1
+                return None
+            self.hits[stage] += 1
+            return json.loads(row[0])
+
+    def put(self, stage: str, key: str, data: Dict):
+        """Cache the result the LLM gave one paper"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, stage, json.dumps(data), time.time()),
+            )
+
+    def evict(self) -> int:
+        """Drop expired entries and the oldest ones beyond max_entries"""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (time.time() - self.max_age,),
+            ).rowcount
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} LLM cache entries")
+        return removed
+
+    def report(self):
+        """Log the hit rate of every stage for this run"""
+        log_hit_rates("LLM cache", self.hits, self.misses)
+
+
+class MemoryLLMCache:
+    """LLM results of one run kept in memory, in front of an optional LLMCache.
+
+    Used by the streaming pipeline to replay the results its chunks got when the
+    whole day goes through the filters once more: everything it stores is also
+    written to the persistent cache, and persistent hits are kept in memory.
+    """
+
+    make_key = staticmethod(LLMCache.make_key)
+
+    def __init__(self, backing: Optional[LLMCache] = None):
+        self.backing = backing
+        self.hits = Counter()
+        self.misses = Counter()
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, stage: str, key: str) -> Optional[Dict]:
+        """Get the result for a key from memory, then from the persistent cache"""
+        with self._lock:
+            data = self._entries.get(key)
+        if data is None and self.backing is not None:
+            data = self.backing.get(stage, key)
+            if data is not None:
+                with self._lock:
+                    self._entries[key] = data
+        with self._lock:
+            if data is None:
+                self.misses[stage] += 1
+            else:
+                self.hits[stage] += 1
+        return data
+
+    def put(self, stage: str, key: str, data: Dict):
+        """Keep the result in memory and write it through to the persistent cache"""
+        with self._lock:
+            self._entries[key] = data
+        if self.backing is not None:
+            self.backing.put(stage, key, data)
+
+    def report(self):
+        """Log the hit rate of every stage for this run"""
+        log_hit_rates("Run results", self.hits, self.misses)
+
+
+def log_hit_rates(name: str, hits: Counter, misses: Counter):
+    for stage in sorted(set(hits) | set(misses)):
+        logger.info(
+            f"{name} {stage}: {hits[stage]} hits, {misses[stage]} misses "
+            f"({hits[stage] / max(1, hits[stage] + misses[stage]):.0%} hit rate)"
+        )
@@ -0,0 +1,166 @@
+import json
+import threading
+from typing import Iterator, Optional
+
+import pydantic
+from litellm.exceptions import (
+    APIConnectionError,
+    ContextWindowExceededError,
+    InternalServerError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+)
+from loguru import logger
+
+from paper_assistant.api.retry_policy import (
+    RETRYABLE_STATUS,
+    RetryPolicy,
+    parse_retry_after,
+)
+
+# a smaller batch may get past these: the answer did not parse or validate, or
+# the prompt or answer did not fit the model
+SPLITTABLE_ERRORS = (pydantic.ValidationError, json.JSONDecodeError)
+SPLITTABLE_ERROR_NAMES = {"IncompleteOutputException"}
+# the provider is throttling or briefly unreachable, the same call may pass later
+TRANSIENT_ERRORS = (
+    RateLimitError,
+    Timeout,
+    APIConnectionError,
+    InternalServerError,
+    ServiceUnavailableError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+class LLMUnavailable(Exception):
+    """An LLM call failed in a way a smaller batch will not fix (transport,
+    authentication, provider outage)"""
+
+    def __init__(
+        self, message: str, transient: bool = False, retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.transient = transient
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_error(cls, error: BaseException) -> "LLMUnavailable":
+        return cls(str(error), is_transient(error), retry_after(error))
+
+
+def error_chain(error: BaseException) -> Iterator[BaseException]:
+    """The error and every error it wraps.
+
+    instructor wraps failures in InstructorRetryException (or tenacity's
+    RetryError), so causes, arguments and tenacity's last attempt are followed.
+    """
+    seen = set()
+    stack = [error]
+    while stack:
+        current = stack.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack += [current.__cause__, current.__context__]
+        stack += [arg for arg in current.args if isinstance(arg, BaseException)]
+        last_attempt = getattr(current, "last_attempt", None)
+        if last_attempt is not None:
+            stack.append(last_attempt.exception())
+
+
+def is_splittable(error: BaseException) -> bool:
+    """True if splitting the batch may avoid the error"""
+    return any(
+        isinstance(current, SPLITTABLE_ERRORS + (ContextWindowExceededError,))
+        or type(current).__name__ in SPLITTABLE_ERROR_NAMES
+        for current in error_chain(error)
+    )
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for rate limits, timeouts, connection errors and 5xx answers"""
+    return any(
+        isinstance(current, TRANSIENT_ERRORS)
+        or getattr(current, "status_code", None) in RETRYABLE_STATUS
+        for current in error_chain(error)
+    )
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked to wait before the next call, if it said"""
+    for current in error_chain(error):
+        response = getattr(current, "response", None)
+        for headers in (
+            getattr(current, "headers", None),
+            getattr(current, "litellm_response_headers", None),
+            getattr(response, "headers", None),
+        ):
+            if headers:
+                seconds = parse_retry_after(headers.get("retry-after"))
+                if seconds is not None:
+                    return seconds
+    return None
+
+
+class CallBreaker:
+    """Retries transient LLM failures and stops the LLM stages after repeated
+    calls failed for lack of a provider.
+
+    Rate limits, timeouts, connection errors and 5xx answers are retried under
+    ``retry_policy`` (backoff with jitter, honouring Retry-After). Consecutive
+    other LLMUnavailable failures (authentication, unknown model) are counted;
+    a call that got any answer, even one that did not parse, resets the count.
+    Once ``threshold`` calls in a row failed, batches that have not started are
+    skipped, like when a ScoringBudget is used up.
+    """
+
+    def __init__(self, threshold: int = 3, retry_policy: Optional[RetryPolicy] = None):
+        self.threshold = max(1, threshold)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._failures = 0
+        self._reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "CallBreaker":
+        section = config["SELECTION"]
+        return cls(
+            section.getint("llm_failure_limit", 3),
+            RetryPolicy(
+                tries=section.getint("llm_retry_tries", 4),
+                base_delay=section.getfloat("llm_retry_base_delay", 2.0),
+                max_delay=section.getfloat("llm_retry_max_delay", 60.0),
+            ),
+        )
+
+    def retry_delay(self, error: LLMUnavailable, attempt: int) -> Optional[float]:
+        """Seconds to wait before calling again after a failed attempt (counted
+        from 0), None if the call should not be retried"""
+        if not error.transient or attempt + 1 >= self.retry_policy.tries:
+            return None
+        if self.exhausted():
+            return None
+        return self.retry_policy.backoff(attempt, error.retry_after)
+
+    def record(self, error: Optional[LLMUnavailable] = None):
+        """Record a call, failed with error or answered if error is None.
+        Transient failures do not count toward the threshold."""
+        with self._lock:
+            if error is None:
+                self._failures = 0
+                return
+            if error.transient:
+                return
+            self._failures += 1
+            if self._failures >= self.threshold and self._reason is None:
+                self._reason = f"{self._failures} LLM calls in a row failed ({error})"
+                logger.warning(f"{self._reason}, skipping the remaining batches")
+
+    def exhausted(self) -> Optional[str]:
+        """Why no more LLM calls should start, or None"""
+        with self._lock:
+            return self._reason
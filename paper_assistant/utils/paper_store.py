@@ -0,0 +1,247 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from paper_assistant.core.arxiv_scraper import ScoredPaper
+
+DATED_KEY_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})_(output|authors)$")
+PAPER_FIELDS = ("authors", "title", "abstract", "arxiv_id")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    arxiv_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    title TEXT,
+    abstract TEXT,
+    authors TEXT,
+    PRIMARY KEY (arxiv_id, date)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    arxiv_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    relevance INTEGER,
+    novelty INTEGER,
+    comment TEXT,
+    criterion TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (arxiv_id, date)
+);
+CREATE TABLE IF NOT EXISTS authors (
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (name, date)
+);
+CREATE TABLE IF NOT EXISTS qa (
+    arxiv_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_date ON papers (date);
+CREATE INDEX IF NOT EXISTS idx_scores_date_rank ON scores (date, rank);
+CREATE INDEX IF NOT EXISTS idx_authors_date ON authors (date);
+"""
+
+
+def open_paper_store(config) -> Optional["PaperStore"]:
+    """Open the store configured by [OUTPUT] paper_store, or None if unset"""
+    db_path = os.getenv("PAPER_STORE") or config["OUTPUT"].get("paper_store", "")
+    return PaperStore(db_path) if db_path.strip() else None
+
+
+class PaperStore:
+    """Embedded SQLite store for daily papers, scores, author metadata and Q&A.
+
+    Replaces the per-day JSON files under out/cache so the web routes can look up
+    a single day or paper without loading and parsing whole files.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # one short-lived connection per call keeps the store safe to share across
+        # Flask request threads and the scheduler thread
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def save_output(self, date: str, selected_papers: Dict):
+        """Replace the selected papers of a day, keeping their ranked order"""
+        rows_papers, rows_scores = [], []
+        for rank, (key, record) in enumerate(selected_papers.items()):
+            entry = record.to_dict() if isinstance(record, ScoredPaper) else record
+            arxiv_id = entry.get("arxiv_id") or entry.get("ARXIVID") or key
+            rows_papers.append(
+                (
+                    arxiv_id,
+                    date,
+                    entry.get("title"),
+                    entry.get("abstract"),
+                    json.dumps(entry.get("authors")),
+                )
+            )
+            extra = {k: v for k, v in entry.items() if k not in PAPER_FIELDS}
+            rows_scores.append(
+                (
+                    arxiv_id,
+                    date,
+                    rank,
+                    entry.get("RELEVANCE"),
+                    entry.get("NOVELTY"),
+                    entry.get("COMMENT"),
+                    entry.get("CRITERION"),
+                    json.dumps(extra),
+                )
+            )
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM scores WHERE date = ?", (date,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?)", rows_papers
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows_scores,
+            )
+
+    def get_output(self, date: str) -> Optional[Dict]:
+        """Get a day's selected papers in the output.json layout, or None"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT p.arxiv_id, p.title, p.abstract, p.authors, s.data "
+                "FROM scores s JOIN papers p "
+                "ON p.arxiv_id = s.arxiv_id AND p.date = s.date "
+                "WHERE s.date = ? ORDER BY s.rank",
+                (date,),
+            ).fetchall()
+        if not rows:
+            return None
+        return {
+            arxiv_id: {
+                "authors": json.loads(authors),
+                "title": title,
+                "abstract": abstract,
+                "arxiv_id": arxiv_id,
+                **json.loads(data),
+            }
+            for arxiv_id, title, abstract, authors, data in rows
+        }
+
+    def find_paper(self, arxiv_id: str, date: Optional[str] = None) -> Optional[Dict]:
+        """Look up one selected paper by (version-less) arXiv ID, newest day first"""
+        query = (
+            "SELECT p.arxiv_id, p.title, p.abstract, p.authors, s.data "
+            "FROM scores s JOIN papers p "
+            "ON p.arxiv_id = s.arxiv_id AND p.date = s.date "
+            "WHERE (s.arxiv_id = ? OR s.arxiv_id LIKE ?)"
+        )
+        params = [arxiv_id, arxiv_id + "v%"]
+        if date:
+            query += " AND s.date = ?"
+            params.append(date)
+        with closing(self._connect()) as conn:
+            row = conn.execute(query + " ORDER BY s.date DESC", params).fetchone()
+        if row is None:
+            return None
+        paper_id, title, abstract, authors, data = row
+        return {
+            "authors": json.loads(authors),
+            "title": title,
+            "abstract": abstract,
+            "arxiv_id": paper_id,
+            **json.loads(data),
+        }
+
+    def get_dates(self) -> List[str]:
+        """Get all days with stored output, newest first"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT date FROM scores ORDER BY date DESC"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def save_authors(self, date: str, authors: Dict):
+        """Store the author metadata resolved for a day"""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO authors VALUES (?, ?, ?)",
+                [(name, date, json.dumps(data)) for name, data in authors.items()],
+            )
+
+    def get_authors(self, date: str) -> Optional[Dict]:
+        """Get the author metadata of a day, or None"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM authors WHERE date = ?", (date,)
+            ).fetchall()
+        return {name: json.loads(data) for name, data in rows} or None
+
+    def save_qa(self, arxiv_id: str, qa_results: Dict):
+        """Store Q&A results of a paper"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO qa VALUES (?, ?)",
+                (arxiv_id, json.dumps(qa_results, ensure_ascii=False)),
+            )
+
+    def get_qa(self, arxiv_id: str) -> Optional[Dict]:
+        """Get cached Q&A results of a paper, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT data FROM qa WHERE arxiv_id = ?", (arxiv_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """CacheHandler-style lookup: {date}_output, {date}_authors or a Q&A id"""
+        match = DATED_KEY_RE.match(cache_key)
+        if match is None:
+            return self.get_qa(cache_key)
+        date, kind = match.groups()
+        return self.get_output(date) if kind == "output" else self.get_authors(date)
+
+    def save(self, cache_key: str, data: Dict):
+        """CacheHandler-style write, see get()"""
+        match = DATED_KEY_RE.match(cache_key)
+        if match is None:
+            self.save_qa(cache_key, data)
+            return
+        date, kind = match.groups()
+        if kind == "output":
+            self.save_output(date, data)
+        else:
+            self.save_authors(date, data)
+
+    def import_json_caches(
+        self, cache_dir: str = "out/cache", qa_cache_dir: str = "out/qa_cache"
+    ) -> Dict[str, int]:
+        """Import existing {date}_output/{date}_authors and Q&A JSON caches"""
+        counts = {"output": 0, "authors": 0, "qa": 0}
+        for path in sorted(glob.glob(os.path.join(cache_dir, "*.json"))):
+            cache_key = os.path.splitext(os.path.basename(path))[0]
+            match = DATED_KEY_RE.match(cache_key)
+            if match is None:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.save(cache_key, json.load(f))
+                counts[match.group(2)] += 1
+            except Exception as e:
+                logger.error(f"Error importing {path}: {e}")
+        for path in sorted(glob.glob(os.path.join(qa_cache_dir, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.save_qa(
+                        os.path.splitext(os.path.basename(path))[0], json.load(f)
+                    )
+                counts["qa"] += 1
+            except Exception as e:
+                logger.error(f"Error importing {path}: {e}")
+        return counts
@@ -0,0 +1,99 @@
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import litellm
+from loguru import logger
+
+TOKENS_PER_PRICE_UNIT = 1_000_000
+
+
+def usage_tokens(completion) -> Tuple[int, int, int]:
+    """(prompt, completion, cached prompt) tokens reported by a litellm response"""
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or getattr(
+        usage, "cache_read_input_tokens", None
+    )
+    return (
+        int(getattr(usage, "prompt_tokens", 0) or 0),
+        int(getattr(usage, "completion_tokens", 0) or 0),
+        int(cached or 0),
+    )
+
+
+def open_price_table(config) -> "PriceTable":
+    """Price table configured in [SELECTION] price_table"""
+    return _load_price_table(
+        config["SELECTION"].get(
+            "price_table", "paper_assistant/config/model_prices.json"
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_price_table(path: str) -> "PriceTable":
+    return PriceTable(path)
+
+
+class PriceTable:
+    """Prices per million input, cached input and output tokens by model.
+
+    Read from a JSON file so prices can be updated without a release. A model is
+    looked up as configured (e.g. ``gemini/gemini-2.0-flash``), then without its
+    provider prefix, then in litellm's own price table. Unknown models cost 0 and
+    are logged once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.prices: Dict[str, Dict[str, float]] = {}
+        self._unknown = set()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.prices = {
+                        model: prices
+                        for model, prices in json.load(f).items()
+                        if not model.startswith("_")
+                    }
+            except Exception as e:
+                logger.error(f"Error reading price table {path}: {e}")
+
+    def lookup(self, model: str) -> Optional[Dict[str, float]]:
+        for name in (model, model.split("/", 1)[-1]):
+            if name in self.prices:
+                return self.prices[name]
+        return None
+
+    def cost(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+    ) -> float:
+        """Cost in USD of one call"""
+        prices = self.lookup(model)
+        if prices is not None:
+            input_price = prices.get("input", 0.0)
+            return (
+                (prompt_tokens - cached_tokens) * input_price
+                + cached_tokens * prices.get("cached_input", input_price)
+                + completion_tokens * prices.get("output", 0.0)
+            ) / TOKENS_PER_PRICE_UNIT
+        try:
+            prompt_cost, completion_cost = litellm.cost_per_token(
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+            )
+            return prompt_cost + completion_cost
+        except Exception:
+            if model not in self._unknown:
+                self._unknown.add(model)
+                logger.warning(f"No price for {model} in {self.path}, counted as $0")
+            return 0.0
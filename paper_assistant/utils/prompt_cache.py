@@ -0,0 +1,145 @@
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from loguru import logger
+
+from paper_assistant.utils.llm_cache import text_hash
+from paper_assistant.utils.token_budget import estimate_tokens
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+SECONDS_PER_MINUTE = 60
+# how providers word the rejection of an unknown, deleted or expired handle
+CACHE_REJECTIONS = ("not found", "does not exist", "expired")
+
+
+def is_cache_rejection(error: BaseException) -> bool:
+    """True if a call failed because the provider refused its cache handle"""
+    message = str(error).lower()
+    return "cache" in message and any(words in message for words in CACHE_REJECTIONS)
+
+
+def open_prompt_cache(config) -> Optional["PromptCache"]:
+    """PromptCache of [SELECTION] context_cache, or None if it is disabled"""
+    section = config["SELECTION"]
+    if not section.getboolean("context_cache", False):
+        return None
+    return PromptCache(
+        ttl_minutes=section.getint("context_cache_ttl_minutes", 60),
+        min_tokens=section.getint("context_cache_min_tokens", 1024),
+    )
+
+
+def create_gemini_cache(model: str, prefix: str, ttl_seconds: int) -> str:
+    """Store a prompt prefix as Gemini cached content, returning its name"""
+    response = requests.post(
+        f"{GEMINI_API_URL}/cachedContents",
+        params={"key": os.environ.get("GEMINI_API_KEY", "")},
+        json={
+            "model": "models/" + model.split("/", 1)[1],
+            "contents": [{"role": "user", "parts": [{"text": prefix}]}],
+            "ttl": f"{ttl_seconds}s",
+        },
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()["name"]
+
+
+def delete_gemini_cache(handle: str):
+    requests.delete(
+        f"{GEMINI_API_URL}/{handle}",
+        params={"key": os.environ.get("GEMINI_API_KEY", "")},
+        timeout=30,
+    ).raise_for_status()
+
+
+class PromptCache:
+    """Provider-side caches of the invariant prompt prefixes of one run.
+
+    The abstract filter and scoring prompts start with the same instructions and
+    criteria in every batch, only the papers after them change. For providers
+    with explicit context caching the prefix is uploaded once, the first time a
+    (model, prefix) pair is used, and every later batch sends the returned handle
+    and its papers only. Handles live for ``ttl_minutes`` and are deleted by
+    ``close`` at the end of the run.
+
+    Gemini models (``gemini/...``) are cached through its cachedContents API. A
+    client may bring its own cache with ``create_context_cache(model, prefix,
+    ttl_seconds)`` and ``delete_context_cache(handle)``, as the local stand-in
+    does. Other models get no handle and send the whole prompt, which still lets
+    providers with implicit prefix caching reuse it. Prefixes shorter than
+    ``min_tokens`` are below the providers' minimum and not cached either.
+    """
+
+    def __init__(self, ttl_minutes: int = 60, min_tokens: int = 1024):
+        self.ttl_seconds = max(1, ttl_minutes) * SECONDS_PER_MINUTE
+        self.min_tokens = min_tokens
+        # (model, prefix hash) -> handle, None if the prefix could not be cached
+        self._handles: Dict[Tuple[str, str], Optional[str]] = {}
+        self._deleters: Dict[str, Callable[[str], None]] = {}
+        self._uses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _backend(self, client, model: str):
+        # (create, delete) functions of the cache serving this client and model
+        if hasattr(client, "create_context_cache"):
+            return client.create_context_cache, client.delete_context_cache
+        if model.startswith("gemini/"):
+            return create_gemini_cache, delete_gemini_cache
+        return None
+
+    def handle(self, client, model: str, prefix: str) -> Optional[str]:
+        """Handle of the cached prefix, created on first use, or None"""
+        key = (model, text_hash(prefix))
+        # held while creating, so concurrent batches wait for the one handle
+        with self._lock:
+            if key not in self._handles:
+                self._handles[key] = self._create(client, model, prefix)
+            handle = self._handles[key]
+            if handle is not None:
+                self._uses[handle] += 1
+            return handle
+
+    def _create(self, client, model: str, prefix: str) -> Optional[str]:
+        backend = self._backend(client, model)
+        if backend is None or estimate_tokens(prefix) < self.min_tokens:
+            return None
+        create, delete = backend
+        try:
+            handle = create(model, prefix, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Could not cache the prompt prefix for {model}: {e}")
+            return None
+        logger.info(
+            f"Cached a {estimate_tokens(prefix)} token prompt prefix for {model} "
+            f"as {handle}"
+        )
+        self._deleters[handle] = delete
+        self._uses[handle] = 0
+        return handle
+
+    def invalidate(self, model: str, prefix: str):
+        """Stop using the cached prefix, e.g. after the provider rejected it"""
+        with self._lock:
+            handle = self._handles.get((model, text_hash(prefix)))
+            self._handles[(model, text_hash(prefix))] = None
+        if handle is not None:
+            logger.warning(f"Context cache {handle} rejected, sending full prompts")
+
+    def close(self):
+        """Log how often each handle was reused and delete them at the provider"""
+        with self._lock:
+            handles = dict(self._deleters)
+            uses = dict(self._uses)
+            self._handles.clear()
+            self._deleters.clear()
+            self._uses.clear()
+        for handle, delete in handles.items():
+            logger.info(f"Context cache {handle} used by {uses[handle]} calls")
+            try:
+                delete(handle)
+            except Exception as e:
+                # expires after its TTL all the same
+                logger.warning(f"Could not delete context cache {handle}: {e}")
@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+SECONDS_PER_MINUTE = 60
+
+
+class ScoringBudget:
+    """Wall-clock deadline and token budget for the LLM stages of a run.
+
+    The deadline counts from the start of the run, tokens are the prompt and
+    completion tokens the UsageTracker has recorded so far. Once either is used
+    up, LLM batches that have not started yet are skipped; batches in flight
+    finish and cached results are still used.
+    """
+
+    def __init__(
+        self,
+        deadline_minutes: Optional[float] = None,
+        token_budget: Optional[int] = None,
+        usage=None,
+    ):
+        self.start = time.monotonic()
+        self.deadline = (
+            self.start + deadline_minutes * SECONDS_PER_MINUTE
+            if deadline_minutes
+            else None
+        )
+        self.token_budget = token_budget or None
+        self.usage = usage
+        self._reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, usage=None) -> Optional["ScoringBudget"]:
+        """Budget of [SELECTION] priority_scoring, or None if it is disabled"""
+        section = config["SELECTION"]
+        if not section.getboolean("priority_scoring", False):
+            return None
+        deadline = section.get("deadline_minutes", "").strip()
+        token_budget = section.get("token_budget", "").strip()
+        return cls(
+            deadline_minutes=float(deadline) if deadline else None,
+            token_budget=int(token_budget) if token_budget else None,
+            usage=usage,
+        )
+
+    def exhausted(self) -> Optional[str]:
+        """Why no more LLM batches should start, or None while there is budget left"""
+        with self._lock:
+            if self._reason is not None:
+                return self._reason
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self._reason = (
+                    f"deadline of {(self.deadline - self.start) / SECONDS_PER_MINUTE:g} "
+                    "minutes reached"
+                )
+            elif (
+                self.token_budget is not None
+                and self.usage is not None
+                and self.usage.total_tokens() >= self.token_budget
+            ):
+                self._reason = f"token budget of {self.token_budget} used up"
+            if self._reason is not None:
+                logger.warning(f"LLM {self._reason}, skipping the remaining batches")
+            return self._reason
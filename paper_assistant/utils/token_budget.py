@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Callable, List, Optional, TypeVar
+
+import litellm
+from loguru import logger
+
+T = TypeVar("T")
+
+# output token cap per call of the abstract filter and of scoring (the cascade
+# model too), unless the config sets one
+DEFAULT_MAX_OUTPUT_TOKENS = {"abstract_filter": 1024, "scoring": 4096}
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    # tiktoken is optional and may need to download its encoding, fall back to a
+    # character estimate when that is not possible
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.info("tiktoken unavailable, estimating tokens from characters")
+        return None
+
+
+@lru_cache(maxsize=65536)
+def estimate_tokens(text: str) -> int:
+    """Local estimate of the prompt tokens of a text"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def max_output_tokens(
+    config, stage: str = "scoring", model: Optional[str] = None
+) -> int:
+    """Output token cap of one call of a stage.
+
+    ``[SELECTION] abstract_filter_max_output_tokens`` for the abstract filter,
+    ``scoring_max_output_tokens`` for scoring and the cascade, lowered to the
+    model's own limit from litellm's model table if that is smaller.
+    """
+    key = "abstract_filter" if stage == "abstract_filter" else "scoring"
+    cap = config["SELECTION"].getint(
+        f"{key}_max_output_tokens", DEFAULT_MAX_OUTPUT_TOKENS[key]
+    )
+    try:
+        info = litellm.get_model_info(model or config["SELECTION"]["model"])
+        if info.get("max_output_tokens"):
+            cap = min(cap, int(info["max_output_tokens"]))
+    except Exception:
+        pass
+    return cap
+
+
+def pack_batches(
+    items: List[T],
+    render: Callable[[T], str],
+    prompt_budget: int,
+    overhead_tokens: int = 0,
+    output_tokens_per_item: int = 0,
+    output_budget: Optional[int] = None,
+    max_items: Optional[int] = None,
+) -> List[List[T]]:
+    """Greedily pack items, in order, into batches that fit a token budget.
+
+    A batch is closed once the next item would push the prompt (``overhead_tokens``
+    for the instructions plus every rendered item) over ``prompt_budget``, the
+    expected answer (``output_tokens_per_item`` per item) over ``output_budget``,
+    or the batch over ``max_items``. An item too large for any batch on its own
+    gets a batch to itself.
+    """
+    item_limit = max_items or len(items) or 1
+    if output_budget and output_tokens_per_item:
+        item_limit = min(item_limit, max(1, output_budget // output_tokens_per_item))
+    batches, batch, used = [], [], overhead_tokens
+    for item in items:
+        tokens = estimate_tokens(render(item))
+        if batch and (used + tokens > prompt_budget or len(batch) >= item_limit):
+            batches.append(batch)
+            batch, used = [], overhead_tokens
+        batch.append(item)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# counters summed per (stage, model), across calls and across the runs of a day
+TOTALS = ("calls", "failures", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+class UsageTracker:
+    """Calls, tokens, cost and latency of the LLM calls of a run, per stage and model.
+
+    Every call made by the abstract filter and the scoring stages is recorded,
+    including failed ones and the retries of salvaged batches, so the report
+    shows what each stage actually cost.
+    """
+
+    def __init__(self):
+        self._latencies: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self._totals: Dict[Tuple[str, str], Dict] = defaultdict(
+            lambda: {**dict.fromkeys(TOTALS, 0), "cost": 0.0}
+        )
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        stage: str,
+        model: str,
+        elapsed: float,
+        ok: bool = True,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        cost: float = 0.0,
+    ):
+        """Record one LLM call of a stage"""
+        with self._lock:
+            self._latencies[(stage, model)].append(elapsed)
+            totals = self._totals[(stage, model)]
+            totals["calls"] += 1
+            totals["failures"] += 0 if ok else 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cached_tokens"] += cached_tokens
+            totals["cost"] += cost
+
+    def summary(self) -> Dict[Tuple[str, str], Dict]:
+        """Totals and latency statistics keyed by (stage, model)"""
+        with self._lock:
+            items = {key: sorted(values) for key, values in self._latencies.items()}
+            totals = {key: dict(values) for key, values in self._totals.items()}
+        return {
+            key: {
+                **totals[key],
+                "total_s": sum(latencies),
+                "mean_s": sum(latencies) / len(latencies),
+                "p50_s": latencies[len(latencies) // 2],
+                "max_s": latencies[-1],
+            }
+            for key, latencies in items.items()
+        }
+
+    def total_tokens(self) -> int:
+        """Prompt and completion tokens of all calls so far"""
+        with self._lock:
+            return sum(
+                totals["prompt_tokens"] + totals["completion_tokens"]
+                for totals in self._totals.values()
+            )
+
+    def report(self):
+        """Log calls, tokens, cost and latency of every stage and model"""
+        for (stage, model), stats in sorted(self.summary().items()):
+            logger.info(
+                f"LLM usage {stage} ({model}): {stats['calls']} calls, "
+                f"{stats['failures']} failed, {stats['prompt_tokens']} prompt tokens "
+                f"({stats['cached_tokens']} cached), {stats['completion_tokens']} "
+                f"completion tokens, ${stats['cost']:.4f}, latency mean "
+                f"{stats['mean_s']:.2f}s p50 {stats['p50_s']:.2f}s "
+                f"max {stats['max_s']:.2f}s, {stats['total_s']:.1f}s in total"
+            )
+
+    def save(self, usage_dir: str, date: str) -> Dict:
+        """Add this run to the usage file of a day, usage_dir/{date}.json.
+
+        The file holds totals per ``stage/model`` summed over the runs of the day
+        (reruns and resumes included). Returns the day's totals.
+        """
+        path = os.path.join(usage_dir, f"{date}.json")
+        day = load_usage(path) or {"date": date, "runs": 0, "stages": {}}
+        day["runs"] += 1
+        for (stage, model), stats in self.summary().items():
+            entry = day["stages"].setdefault(
+                f"{stage}/{model}",
+                {"stage": stage, "model": model, "total_s": 0.0, "cost": 0.0},
+            )
+            for key in TOTALS + ("cost", "total_s"):
+                entry[key] = entry.get(key, 0) + stats[key]
+        os.makedirs(usage_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(day, f, indent=2)
+        os.replace(tmp_path, path)
+        return day
+
+
+def load_usage(path: str) -> Optional[Dict]:
+    """Usage totals of a day written by UsageTracker.save, or None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading usage file {path}: {e}")
+        return None
+
+
+def compare_with_previous_day(usage_dir: str, day: Dict):
+    """Log the day's tokens and cost next to the last earlier day on record"""
+    earlier = sorted(
+        name[: -len(".json")]
+        for name in os.listdir(usage_dir)
+        if name.endswith(".json") and name[: -len(".json")] < day["date"]
+    )
+    if not earlier:
+        return
+    previous = load_usage(os.path.join(usage_dir, earlier[-1] + ".json"))
+    if previous is None:
+        return
+
+    def totals(usage):
+        stages = usage["stages"].values()
+        return (
+            sum(
+                s.get("prompt_tokens", 0) + s.get("completion_tokens", 0)
+                for s in stages
+            ),
+            sum(s.get("cost", 0.0) for s in stages),
+        )
+
+    tokens, cost = totals(day)
+    previous_tokens, previous_cost = totals(previous)
+    logger.info(
+        f"LLM usage {day['date']}: {tokens} tokens, ${cost:.4f} "
+        f"({previous['date']}: {previous_tokens} tokens, ${previous_cost:.4f})"
+    )
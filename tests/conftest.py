@@ -0,0 +1,101 @@
+import configparser
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+RSS_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<rss xmlns:arxiv="http://arxiv.org/schemas/atom" xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">
+<channel>
+<title>{area} updates on arXiv.org</title>
+<link>http://rss.arxiv.org/rss/{area}</link>
+<description>{area} updates</description>
+<lastBuildDate>Tue, 14 Jan 2025 05:00:00 +0000</lastBuildDate>
+"""
+RSS_ITEM = """<item>
+<title>Paper number {n}</title>
+<link>https://arxiv.org/abs/2501.{n:05d}</link>
+<description>arXiv:2501.{n:05d}v1 Announce Type: {announce}
+Abstract: An abstract about &lt;b&gt;small models&lt;/b&gt; number {n}.</description>
+<guid isPermaLink="false">oai:arXiv.org:2501.{n:05d}v1</guid>
+<category>{category}</category>
+<arxiv:announce_type>{announce}</arxiv:announce_type>
+<dc:creator>Alice Author, Bob Builder</dc:creator>
+</item>
+"""
+
+
+def make_rss(area: str, count: int, start: int = 0) -> bytes:
+    """arXiv-style RSS feed with ``count`` new papers primarily in ``area``"""
+    items = "".join(
+        RSS_ITEM.format(n=n, announce="new", category=area)
+        for n in range(start, start + count)
+    )
+    return (RSS_HEADER.format(area=area) + items + "</channel>\n</rss>\n").encode()
+
+
+@pytest.fixture
+def config():
+    config = configparser.ConfigParser()
+    config.read("paper_assistant/config/config.ini")
+    config["OUTPUT"]["debug_messages"] = "false"
+    return config
+
+
+class StandIn:
+    """Local HTTP server answering with a handler function, recording requests.
+
+    The handler returns (status, headers, body), body being bytes or an iterable
+    of bytes parts that are sent one by one.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.requests = []
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests.append((self.path, dict(self.headers)))
+                status, headers, body = stand_in.handle(self)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if isinstance(body, bytes):
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                # parts of a body sent as they come, until the connection closes
+                self.end_headers()
+                for part in body:
+                    self.wfile.write(part)
+                    self.wfile.flush()
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(handle):
+        servers.append(StandIn(handle))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from paper_assistant.api import api_handler
+from paper_assistant.api.api_handler import APIHandler, S2AuthError
+from paper_assistant.api.author_cache import AuthorCache
+from paper_assistant.core.arxiv_scraper import Paper
+
+KNOWN = {"authorId": "1", "name": "Known Name", "hIndex": 20}
+
+
+def search_handler(status_for_name):
+    # author search stand-in: a status per name, 200 answers from KNOWN
+    def handle(request):
+        name = parse_qs(urlparse(request.path).query)["query"][0]
+        status = status_for_name(name)
+        if status != 200:
+            return status, {}, b"{}"
+        data = [KNOWN] if name == KNOWN["name"] else []
+        return (
+            200,
+            {"Content-Type": "application/json"},
+            json.dumps({"data": data}).encode(),
+        )
+
+    return handle
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return APIHandler(
+        author_cache=AuthorCache(str(tmp_path / "authors.sqlite3")),
+        requests_per_second=1000,
+        deferred_passes=0,
+    )
+
+
+def use(server, monkeypatch):
+    monkeypatch.setattr(api_handler, "S2_API_URL", server.url)
+
+
+def test_only_real_empty_results_are_negative_cached(stand_in, monkeypatch, handler):
+    use(
+        stand_in(search_handler(lambda name: 400 if name == "Bad Query" else 200)),
+        monkeypatch,
+    )
+
+    found = handler.get_authors(["Known Name", "Nobody", "Bad Query"])
+
+    assert found == {"Known Name": [KNOWN]}
+    cache = handler.author_cache
+    assert cache.lookup("Known Name") == (True, [KNOWN])
+    assert cache.lookup("Nobody") == (True, None)
+    # the rejected request says nothing about the name, look it up again next run
+    assert cache.lookup("Bad Query") == (False, None)
+
+
+def test_rejected_key_is_fatal_and_not_cached(stand_in, monkeypatch, handler):
+    use(stand_in(search_handler(lambda name: 403)), monkeypatch)
+
+    with pytest.raises(S2AuthError):
+        handler.get_authors(["Known Name", "Nobody"])
+
+    assert handler.author_cache.lookup("Nobody") == (False, None)
+
+
+def test_unmatched_paper_authors_fall_back_to_name_search(stand_in, monkeypatch):
+    # S2 lists one of the three arXiv authors under another name and adds one
+    s2_authors = [
+        {"authorId": "1", "name": "Known Name"},
+        {"authorId": "2", "name": "B. Builder"},
+        {"authorId": "3", "name": "Extra Person"},
+        {"authorId": "4", "name": "Yet Another"},
+    ]
+    details = {
+        "1": KNOWN,
+        "2": {"authorId": "2", "name": "B. Builder", "hIndex": 5},
+    }
+    searched = []
+
+    def handle(request):
+        path = urlparse(request.path).path
+        if path.endswith("author/search"):
+            name = parse_qs(urlparse(request.path).query)["query"][0]
+            searched.append(name)
+            data = [{"authorId": "9", "name": name, "hIndex": 7}]
+        else:
+            body = json.loads(
+                request.rfile.read(int(request.headers["Content-Length"]))
+            )
+            if path.endswith("paper/batch"):
+                data = [{"authors": s2_authors} for _ in body["ids"]]
+            else:
+                data = [details.get(author_id) for author_id in body["ids"]]
+            return 200, {"Content-Type": "application/json"}, json.dumps(data).encode()
+        return (
+            200,
+            {"Content-Type": "application/json"},
+            json.dumps({"data": data}).encode(),
+        )
+
+    use(stand_in(handle), monkeypatch)
+    handler = APIHandler(
+        requests_per_second=1000, resolution_mode="paper_batch", deferred_passes=0
+    )
+    paper = Paper(
+        arxiv_id="2501.00001",
+        authors=["Known Name", "Bob Builder", "Carol Coder"],
+        title="A paper",
+        abstract="An abstract",
+    )
+
+    found = handler.resolve_authors([paper])
+
+    assert found["Known Name"] == [KNOWN]
+    # neither name is in the S2 author list, so both are searched for by name
+    assert sorted(searched) == ["Bob Builder", "Carol Coder"]
+    assert found["Carol Coder"][0]["authorId"] == "9"
+
+
+def test_default_rate_stays_within_the_s2_quota(stand_in, monkeypatch):
+    # 429 for requests closer together than S2's 1 request per second
+    accepted, throttled = [], []
+
+    def handle(request):
+        now = time.monotonic()
+        with lock:
+            if accepted and now - accepted[-1] < 0.9:
+                throttled.append(now)
+                return 429, {}, b"{}"
+            accepted.append(now)
+        return search_handler(lambda name: 200)(request)
+
+    lock = threading.Lock()
+    use(stand_in(handle), monkeypatch)
+    handler = APIHandler(s2_api_key="key", max_workers=4, deferred_passes=0)
+
+    found = handler.get_authors(["Known Name", "A", "B", "C"])
+
+    assert found == {"Known Name": [KNOWN]}
+    assert throttled == []
+    assert len(accepted) == 4
@@ -0,0 +1,97 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from paper_assistant.api.api_handler import APIHandler
+from paper_assistant.cli import commands
+from paper_assistant.core.paper_processor import PaperProcessor
+
+from test_criterion_routing import make_papers
+
+
+class StopScheduler(BaseException):
+    pass
+
+
+def test_scheduled_generate_retries_a_failed_run(monkeypatch):
+    runs, sleeps = [], []
+
+    def generate(args):
+        runs.append(args.resume)
+        if len(runs) == 1:
+            raise RuntimeError("S2 down")
+        if len(runs) == 3:
+            raise StopScheduler()
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(commands, "generate_command", generate)
+    monkeypatch.setattr(commands.time, "sleep", sleep)
+    with pytest.raises(StopScheduler):
+        commands.scheduled_generate(argparse.Namespace(resume=True))
+
+    # wait for 9 AM, fail, retry 5 minutes later, then wait for the next day
+    assert len(runs) == 3
+    assert sleeps[1] == 300
+    assert sleeps[2] != 300
+
+
+def test_generate_failure_raises_instead_of_exiting(monkeypatch):
+    def broken_config(*args, **kwargs):
+        raise RuntimeError("no config")
+
+    monkeypatch.setattr(commands.configparser.ConfigParser, "read", broken_config)
+    with pytest.raises(RuntimeError):
+        commands.generate_command(
+            argparse.Namespace(config=None, dry_run=False, resume=False)
+        )
+
+
+@pytest.fixture
+def run_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["SELECTION"]["context_cache"] = "false"
+    config["FILTERING"]["hcutoff"] = "0"
+    return config
+
+
+def test_dry_run_writes_no_checkpoint(run_config, tmp_path, monkeypatch):
+    config_path = tmp_path / "config.ini"
+    with open(config_path, "w") as f:
+        run_config.write(f)
+    authors_path = tmp_path / "authors.txt"
+    authors_path.write_text("")
+    monkeypatch.setattr(commands, "run_streaming", lambda *args: None)
+    monkeypatch.setattr(
+        PaperProcessor, "get_papers_from_arxiv", lambda self, config: make_papers(20)
+    )
+    monkeypatch.setattr(APIHandler, "resolve_authors", lambda self, papers: {})
+
+    commands.generate_command(
+        argparse.Namespace(
+            config=str(config_path),
+            authors=str(authors_path),
+            dry_run=True,
+            resume=False,
+            debug=False,
+            output_format="json",
+        )
+    )
+    assert not os.path.exists(tmp_path / "checkpoints")
+
+
+def test_stale_checkpoints_are_pruned(run_config, tmp_path):
+    run_config["OUTPUT"]["checkpoint_max_age_days"] = "7"
+    checkpoints = tmp_path / "checkpoints"
+    recent = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
+    for name in ("2020-01-01", "2020-01-02-dry-run", recent):
+        (checkpoints / name).mkdir(parents=True)
+
+    checkpoint = PaperProcessor(run_config).open_checkpoint()
+
+    assert sorted(os.listdir(checkpoints)) == sorted(
+        [recent, os.path.basename(checkpoint.checkpoint_dir)]
+    )
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+from paper_assistant.api.local_llm import LocalLLMClient
+from paper_assistant.core.arxiv_scraper import Paper
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.utils.filter_papers import route_criteria, stage_model
+
+
+def make_papers(count):
+    with open("paper_assistant/config/paper_topics.txt", "r") as f:
+        words = re.findall(r"[a-z]{5,}", f.read().lower())
+    return [
+        Paper(
+            arxiv_id=f"2501.{n:05d}",
+            authors=[f"Author {n}"],
+            title=f"Paper {n}",
+            abstract=" ".join(words[(n * 7 + i * 13) % len(words)] for i in range(60)),
+        )
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def scoring_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["OUTPUT"]["dump_debug_file"] = "false"
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["SELECTION"]["criterion_routing"] = "true"
+    config["SELECTION"]["batch_size"] = "10"
+    config["FILTERING"]["hcutoff"] = "0"
+    config["FILTERING"]["lexical_prefilter"] = "false"
+    return config
+
+
+def scoring_calls(config, papers):
+    processor = PaperProcessor(config)
+    processor.process_papers(papers, {}, set(), LocalLLMClient(), config)
+    return processor.usage.summary()[("scoring", stage_model(config, "scoring"))][
+        "calls"
+    ]
+
+
+def test_topics_without_numbered_criteria_are_not_routed(config):
+    papers = make_papers(3)
+    assert route_criteria(papers, config, "Anything about small language models") == {}
+
+
+def test_small_day_is_scored_without_routing(scoring_config):
+    # 12 papers fit in 2 prompts, routing would split them by criterion
+    assert scoring_calls(scoring_config, make_papers(12)) == 2
+
+
+def test_large_day_is_routed(scoring_config):
+    papers = make_papers(200)
+    routed = scoring_calls(scoring_config, papers)
+    scoring_config["SELECTION"]["criterion_routing"] = "false"
+    # more, smaller prompts: each carries only its papers' criteria
+    assert routed > scoring_calls(scoring_config, papers) == 20
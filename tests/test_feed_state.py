@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from paper_assistant.core import arxiv_scraper
+from paper_assistant.core.feed_state import FeedStateStore
+from paper_assistant.core.paper_processor import PaperProcessor
+
+from conftest import make_rss
+
+ETAG = '"feed-v1"'
+LAST_MODIFIED = "Tue, 14 Jan 2025 05:00:00 GMT"
+
+
+@pytest.fixture
+def arxiv_feed(stand_in, monkeypatch):
+    # answers 304 once the client sends the ETag it was given
+    def handle(request):
+        if request.headers.get("If-None-Match") == ETAG:
+            return 304, {"ETag": ETAG}, b""
+        return (
+            200,
+            {
+                "Content-Type": "application/rss+xml",
+                "ETag": ETAG,
+                "Last-Modified": LAST_MODIFIED,
+            },
+            make_rss("cs.CL", 5),
+        )
+
+    server = stand_in(handle)
+    monkeypatch.setattr(arxiv_scraper, "ARXIV_RSS_URL", server.url)
+    return server
+
+
+@pytest.mark.parametrize("parser", ["feedparser", "streaming"])
+def test_unchanged_feed_replays_papers_on_304(arxiv_feed, config, tmp_path, parser):
+    config["FILTERING"]["rss_parser"] = parser
+    feed_state = FeedStateStore(str(tmp_path / "feed_state.json"))
+
+    first, timestamp, last_id = arxiv_scraper.get_papers_from_arxiv_rss(
+        "cs.CL", config, feed_state
+    )
+    assert [paper.arxiv_id for paper in first] == [f"2501.{n:05d}" for n in range(5)]
+    assert feed_state.get("cs.CL")["etag"] == ETAG
+
+    # a rerun, e.g. after the first run crashed before writing its outputs
+    rerun = FeedStateStore(str(tmp_path / "feed_state.json"))
+    second, second_timestamp, second_last_id = arxiv_scraper.get_papers_from_arxiv_rss(
+        "cs.CL", config, rerun
+    )
+    assert arxiv_feed.requests[-1][1].get("If-None-Match") == ETAG
+    assert [paper.to_dict() for paper in second] == [paper.to_dict() for paper in first]
+    assert (second_timestamp, second_last_id) == (timestamp, last_id)
+
+
+def test_validators_not_sent_without_stored_papers(arxiv_feed, config, tmp_path):
+    feed_state = FeedStateStore(str(tmp_path / "feed_state.json"))
+    # state of a run whose papers were not stored cannot be replayed
+    feed_state.update("cs.CL", etag=ETAG, modified=LAST_MODIFIED)
+
+    papers, _, _ = arxiv_scraper.get_papers_from_arxiv_rss("cs.CL", config, feed_state)
+
+    assert "If-None-Match" not in arxiv_feed.requests[-1][1]
+    assert len(papers) == 5
+
+
+def test_streaming_parser_hands_papers_on_while_downloading(
+    stand_in, monkeypatch, config, tmp_path
+):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["FILTERING"]["rss_parser"] = "streaming"
+    config["FILTERING"]["conditional_fetch"] = "false"
+    got_chunk = threading.Event()
+    waited = []
+
+    def handle(request):
+        feed = make_rss("cs.CL", 400)
+        middle = feed.index(b"<item>", len(feed) // 2)
+
+        def body():
+            # the second half only follows once the first chunk was handed on
+            yield feed[:middle]
+            waited.append(got_chunk.wait(timeout=3))
+            yield feed[middle:]
+
+        return 200, {}, body()
+
+    monkeypatch.setattr(arxiv_scraper, "ARXIV_RSS_URL", stand_in(handle).url)
+    chunks = []
+
+    def on_chunk(chunk):
+        chunks.append(len(chunk))
+        got_chunk.set()
+
+    area, papers, _, error = PaperProcessor(config)._fetch_area(
+        "cs.CL", config, on_chunk, chunk_size=100
+    )
+
+    assert error is None
+    assert waited == [True]
+    assert chunks == [100] * 4
+    assert len(papers) == 400
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime, timedelta
+
+from paper_assistant.core.paper_ledger import PaperLedger
+
+SCORES = {"RELEVANCE": 8, "NOVELTY": 6, "COMMENT": "Fits", "CRITERION": "1"}
+
+
+def test_scores_of_another_setup_are_not_reused(tmp_path):
+    path = str(tmp_path / "paper_ledger.json")
+    ledger = PaperLedger(path, setup_hash="criteria-v1")
+    ledger.record("2501.00001v1", SCORES)
+    ledger.save()
+
+    assert PaperLedger(path, setup_hash="criteria-v1").get("2501.00001v2") == {
+        "ARXIVID": "2501.00001v2",
+        **SCORES,
+    }
+    # e.g. paper_topics.txt or the scoring model changed since
+    assert PaperLedger(path, setup_hash="criteria-v2").get("2501.00001") is None
+
+
+def test_old_entries_are_evicted(tmp_path):
+    path = tmp_path / "paper_ledger.json"
+    old = (datetime.now() - timedelta(days=40)).strftime("%Y-%m-%d")
+    recent = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
+    path.write_text(
+        json.dumps(
+            {
+                "2501.00001": {**SCORES, "date": old, "setup": "s"},
+                "2501.00002": {**SCORES, "date": recent, "setup": "s"},
+            }
+        )
+    )
+
+    ledger = PaperLedger(str(path), setup_hash="s", max_age_days=30)
+    ledger.save()
+
+    assert ledger.get("2501.00001") is None
+    assert ledger.get("2501.00002") is not None
+    assert list(json.loads(path.read_text())) == ["2501.00002"]
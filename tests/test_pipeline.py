@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+
+import pytest
+
+from paper_assistant.api import api_handler
+from paper_assistant.api.api_handler import APIHandler
+from paper_assistant.api.local_llm import LocalLLMClient
+from paper_assistant.core import arxiv_scraper
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.core.pipeline import run_streaming
+from paper_assistant.utils.llm_cache import MemoryLLMCache
+
+from conftest import make_rss
+
+
+class SignallingClient(LocalLLMClient):
+    """Stand-in telling when the first LLM call came in"""
+
+    def __init__(self):
+        super().__init__()
+        self.called = threading.Event()
+
+    def create_with_completion(self, *args, **kwargs):
+        self.called.set()
+        return super().create_with_completion(*args, **kwargs)
+
+
+@pytest.fixture
+def streaming_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["OUTPUT"]["dump_debug_file"] = "false"
+    config["PIPELINE"]["streaming"] = "true"
+    config["PIPELINE"]["chunk_size"] = "10"
+    config["FILTERING"]["arxiv_category"] = "cs.CL,cs.LG"
+    config["FILTERING"]["fetch_workers"] = "2"
+    config["FILTERING"]["conditional_fetch"] = "false"
+    config["FILTERING"]["hcutoff"] = "0"
+    config["FILTERING"]["lexical_prefilter"] = "false"
+    config["SELECTION"]["criterion_routing"] = "false"
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["SELECTION"]["context_cache"] = "false"
+    return config
+
+
+@pytest.fixture
+def slow_second_area(stand_in, monkeypatch):
+    # cs.LG only answers once the LLM got a call, or after 3 seconds
+    client = SignallingClient()
+    overlapped = []
+
+    def arxiv(request):
+        area = request.path.rsplit("/", 1)[-1]
+        if area == "cs.LG":
+            overlapped.append(client.called.wait(timeout=3))
+            return 200, {}, make_rss(area, 20, start=100)
+        return 200, {}, make_rss(area, 20)
+
+    def s2(request):
+        return 200, {}, json.dumps({"data": []}).encode()
+
+    monkeypatch.setattr(arxiv_scraper, "ARXIV_RSS_URL", stand_in(arxiv).url)
+    monkeypatch.setattr(api_handler, "S2_API_URL", stand_in(s2).url)
+    return client, overlapped
+
+
+def test_chunks_are_scored_while_areas_download(streaming_config, slow_second_area):
+    client, overlapped = slow_second_area
+    processor = PaperProcessor(streaming_config)
+    handler = APIHandler(
+        requests_per_second=1000, resolution_mode="search", deferred_passes=0
+    )
+
+    papers, all_authors, llm_cache = run_streaming(
+        streaming_config, handler, processor, client
+    )
+
+    assert overlapped == [True]
+    assert len(papers) == 40
+    # the final pass only replays what the chunks got
+    calls = client._calls
+    selected, _, sort_dict = processor.process_papers(
+        papers, all_authors, set(), client, streaming_config, llm_cache=llm_cache
+    )
+    assert client._calls == calls
+    phased = PaperProcessor(streaming_config)
+    expected, _, expected_sort_dict = phased.process_papers(
+        papers, all_authors, set(), LocalLLMClient(), streaming_config
+    )
+    assert list(processor.sort_papers(selected, sort_dict)) == list(
+        phased.sort_papers(expected, expected_sort_dict)
+    )
+
+
+def test_lexical_filters_wait_for_the_whole_day(streaming_config, slow_second_area):
+    client, overlapped = slow_second_area
+    streaming_config["SELECTION"]["criterion_routing"] = "true"
+    handler = APIHandler(
+        requests_per_second=1000, resolution_mode="search", deferred_passes=0
+    )
+
+    run_streaming(streaming_config, handler, PaperProcessor(streaming_config), client)
+
+    assert overlapped == [False]
+
+
+def test_chunks_leave_debug_files_and_reports_to_the_final_pass(
+    streaming_config, slow_second_area, monkeypatch
+):
+    client, _ = slow_second_area
+    streaming_config["OUTPUT"]["dump_debug_file"] = "true"
+    reports = []
+    monkeypatch.setattr(MemoryLLMCache, "report", lambda self: reports.append(self))
+    processor = PaperProcessor(streaming_config)
+    handler = APIHandler(
+        requests_per_second=1000, resolution_mode="search", deferred_passes=0
+    )
+    debug_path = (
+        streaming_config["OUTPUT"]["output_path"] + "gpt_paper_batches.debug.json"
+    )
+
+    papers, all_authors, llm_cache = run_streaming(
+        streaming_config, handler, processor, client
+    )
+    assert not os.path.exists(debug_path)
+    assert reports == []
+
+    processor.process_papers(
+        papers, all_authors, set(), client, streaming_config, llm_cache=llm_cache
+    )
+    # written once, with every paper of the day
+    with open(debug_path) as f:
+        assert len([paper for batch in json.load(f) for paper in batch]) == 40
+    assert reports == [llm_cache]
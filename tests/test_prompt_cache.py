@@ -0,0 +1,114 @@
+import argparse
+
+import litellm
+import pytest
+
+from paper_assistant.api.api_handler import APIHandler
+from paper_assistant.api.local_llm import LocalLLMClient
+from paper_assistant.cli import commands
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.utils.filter_papers import stage_model
+
+from test_criterion_routing import make_papers
+
+
+class ExpiringClient(LocalLLMClient):
+    """Stand-in whose context caches expire after their first use"""
+
+    def create_with_completion(self, model, messages, response_model, **kwargs):
+        handle = kwargs.get("cached_content")
+        if handle in self._caches and self._uses[handle] == 1:
+            self.delete_context_cache(handle)
+        return super().create_with_completion(model, messages, response_model, **kwargs)
+
+
+class FlakyClient(LocalLLMClient):
+    """Stand-in timing out once on a call with a context cache handle"""
+
+    timed_out = False
+
+    def create_with_completion(self, model, messages, response_model, **kwargs):
+        if kwargs.get("cached_content") and not self.timed_out:
+            self.timed_out = True
+            raise litellm.Timeout("Request timed out", model, "gemini")
+        return super().create_with_completion(model, messages, response_model, **kwargs)
+
+
+@pytest.fixture
+def cache_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["OUTPUT"]["dump_debug_file"] = "false"
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["SELECTION"]["criterion_routing"] = "false"
+    config["SELECTION"]["context_cache"] = "true"
+    config["SELECTION"]["context_cache_min_tokens"] = "0"
+    config["SELECTION"]["batch_size"] = "10"
+    config["SELECTION"]["max_concurrency"] = "1"
+    config["FILTERING"]["hcutoff"] = "0"
+    config["FILTERING"]["lexical_prefilter"] = "false"
+    return config
+
+
+def run(config, client, count=50):
+    processor = PaperProcessor(config)
+    processor.process_papers(make_papers(count), {}, set(), client, config)
+    return processor
+
+
+def test_prefix_is_cached_once_and_reused(cache_config):
+    client = LocalLLMClient()
+    run(cache_config, client)
+
+    # one handle for the scoring prefix, sent with each of the 5 batches
+    assert client.verify()
+    assert client._created[max(client._created)] == 1
+    assert max(client._uses.values()) == 5
+
+
+def test_expired_handle_falls_back_to_full_prompts(cache_config):
+    client = ExpiringClient()
+    processor = run(cache_config, client)
+
+    # rejected once, then every batch sends its prompt in full
+    assert client._rejected == 1
+    model = stage_model(cache_config, "scoring")
+    assert processor.usage.summary()[("scoring", model)]["calls"] == 6
+    assert not client.verify()
+
+
+def test_other_errors_keep_the_handle(cache_config):
+    cache_config["SELECTION"]["llm_retry_base_delay"] = "0"
+    client = FlakyClient()
+    run(cache_config, client)
+
+    # the timeout was not blamed on the cache, the retry and later batches
+    # still use it
+    assert client._rejected == 0
+    assert max(client._uses.values()) == 5
+
+
+def test_failed_dry_run_check_fails_generate(cache_config, tmp_path, monkeypatch):
+    config_path = tmp_path / "config.ini"
+    with open(config_path, "w") as f:
+        cache_config.write(f)
+    authors_path = tmp_path / "authors.txt"
+    authors_path.write_text("")
+    monkeypatch.setattr(commands, "run_streaming", lambda *args: None)
+    monkeypatch.setattr(
+        PaperProcessor, "get_papers_from_arxiv", lambda self, config: make_papers(20)
+    )
+    monkeypatch.setattr(APIHandler, "resolve_authors", lambda self, papers: {})
+    monkeypatch.setattr(LocalLLMClient, "verify", lambda self: False)
+
+    with pytest.raises(RuntimeError, match="context caching"):
+        commands.generate_command(
+            argparse.Namespace(
+                config=str(config_path),
+                authors=str(authors_path),
+                dry_run=True,
+                resume=False,
+                debug=False,
+                output_format="json",
+            )
+        )
@@ -0,0 +1,168 @@
+import json
+
+import httpx
+import litellm
+import pytest
+from pydantic import ValidationError
+
+from paper_assistant.api.local_llm import LocalLLMClient
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.utils import filter_papers
+from paper_assistant.utils.filter_papers import FilteredPapers, PaperScore, stage_model
+from paper_assistant.utils.llm_errors import is_splittable, is_transient, retry_after
+
+from test_criterion_routing import make_papers
+
+
+class ProviderErrorClient(LocalLLMClient):
+    """Stand-in whose provider fails the first ``failures`` calls with ``error``"""
+
+    def __init__(self, error, failures=None):
+        super().__init__()
+        self.error = error
+        self.failures = failures
+
+    def create_with_completion(self, model, messages, response_model, **kwargs):
+        with self._lock:
+            self._calls += 1
+            fail = self.failures is None or self._calls <= self.failures
+        if fail:
+            raise self.error
+        with self._lock:
+            self._calls -= 1
+        return super().create_with_completion(model, messages, response_model, **kwargs)
+
+
+def rate_limited(seconds):
+    return litellm.RateLimitError(
+        "Resource exhausted",
+        "gemini",
+        "gemini-2.0-flash",
+        response=httpx.Response(429, headers={"Retry-After": str(seconds)}),
+    )
+
+
+class BadPaperClient(LocalLLMClient):
+    """Stand-in that cannot score any prompt holding paper 2501.00003"""
+
+    def create_with_completion(self, model, messages, response_model, **kwargs):
+        if response_model is not FilteredPapers and "2501.00003" in str(messages):
+            with self._lock:
+                self._calls += 1
+            PaperScore.model_validate({"ARXIVID": "2501.00003"})
+        return super().create_with_completion(model, messages, response_model, **kwargs)
+
+
+@pytest.fixture
+def salvage_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["OUTPUT"]["dump_debug_file"] = "false"
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["SELECTION"]["criterion_routing"] = "false"
+    config["SELECTION"]["context_cache"] = "false"
+    config["SELECTION"]["batch_size"] = "10"
+    config["SELECTION"]["max_concurrency"] = "1"
+    config["SELECTION"]["llm_failure_limit"] = "3"
+    config["SELECTION"]["llm_retry_tries"] = "4"
+    config["FILTERING"]["hcutoff"] = "0"
+    config["FILTERING"]["lexical_prefilter"] = "false"
+    return config
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # the backoff delays slept, without sleeping
+    slept = []
+    monkeypatch.setattr(filter_papers.time, "sleep", slept.append)
+    return slept
+
+
+def scored_ids(config):
+    with open(config["OUTPUT"]["output_path"] + "gpt_paper_batches.debug.json") as f:
+        return {paper["ARXIVID"] for batch in json.load(f) for paper in batch}
+
+
+def test_rate_limits_are_retried_after_the_wait_asked_for(salvage_config, delays):
+    salvage_config["OUTPUT"]["dump_debug_file"] = "true"
+    salvage_config["SELECTION"]["max_concurrency"] = "4"
+    # the first four calls, one per concurrent batch, are throttled
+    client = ProviderErrorClient(rate_limited(7), failures=4)
+    processor = PaperProcessor(salvage_config)
+    processor.process_papers(make_papers(100), {}, set(), client, salvage_config)
+
+    # each throttled batch waited as asked and was sent again, nothing was lost
+    assert delays == [7.0] * 4
+    assert scored_ids(salvage_config) == {p.arxiv_id for p in make_papers(100)}
+    assert not processor.breaker.exhausted()
+
+
+def test_persistent_timeouts_do_not_trip_the_breaker(salvage_config, delays):
+    salvage_config["OUTPUT"]["dump_debug_file"] = "true"
+    client = ProviderErrorClient(litellm.Timeout("Request timed out", "m", "gemini"))
+    processor = PaperProcessor(salvage_config)
+    selected, _, _ = processor.process_papers(
+        make_papers(30), {}, set(), client, salvage_config
+    )
+
+    # every batch (one of the abstract filter, three of scoring) is tried
+    # llm_retry_tries times, none is split or skipped
+    assert client._calls == 4 * 4
+    assert len(delays) == 4 * 3
+    assert not processor.breaker.exhausted()
+    assert selected == {}
+    with open(
+        salvage_config["OUTPUT"]["output_path"] + "unscored_papers.debug.json"
+    ) as f:
+        unscored = json.load(f)
+    assert len(unscored) == 30
+
+
+def test_provider_errors_are_not_bisected(salvage_config, delays):
+    salvage_config["OUTPUT"]["dump_debug_file"] = "true"
+    client = ProviderErrorClient(
+        litellm.AuthenticationError("API key not valid", "gemini", "m")
+    )
+    processor = PaperProcessor(salvage_config)
+    selected, _, _ = processor.process_papers(
+        make_papers(100), {}, set(), client, salvage_config
+    )
+    # three failed batches trip the breaker without retries, the other batches
+    # never start
+    assert client._calls == 3
+    assert delays == []
+    assert processor.breaker.exhausted()
+    # unscored papers stay out of the output, listed in the debug file instead
+    assert selected == {}
+    with open(
+        salvage_config["OUTPUT"]["output_path"] + "unscored_papers.debug.json"
+    ) as f:
+        unscored = json.load(f)
+    assert len(unscored) == 100
+
+
+def test_invalid_answers_are_bisected(salvage_config):
+    client = BadPaperClient()
+    processor = PaperProcessor(salvage_config)
+    processor.process_papers(make_papers(10), {}, set(), client, salvage_config)
+    usage = processor.usage.summary()[
+        ("scoring", stage_model(salvage_config, "scoring"))
+    ]
+    # the batch of 10 is split until 2501.00003 is alone, the rest is scored
+    assert client._calls > 1
+    assert usage["calls"] > 1
+    assert not processor.breaker.exhausted()
+
+
+def test_validation_error_is_splittable():
+    with pytest.raises(ValidationError) as error:
+        PaperScore.model_validate({})
+    assert is_splittable(error.value)
+    assert not is_splittable(litellm.Timeout("Request timed out", "m", "gemini"))
+
+
+def test_transient_errors_and_retry_after():
+    assert is_transient(litellm.Timeout("Request timed out", "m", "gemini"))
+    assert is_transient(rate_limited(3))
+    assert retry_after(rate_limited(3)) == 3.0
+    assert not is_transient(litellm.AuthenticationError("bad key", "gemini", "m"))
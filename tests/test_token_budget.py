@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+import pytest
+
+from paper_assistant.api.local_llm import LocalLLMClient
+from paper_assistant.core.arxiv_scraper import Paper
+from paper_assistant.core.paper_processor import PaperProcessor
+from paper_assistant.utils.filter_papers import FilteredPapers, paper_to_string
+from paper_assistant.utils.token_budget import estimate_tokens, max_output_tokens
+
+from test_criterion_routing import make_papers
+
+
+class RecordingClient(LocalLLMClient):
+    """Stand-in keeping the max_tokens and the size of every call, per stage"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = defaultdict(list)
+
+    def create_with_completion(self, model, messages, response_model, **kwargs):
+        stage = "abstract_filter" if response_model is FilteredPapers else "scoring"
+        prompt = "".join(message["content"] for message in messages)
+        self.calls[stage].append((kwargs["max_tokens"], prompt.count("ArXiv ID: ")))
+        return super().create_with_completion(model, messages, response_model, **kwargs)
+
+
+@pytest.fixture
+def budget_config(config, tmp_path):
+    config["OUTPUT"]["output_path"] = str(tmp_path) + "/"
+    config["OUTPUT"]["dump_debug_file"] = "false"
+    config["SELECTION"]["llm_cache"] = "false"
+    config["SELECTION"]["paper_ledger"] = "false"
+    config["SELECTION"]["context_cache"] = "false"
+    config["SELECTION"]["prompt_token_budget"] = "1000000"
+    config["SELECTION"]["batch_size"] = "0"
+    config["FILTERING"]["hcutoff"] = "0"
+    return config
+
+
+def test_each_stage_keeps_its_output_cap(budget_config):
+    assert max_output_tokens(budget_config, "abstract_filter") == 1024
+    assert max_output_tokens(budget_config, "scoring") == 4096
+    assert max_output_tokens(budget_config, "cascade") == 4096
+
+
+def test_batches_are_sized_from_the_stage_caps(budget_config):
+    client = RecordingClient()
+    PaperProcessor(budget_config).process_papers(
+        make_papers(200), {}, set(), client, budget_config
+    )
+    # 1024 // 16 papers per abstract filter call, 4096 // 150 per scoring call
+    assert client.calls["abstract_filter"] == [(1024, 64)] * 3 + [(1024, 8)]
+    assert {max_tokens for max_tokens, _ in client.calls["scoring"]} == {4096}
+    assert max(papers for _, papers in client.calls["scoring"]) == 27
+
+
+def test_long_abstracts_are_sent_in_full(budget_config):
+    paper = Paper(
+        arxiv_id="2501.00001", title="Long", abstract="word " * 2000, authors=["A"]
+    )
+    assert paper.abstract in paper_to_string(paper)
+    assert estimate_tokens(paper_to_string(paper)) > 1000